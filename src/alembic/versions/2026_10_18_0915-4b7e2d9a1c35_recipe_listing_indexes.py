@@ -0,0 +1,40 @@
+"""recipe listing indexes
+
+Revision ID: 4b7e2d9a1c35
+Revises: ac6f80daf4c1
+Create Date: 2026-10-18 09:15:42.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2d9a1c35"
+down_revision: Union[str, None] = "ac6f80daf4c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_recipes_create_date_recipe_id", "recipes", ["create_date", "recipe_id"], unique=False
+    )
+    op.create_index(
+        "ix_recipes_author_id_recipe_id", "recipes", ["author_id", "recipe_id"], unique=False
+    )
+    op.create_index(
+        "ix_recipes_author_id_create_date_recipe_id",
+        "recipes",
+        ["author_id", "create_date", "recipe_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipes_author_id_create_date_recipe_id", table_name="recipes")
+    op.drop_index("ix_recipes_author_id_recipe_id", table_name="recipes")
+    op.drop_index("ix_recipes_create_date_recipe_id", table_name="recipes")
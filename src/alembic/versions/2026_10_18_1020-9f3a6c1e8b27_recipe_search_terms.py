@@ -0,0 +1,38 @@
+"""recipe search terms
+
+Revision ID: 9f3a6c1e8b27
+Revises: 4b7e2d9a1c35
+Create Date: 2026-10-18 10:20:07.531846
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9f3a6c1e8b27"
+down_revision: Union[str, None] = "4b7e2d9a1c35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recipe_search_terms",
+        sa.Column("term", sa.String(length=100), nullable=False),
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column("weight", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["recipe_id"], ["recipes.recipe_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("term", "recipe_id"),
+    )
+    op.create_index(
+        op.f("ix_recipe_search_terms_recipe_id"), "recipe_search_terms", ["recipe_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_recipe_search_terms_recipe_id"), table_name="recipe_search_terms")
+    op.drop_table("recipe_search_terms")
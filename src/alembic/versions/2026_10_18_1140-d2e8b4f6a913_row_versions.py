@@ -0,0 +1,29 @@
+"""row versions
+
+Revision ID: d2e8b4f6a913
+Revises: 9f3a6c1e8b27
+Create Date: 2026-10-18 11:40:26.104382
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2e8b4f6a913"
+down_revision: Union[str, None] = "9f3a6c1e8b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("recipes", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    op.drop_column("recipes", "version")
+    op.drop_column("users", "version")
@@ -0,0 +1,74 @@
+"""recipe rating aggregates
+
+Revision ID: 6a0c5e2f7d48
+Revises: d2e8b4f6a913
+Create Date: 2026-10-18 13:05:51.662017
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6a0c5e2f7d48"
+down_revision: Union[str, None] = "d2e8b4f6a913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AGGREGATE_COLUMNS = [
+    "rating_count",
+    "rating_sum",
+    "rating_1_count",
+    "rating_2_count",
+    "rating_3_count",
+    "rating_4_count",
+    "rating_5_count",
+]
+
+
+def upgrade() -> None:
+    for column in AGGREGATE_COLUMNS:
+        op.add_column(
+            "recipes", sa.Column(column, sa.Integer(), nullable=False, server_default="0")
+        )
+    # backfill the aggregates of the already existing ratings
+    op.execute(
+        """
+        UPDATE recipes SET
+            rating_count = (
+                SELECT COUNT(*) FROM ratings WHERE ratings.recipe_id = recipes.recipe_id
+            ),
+            rating_sum = (
+                SELECT COALESCE(SUM(rating), 0) FROM ratings
+                WHERE ratings.recipe_id = recipes.recipe_id
+            ),
+            rating_1_count = (
+                SELECT COUNT(*) FROM ratings
+                WHERE ratings.recipe_id = recipes.recipe_id AND rating = 1
+            ),
+            rating_2_count = (
+                SELECT COUNT(*) FROM ratings
+                WHERE ratings.recipe_id = recipes.recipe_id AND rating = 2
+            ),
+            rating_3_count = (
+                SELECT COUNT(*) FROM ratings
+                WHERE ratings.recipe_id = recipes.recipe_id AND rating = 3
+            ),
+            rating_4_count = (
+                SELECT COUNT(*) FROM ratings
+                WHERE ratings.recipe_id = recipes.recipe_id AND rating = 4
+            ),
+            rating_5_count = (
+                SELECT COUNT(*) FROM ratings
+                WHERE ratings.recipe_id = recipes.recipe_id AND rating = 5
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    for column in reversed(AGGREGATE_COLUMNS):
+        op.drop_column("recipes", column)
@@ -0,0 +1,77 @@
+"""feed entries
+
+Revision ID: 3c9d1f7a2b64
+Revises: 6a0c5e2f7d48
+Create Date: 2026-10-18 14:30:26.904173
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9d1f7a2b64"
+down_revision: Union[str, None] = "6a0c5e2f7d48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed_entries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["recipe_id"], ["recipes.recipe_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "recipe_id"),
+    )
+    op.create_index(op.f("ix_feed_entries_recipe_id"), "feed_entries", ["recipe_id"], unique=False)
+    op.add_column(
+        "users", sa.Column("follower_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    # backfill the follower counts of the already existing follows
+    op.execute(
+        """
+        UPDATE users SET follower_count = (
+            SELECT COUNT(*) FROM user_user_association_table
+            WHERE user_user_association_table.followed_user_id = users.user_id
+        )
+        """
+    )
+    op.create_index(
+        op.f("ix_user_user_association_table_followed_user_id"),
+        "user_user_association_table",
+        ["followed_user_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_user_tag_association_table_tag_id"),
+        "user_tag_association_table",
+        ["tag_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_recipe_tag_association_table_tag_id"),
+        "recipe_tag_association_table",
+        ["tag_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_recipe_tag_association_table_tag_id"), table_name="recipe_tag_association_table"
+    )
+    op.drop_index(
+        op.f("ix_user_tag_association_table_tag_id"), table_name="user_tag_association_table"
+    )
+    op.drop_index(
+        op.f("ix_user_user_association_table_followed_user_id"),
+        table_name="user_user_association_table",
+    )
+    op.drop_column("users", "follower_count")
+    op.drop_index(op.f("ix_feed_entries_recipe_id"), table_name="feed_entries")
+    op.drop_table("feed_entries")
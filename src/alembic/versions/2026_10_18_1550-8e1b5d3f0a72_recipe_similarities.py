@@ -0,0 +1,44 @@
+"""recipe similarities
+
+Revision ID: 8e1b5d3f0a72
+Revises: 3c9d1f7a2b64
+Create Date: 2026-10-18 15:50:13.472958
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8e1b5d3f0a72"
+down_revision: Union[str, None] = "3c9d1f7a2b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recipe_similarities",
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column("similar_recipe_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["recipe_id"], ["recipes.recipe_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["similar_recipe_id"], ["recipes.recipe_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("recipe_id", "similar_recipe_id"),
+    )
+    op.create_index(
+        op.f("ix_recipe_similarities_similar_recipe_id"),
+        "recipe_similarities",
+        ["similar_recipe_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_recipe_similarities_similar_recipe_id"), table_name="recipe_similarities"
+    )
+    op.drop_table("recipe_similarities")
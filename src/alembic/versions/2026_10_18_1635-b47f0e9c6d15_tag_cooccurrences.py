@@ -0,0 +1,65 @@
+"""tag cooccurrences
+
+Revision ID: b47f0e9c6d15
+Revises: 8e1b5d3f0a72
+Create Date: 2026-10-18 16:35:48.209631
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b47f0e9c6d15"
+down_revision: Union[str, None] = "8e1b5d3f0a72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tag_cooccurrences",
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.Column("other_tag_id", sa.Integer(), nullable=False),
+        sa.Column("recipe_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["other_tag_id"], ["tags.tag_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tag_id"], ["tags.tag_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("tag_id", "other_tag_id"),
+    )
+    op.create_index(
+        op.f("ix_tag_cooccurrences_other_tag_id"),
+        "tag_cooccurrences",
+        ["other_tag_id"],
+        unique=False,
+    )
+    op.add_column(
+        "tags", sa.Column("recipe_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    # backfill the counts of the already existing recipe tags
+    op.execute(
+        """
+        UPDATE tags SET recipe_count = (
+            SELECT COUNT(*) FROM recipe_tag_association_table
+            WHERE recipe_tag_association_table.tag_id = tags.tag_id
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO tag_cooccurrences (tag_id, other_tag_id, recipe_count)
+        SELECT tag.tag_id, other_tag.tag_id, COUNT(*)
+        FROM recipe_tag_association_table AS tag
+        JOIN recipe_tag_association_table AS other_tag
+            ON other_tag.recipe_id = tag.recipe_id AND other_tag.tag_id != tag.tag_id
+        GROUP BY tag.tag_id, other_tag.tag_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tags", "recipe_count")
+    op.drop_index(op.f("ix_tag_cooccurrences_other_tag_id"), table_name="tag_cooccurrences")
+    op.drop_table("tag_cooccurrences")
@@ -0,0 +1,61 @@
+"""nutrition per serving
+
+Revision ID: 5d2a8c6e1f39
+Revises: b47f0e9c6d15
+Create Date: 2026-10-18 17:20:31.846520
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2a8c6e1f39"
+down_revision: Union[str, None] = "b47f0e9c6d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NUTRIENTS = ["calories", "protein", "carbohydrates", "sugar", "fiber", "fat"]
+
+
+def upgrade() -> None:
+    for nutrient in NUTRIENTS:
+        op.add_column(
+            "nutrition_infos",
+            sa.Column(f"{nutrient}_per_serving", sa.Float(), nullable=False, server_default="0"),
+        )
+    # backfill the values of the already existing nutrition infos
+    servings = """
+        SELECT CASE WHEN servings > 0 THEN servings ELSE 1 END FROM recipes
+        WHERE recipes.recipe_id = nutrition_infos.recipe_id
+    """
+    op.execute(
+        "UPDATE nutrition_infos SET "
+        + ", ".join(
+            f"{nutrient}_per_serving = 1.0 * {nutrient} / ({servings})" for nutrient in NUTRIENTS
+        )
+    )
+    for nutrient in NUTRIENTS:
+        op.alter_column(
+            "nutrition_infos",
+            f"{nutrient}_per_serving",
+            existing_type=sa.Float(),
+            server_default=None,
+        )
+        op.create_index(
+            op.f(f"ix_nutrition_infos_{nutrient}_per_serving"),
+            "nutrition_infos",
+            [f"{nutrient}_per_serving"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    for nutrient in reversed(NUTRIENTS):
+        op.drop_index(
+            op.f(f"ix_nutrition_infos_{nutrient}_per_serving"), table_name="nutrition_infos"
+        )
+        op.drop_column("nutrition_infos", f"{nutrient}_per_serving")
@@ -0,0 +1,89 @@
+"""follow graph
+
+Revision ID: e3f6a9b2c4d1
+Revises: 5d2a8c6e1f39
+Create Date: 2026-10-18 18:05:12.437905
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3f6a9b2c4d1"
+down_revision: Union[str, None] = "5d2a8c6e1f39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the table is rebuilt, as duplicated and incomplete edges would violate the primary key
+    op.create_table(
+        "user_follows",
+        sa.Column("follower_id", sa.Integer(), nullable=False),
+        sa.Column("followed_user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["followed_user_id"], ["users.user_id"]),
+        sa.ForeignKeyConstraint(["follower_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("follower_id", "followed_user_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO user_follows (follower_id, followed_user_id)
+        SELECT DISTINCT follower_id, followed_user_id FROM user_user_association_table
+        WHERE follower_id IS NOT NULL AND followed_user_id IS NOT NULL
+        AND follower_id != followed_user_id
+        """
+    )
+    op.drop_table("user_user_association_table")
+    op.rename_table("user_follows", "user_user_association_table")
+    op.create_index(
+        op.f("ix_user_user_association_table_followed_user_id"),
+        "user_user_association_table",
+        ["followed_user_id"],
+        unique=False,
+    )
+    op.add_column(
+        "users", sa.Column("following_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    # backfill the counts of the deduplicated follows
+    op.execute(
+        """
+        UPDATE users SET
+        follower_count = (
+            SELECT COUNT(*) FROM user_user_association_table
+            WHERE user_user_association_table.followed_user_id = users.user_id
+        ),
+        following_count = (
+            SELECT COUNT(*) FROM user_user_association_table
+            WHERE user_user_association_table.follower_id = users.user_id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "following_count")
+    op.create_table(
+        "user_follows",
+        sa.Column("follower_id", sa.Integer(), nullable=True),
+        sa.Column("followed_user_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["followed_user_id"], ["users.user_id"]),
+        sa.ForeignKeyConstraint(["follower_id"], ["users.user_id"]),
+    )
+    op.execute(
+        """
+        INSERT INTO user_follows (follower_id, followed_user_id)
+        SELECT follower_id, followed_user_id FROM user_user_association_table
+        """
+    )
+    op.drop_table("user_user_association_table")
+    op.rename_table("user_follows", "user_user_association_table")
+    op.create_index(
+        op.f("ix_user_user_association_table_followed_user_id"),
+        "user_user_association_table",
+        ["followed_user_id"],
+        unique=False,
+    )
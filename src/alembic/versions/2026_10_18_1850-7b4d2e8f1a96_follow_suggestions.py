@@ -0,0 +1,44 @@
+"""follow suggestions
+
+Revision ID: 7b4d2e8f1a96
+Revises: e3f6a9b2c4d1
+Create Date: 2026-10-18 18:50:44.218367
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b4d2e8f1a96"
+down_revision: Union[str, None] = "e3f6a9b2c4d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "follow_suggestions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("suggested_user_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("mutual_follow_count", sa.Integer(), nullable=False),
+        sa.Column("shared_tag_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["suggested_user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "suggested_user_id"),
+    )
+    op.create_index(
+        op.f("ix_follow_suggestions_suggested_user_id"),
+        "follow_suggestions",
+        ["suggested_user_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_follow_suggestions_suggested_user_id"), table_name="follow_suggestions")
+    op.drop_table("follow_suggestions")
@@ -0,0 +1,29 @@
+"""user token version
+
+Revision ID: c8e1f4a7d203
+Revises: 7b4d2e8f1a96
+Create Date: 2026-10-18 19:35:41.208316
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e1f4a7d203"
+down_revision: Union[str, None] = "7b4d2e8f1a96"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0")
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
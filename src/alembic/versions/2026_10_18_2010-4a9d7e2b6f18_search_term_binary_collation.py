@@ -0,0 +1,43 @@
+"""search term binary collation
+
+Revision ID: 4a9d7e2b6f18
+Revises: c8e1f4a7d203
+Create Date: 2026-10-18 20:10:27.645190
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4a9d7e2b6f18"
+down_revision: Union[str, None] = "c8e1f4a7d203"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # other DBs compare strings byte by byte already
+    if op.get_bind().dialect.name == "mysql":
+        op.alter_column(
+            "recipe_search_terms",
+            "term",
+            existing_type=sa.String(100),
+            type_=mysql.VARCHAR(100, collation="utf8mb4_bin"),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "mysql":
+        op.alter_column(
+            "recipe_search_terms",
+            "term",
+            existing_type=mysql.VARCHAR(100, collation="utf8mb4_bin"),
+            type_=sa.String(100),
+            existing_nullable=False,
+        )
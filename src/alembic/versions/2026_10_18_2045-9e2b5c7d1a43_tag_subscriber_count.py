@@ -0,0 +1,38 @@
+"""tag subscriber count
+
+Revision ID: 9e2b5c7d1a43
+Revises: 4a9d7e2b6f18
+Create Date: 2026-10-18 20:45:12.318406
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2b5c7d1a43"
+down_revision: Union[str, None] = "4a9d7e2b6f18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tags", sa.Column("subscriber_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    # backfill the subscriber counts of the already existing subscriptions
+    op.execute(
+        """
+        UPDATE tags SET subscriber_count = (
+            SELECT COUNT(*) FROM user_tag_association_table
+            WHERE user_tag_association_table.tag_id = tags.tag_id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tags", "subscriber_count")
@@ -0,0 +1,25 @@
+"""Caches shared across the app.
+
+The caches live in the memory of a single process and are invalidated only by
+writes made by that process.
+"""
+
+from src.db.reference import ReferenceDataCache
+from src.utils import ConfigManager, LRUCache, TTLCache
+
+config = ConfigManager.get_config()
+
+recipe_cache = LRUCache(
+    max_entries=config.recipe_cache_max_entries, max_bytes=config.recipe_cache_max_bytes
+)
+"""ETags and serialized `Recipe` responses keyed by the recipe ID."""
+
+reference_data_cache = ReferenceDataCache(max_age=config.reference_data_max_age)
+"""Snapshot of all the measurment units and tags."""
+
+principal_cache = TTLCache(
+    max_entries=config.principal_cache_max_entries, max_age=config.principal_cache_max_age
+)
+"""Verified access token claims and detached `DB_User` snapshots keyed by the token digest,
+grouped by the user ID. Changes of a user made by other processes, including revoked
+tokens, are noticed within `principal_cache_max_age` seconds."""
@@ -1,15 +1,20 @@
 """CLI tool for managing internal workings of the app."""
 
 from datetime import datetime
+from pathlib import Path
 from typing import Annotated
 
 import typer
 from rich import print
 
 from src.db import SessionLocal
+from src.db.db import engine
+from src.db.dump import DumpFormat, DumpRestoreError, iter_db_dump, restore_db_dump
 from src.roles import Roles
-from src.routes.auth.crud import create_user
+from src.routes.auth.crud import compute_follow_suggestions, create_user
 from src.routes.auth.models import UserAdd
+from src.routes.ratings.crud import compute_recipe_similarities, recompute_rating_aggregates
+from src.routes.recipes.crud import rebuild_search_index
 
 app = typer.Typer(no_args_is_help=True)
 
@@ -40,5 +45,87 @@ def add_admin(
     db.close()
 
 
+@app.command()
+def reindex_recipes(batch_size: Annotated[int, typer.Option(min=1)] = 500) -> None:
+    """Rebuild the full-text recipe search index from the recipes stored in the DB."""
+    db = SessionLocal()
+    indexed_recipes_count = rebuild_search_index(db=db, batch_size=batch_size)
+
+    print(f"Indexed {indexed_recipes_count} recipes.")
+
+    db.close()
+
+
+@app.command()
+def recompute_ratings(batch_size: Annotated[int, typer.Option(min=1)] = 1000) -> None:
+    """Recompute rating aggregates of all recipes from the stored ratings."""
+    db = SessionLocal()
+    recomputed_recipes_count = recompute_rating_aggregates(db=db, batch_size=batch_size)
+
+    print(f"Recomputed ratings of {recomputed_recipes_count} recipes.")
+
+    db.close()
+
+
+@app.command()
+def compute_similarities(
+    top_k: Annotated[int, typer.Option(min=1)] = 20,
+    batch_size: Annotated[int, typer.Option(min=1)] = 500,
+) -> None:
+    """Compute similar recipes of all the rated recipes from the stored ratings."""
+    db = SessionLocal()
+    recipes_count = compute_recipe_similarities(db=db, top_k=top_k, batch_size=batch_size)
+
+    print(f"Computed similar recipes of {recipes_count} recipes.")
+
+    db.close()
+
+
+@app.command(name="compute-follow-suggestions")
+def compute_follow_suggestions_command(
+    top_k: Annotated[int, typer.Option(min=1)] = 20,
+    batch_size: Annotated[int, typer.Option(min=1)] = 1000,
+) -> None:
+    """Compute users to follow for all the users from the stored follows and subscribed tags."""
+    db = SessionLocal()
+    users_count = compute_follow_suggestions(db=db, top_k=top_k, batch_size=batch_size)
+
+    print(f"Computed follow suggestions of {users_count} users.")
+
+    db.close()
+
+
+@app.command()
+def export_db(
+    path: Annotated[Path, typer.Argument(dir_okay=False, writable=True)],
+    dump_format: Annotated[DumpFormat, typer.Option("--format")] = DumpFormat.NDJSON,
+) -> None:
+    """Export a consistent snapshot of the whole DB into a ZIP archive."""
+    with path.open("wb") as archive_file:
+        for chunk in iter_db_dump(engine=engine, dump_format=dump_format):
+            archive_file.write(chunk)
+
+    print(f"Exported the DB to {path}.")
+
+
+@app.command()
+def restore_db(
+    path: Annotated[Path, typer.Argument(exists=True, dir_okay=False, readable=True)],
+    batch_size: Annotated[int, typer.Option(min=1)] = 1000,
+) -> None:
+    """Restore an archive created with `export-db` into an empty DB."""
+    try:
+        with path.open("rb") as archive_file:
+            row_counts = restore_db_dump(
+                engine=engine, archive_file=archive_file, batch_size=batch_size
+            )
+    except DumpRestoreError as e:
+        print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+
+    for table_name, rows_count in row_counts.items():
+        print(f"Restored {rows_count} rows of {table_name}.")
+
+
 if __name__ == "__main__":
     app()
@@ -1,6 +1,25 @@
 """DB-related utils for the app."""
 
 from .db import SessionLocal, get_db_connection_string
+from .loaders import (
+    recipe_loader_options,
+    recipe_relationship_loaders,
+    select_loader_options,
+    user_loader_options,
+    user_relationship_loaders,
+)
 from .models import Base
+from .versions import bump_recipe_versions, bump_user_versions
 
-__all__ = ["Base", "SessionLocal", "get_db_connection_string"]
+__all__ = [
+    "Base",
+    "SessionLocal",
+    "bump_recipe_versions",
+    "bump_user_versions",
+    "get_db_connection_string",
+    "recipe_loader_options",
+    "recipe_relationship_loaders",
+    "select_loader_options",
+    "user_loader_options",
+    "user_relationship_loaders",
+]
@@ -0,0 +1,31 @@
+"""Builders of statements whose syntax differs between the supported DB dialects."""
+
+from sqlalchemy import Insert, Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+SUPPORTED_DIALECTS = {"mysql": mysql, "postgresql": postgresql, "sqlite": sqlite}
+
+
+class UnsupportedDialectError(Exception):
+    """Raised when a statement can not be built for the dialect of the DB."""
+
+
+def dialect_insert(db: Session, table: Table) -> Insert:
+    """Build an INSERT into the table using the construct of the DB's dialect.
+
+    Unlike the generic `insert`, it supports the dialect's upsert clauses, i.e.
+    `on_duplicate_key_update` on MySQL and `on_conflict_do_update` or
+    `on_conflict_do_nothing` on PostgreSQL and SQLite.
+
+    Raises:
+        UnsupportedDialectError: Raised when the DB's dialect is not one of
+                        `SUPPORTED_DIALECTS`.
+    """
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name not in SUPPORTED_DIALECTS:
+        raise UnsupportedDialectError(
+            f"Upserts are not supported for the {dialect_name} dialect, use one of: "
+            f"{', '.join(SUPPORTED_DIALECTS)}."
+        )
+    return SUPPORTED_DIALECTS[dialect_name].insert(table)
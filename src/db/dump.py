@@ -0,0 +1,229 @@
+"""Export of the whole DB into a ZIP archive and its restore.
+
+The archive contains one compressed part per table, named after the table, with
+its rows either as NDJSON or as CSV, and a `manifest.json` with the format and the
+number of rows in each part. Rows are read through a server-side cursor and
+written in batches, so the archive is built in constant memory regardless of
+the size of the DB.
+"""
+
+import csv
+import io
+import json
+import zipfile
+from datetime import date, datetime
+from enum import Enum
+from typing import IO, Any, Iterable, Iterator
+
+from sqlalchemy import Column, Engine, Table, exists, insert, select
+
+from .models import Base
+
+DUMP_BATCH_SIZE = 1000
+MANIFEST_NAME = "manifest.json"
+# marks NULL values in CSV parts, like in PostgreSQL's COPY; strings starting
+# with a backslash get another one prepended, so the string \N is not read as NULL
+CSV_NULL = "\\N"
+CSV_ESCAPE = "\\"
+
+
+class DumpFormat(str, Enum):
+    """Enum storing formats of the archive's parts."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class DumpRestoreError(Exception):
+    """Raised when an archive can not be restored into the DB."""
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Unseekable output collecting the archive's bytes until they are sent."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_db_dump(engine: Engine, dump_format: DumpFormat = DumpFormat.NDJSON) -> Iterator[bytes]:
+    """Export all the tables into a ZIP archive, yielding the archive chunk by chunk.
+
+    All the tables are read in a single REPEATABLE READ transaction, so the archive
+    is a consistent snapshot of the DB even when it is being written to meanwhile.
+    """
+    isolation_level = "SERIALIZABLE" if engine.dialect.name == "sqlite" else "REPEATABLE READ"
+    buffer = _ChunkBuffer()
+    with engine.connect().execution_options(
+        isolation_level=isolation_level
+    ) as connection, connection.begin():
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            row_counts = {}
+            for table in Base.metadata.sorted_tables:
+                row_counts[table.name] = 0
+                with archive.open(
+                    f"{table.name}.{dump_format.value}", "w", force_zip64=True
+                ) as part, io.TextIOWrapper(part, encoding="utf-8", newline="") as text:
+                    writer = csv.writer(text)
+                    if dump_format == DumpFormat.CSV:
+                        writer.writerow(table.columns.keys())
+                    result = connection.execute(
+                        select(table).execution_options(
+                            stream_results=True, yield_per=DUMP_BATCH_SIZE
+                        )
+                    )
+                    for rows in result.partitions():
+                        for row in rows:
+                            if dump_format == DumpFormat.CSV:
+                                writer.writerow(_encode_csv_value(value) for value in row)
+                            else:
+                                text.write(json.dumps(row._asdict(), default=_encode_date))
+                                text.write("\n")
+                        row_counts[table.name] += len(rows)
+                        text.flush()
+                        yield buffer.pop()
+                yield buffer.pop()
+            archive.writestr(
+                MANIFEST_NAME, json.dumps({"format": dump_format.value, "tables": row_counts})
+            )
+        yield buffer.pop()
+
+
+def restore_db_dump(
+    engine: Engine, archive_file: IO[bytes], batch_size: int = DUMP_BATCH_SIZE
+) -> dict[str, int]:
+    """Restore an archive created with `iter_db_dump` into an empty DB.
+
+    Rows are inserted with batched executemany INSERTs, tables referenced by foreign
+    keys first, in a single transaction, so a failed restore leaves the DB empty.
+
+    Raises:
+        DumpRestoreError: Raised when the archive is malformed, contains tables
+                        unknown to the DB or when the DB is not empty.
+
+    Returns:
+        Number of restored rows per table.
+    """
+    try:
+        archive = zipfile.ZipFile(archive_file)
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+        dump_format, row_counts = DumpFormat(manifest["format"]), manifest["tables"]
+        if not isinstance(row_counts, dict):
+            raise TypeError("the tables in the manifest are not a mapping")
+    except (zipfile.BadZipFile, KeyError, TypeError, ValueError) as e:
+        raise DumpRestoreError(f"The archive is malformed: {e}") from e
+    unknown_tables = set(row_counts) - set(Base.metadata.tables)
+    if unknown_tables:
+        raise DumpRestoreError(f"Unknown tables in the archive: {', '.join(unknown_tables)}.")
+
+    restored_row_counts = {}
+    with archive, engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if connection.execute(select(exists(select(table)))).scalar():
+                raise DumpRestoreError(f"Table {table.name} is not empty.")
+        for table in Base.metadata.sorted_tables:
+            if table.name not in row_counts:
+                continue
+            restored_row_counts[table.name] = 0
+            try:
+                with archive.open(f"{table.name}.{dump_format.value}") as part, io.TextIOWrapper(
+                    part, encoding="utf-8", newline=""
+                ) as text:
+                    rows = (
+                        _read_csv(table, text)
+                        if dump_format == DumpFormat.CSV
+                        else _read_ndjson(table, text)
+                    )
+                    batch = []
+                    for row in rows:
+                        batch.append(row)
+                        if len(batch) == batch_size:
+                            connection.execute(insert(table), batch)
+                            restored_row_counts[table.name] += len(batch)
+                            batch = []
+                    if batch:
+                        connection.execute(insert(table), batch)
+                        restored_row_counts[table.name] += len(batch)
+            except (zipfile.BadZipFile, csv.Error, KeyError, TypeError, ValueError) as e:
+                raise DumpRestoreError(f"The part of table {table.name} is malformed: {e}") from e
+    return restored_row_counts
+
+
+def _read_ndjson(table: Table, lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    date_columns = [column.key for column in table.columns if _python_type(column) is date]
+    for line in lines:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if not isinstance(row, dict) or row.keys() - set(table.columns.keys()):
+            raise ValueError(f"unexpected row {line.strip()}")
+        for key in date_columns:
+            if row.get(key) is not None:
+                row[key] = date.fromisoformat(row[key])
+        yield row
+
+
+def _read_csv(table: Table, lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    reader = csv.reader(lines)
+    header = next(reader, [])
+    unknown_columns = [key for key in header if key not in table.columns]
+    if unknown_columns:
+        raise ValueError(f"unknown columns {', '.join(unknown_columns)}")
+    columns = [table.columns[key] for key in header]
+    for values in reader:
+        if len(values) != len(columns):
+            raise ValueError(
+                f"row {reader.line_num} has {len(values)} values, expected {len(columns)}"
+            )
+        yield {
+            column.key: _decode_csv_value(column, value) for column, value in zip(columns, values)
+        }
+
+
+def _encode_date(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_csv_value(value: Any) -> Any:
+    if value is None:
+        return CSV_NULL
+    if isinstance(value, str) and value.startswith(CSV_ESCAPE):
+        return CSV_ESCAPE + value
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode_csv_value(column: Column, value: str) -> Any:
+    if value == CSV_NULL:
+        return None
+    if value.startswith(CSV_ESCAPE):
+        value = value[len(CSV_ESCAPE) :]
+    python_type = _python_type(column)
+    if python_type is bool:
+        return value == "1"
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def _python_type(column: Column) -> type:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return str
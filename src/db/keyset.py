@@ -0,0 +1,34 @@
+"""Helpers for reading whole tables in the order of their integer primary keys."""
+
+from typing import Any, Iterator
+
+from sqlalchemy import ColumnElement, Row, Select
+from sqlalchemy.orm import Session
+
+STREAM_BATCH_SIZE = 1000
+
+
+def select_after(query: Select, key: ColumnElement[int], after: int | None = None) -> Select:
+    """Order a query by the given key and skip the rows with keys up to `after`, inclusive."""
+    if after is not None:
+        query = query.where(key > after)
+    return query.order_by(key)
+
+
+def stream_scalars(db: Session, query: Select) -> Iterator[Any]:
+    """Iterate over the entities selected by the query using a server-side cursor.
+
+    Rows are fetched `STREAM_BATCH_SIZE` at a time and entities which are no longer
+    referenced are released, so memory usage does not grow with the size of the table.
+    Relationships read from the entities must be eagerly loaded by the query, as lazy
+    loads would run on the connection while the cursor is still open.
+    """
+    yield from db.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE, stream_results=True))
+
+
+def stream_rows(db: Session, query: Select) -> Iterator[Row]:
+    """Iterate over the rows selected by a column-only query using a server-side cursor.
+
+    Rows are fetched `STREAM_BATCH_SIZE` at a time, like in `stream_scalars`.
+    """
+    yield from db.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE, stream_results=True))
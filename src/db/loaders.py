@@ -0,0 +1,37 @@
+"""Loader options for fetching whole object graphs without N+1 queries."""
+
+from typing import Collection
+
+from sqlalchemy.orm import Load, joinedload, selectinload
+
+from .models import DB_Ingredient, DB_Recipe, DB_User
+
+# Loaders are keyed by the names of the relationships, which are also the names of the
+# fields they are serialized to, so only the requested ones can be loaded.
+# Each collection is fetched with a single SELECT ... WHERE ... IN query for all
+# the loaded recipes, while the many-to-one unit is joined to the ingredients.
+recipe_relationship_loaders = {
+    "ingredientes": selectinload(DB_Recipe.ingredientes).joinedload(DB_Ingredient.unit),
+    "instructions": selectinload(DB_Recipe.instructions),
+    "nutrition_info": selectinload(DB_Recipe.nutrition_info),
+    "tags": selectinload(DB_Recipe.tags),
+    "ratings": selectinload(DB_Recipe.ratings),
+}
+recipe_loader_options = tuple(recipe_relationship_loaders.values())
+
+user_relationship_loaders = {
+    "tags": selectinload(DB_User.tags),
+    "saved_recipes": selectinload(DB_User.saved_recipes).options(*recipe_loader_options),
+}
+user_loader_options = tuple(user_relationship_loaders.values())
+
+
+def select_loader_options(
+    relationship_loaders: dict[str, Load], relationships: Collection[str] | None = None
+) -> list[Load]:
+    """Get the loader options of the relationships with the given names, all by default."""
+    return [
+        loader
+        for name, loader in relationship_loaders.items()
+        if relationships is None or name in relationships
+    ]
@@ -2,7 +2,20 @@
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Integer, String, Table, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import declarative_base, relationship
 
 from src.roles import Roles
@@ -12,18 +25,20 @@ config = ConfigManager.get_config()
 
 Base = declarative_base()
 
+RATING_STARS = range(1, 6)
+
 recipe_tag_association_table = Table(
     "recipe_tag_association_table",
     Base.metadata,
     Column("recipe_id", ForeignKey("recipes.recipe_id")),
-    Column("tag_id", ForeignKey("tags.tag_id")),
+    Column("tag_id", ForeignKey("tags.tag_id"), index=True),
 )
 
 user_tag_association_table = Table(
     "user_tag_association_table",
     Base.metadata,
     Column("user_id", ForeignKey("users.user_id")),
-    Column("tag_id", ForeignKey("tags.tag_id")),
+    Column("tag_id", ForeignKey("tags.tag_id"), index=True),
 )
 
 user_recipe_association_table = Table(
@@ -33,11 +48,13 @@ user_recipe_association_table = Table(
     Column("recipe_id", ForeignKey("recipes.recipe_id")),
 )
 
+# edges of the follow graph, the primary key answers whether a user follows another one
+# and lists the followed users, the index lists the followers
 user_user_association_table = Table(
     "user_user_association_table",
     Base.metadata,
-    Column("follower_id", ForeignKey("users.user_id")),
-    Column("followed_user_id", ForeignKey("users.user_id")),
+    Column("follower_id", ForeignKey("users.user_id"), primary_key=True),
+    Column("followed_user_id", ForeignKey("users.user_id"), primary_key=True, index=True),
 )
 
 
@@ -55,6 +72,14 @@ class DB_User(Base):
     date_of_birth = Column(Date)
     role = Column(Integer, default=Roles.USER.value)
     profile_pic_path = Column(String(300), default=str(config.default_profile_pic_path))
+    # bumped whenever the data returned in the `UserInResponse` model changes
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # maintained along with the followers, decides how the user's recipes reach the feeds
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # maintained along with the followed users
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # bumped to revoke all the access tokens issued to the user
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     recipes = relationship("DB_Recipe", back_populates="author")
     tags = relationship("DB_Tag", secondary=user_tag_association_table, back_populates="users")
@@ -87,6 +112,25 @@ class DB_Recipe(Base):
     servings = Column(Integer, nullable=False)
     prep_time = Column(Integer, nullable=False)
     description = Column(Text, nullable=False)
+    # bumped whenever the data returned in the `Recipe` model changes
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # aggregates of the recipe's ratings, maintained along with the ratings table
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_1_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # support keyset pagination of the recipe listing, optionally filtered by author
+    __table_args__ = (
+        Index("ix_recipes_create_date_recipe_id", "create_date", "recipe_id"),
+        Index("ix_recipes_author_id_recipe_id", "author_id", "recipe_id"),
+        Index(
+            "ix_recipes_author_id_create_date_recipe_id", "author_id", "create_date", "recipe_id"
+        ),
+    )
 
     author = relationship("DB_User", back_populates="recipes")
     nutrition_info = relationship(
@@ -101,6 +145,15 @@ class DB_Recipe(Base):
     images = relationship("DB_RecipeImage", back_populates="recipe")
     ratings = relationship("DB_Rating", back_populates="recipe")
 
+    @property
+    def rating_summary(self) -> dict[str, int | float | list[int] | None]:
+        """Summary of the recipe's ratings built from the stored aggregates."""
+        return {
+            "count": self.rating_count,
+            "average": self.rating_sum / self.rating_count if self.rating_count else None,
+            "histogram": [getattr(self, f"rating_{stars}_count") for stars in RATING_STARS],
+        }
+
 
 class DB_NutritionInfo(Base):
     __tablename__ = "nutrition_infos"
@@ -113,6 +166,13 @@ class DB_NutritionInfo(Base):
     sugar = Column(Integer, nullable=False)
     fiber = Column(Integer, nullable=False)
     fat = Column(Integer, nullable=False)
+    # values divided by the servings of the recipe, indexed for filtering recipes by them
+    calories_per_serving = Column(Float, nullable=False, index=True)
+    protein_per_serving = Column(Float, nullable=False, index=True)
+    carbohydrates_per_serving = Column(Float, nullable=False, index=True)
+    sugar_per_serving = Column(Float, nullable=False, index=True)
+    fiber_per_serving = Column(Float, nullable=False, index=True)
+    fat_per_serving = Column(Float, nullable=False, index=True)
 
     recipe = relationship("DB_Recipe", back_populates="nutrition_info")
 
@@ -156,6 +216,10 @@ class DB_Tag(Base):
 
     tag_id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True)
+    # number of recipes with the tag, maintained along with the tag co-occurrences
+    recipe_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # maintained along with the subscriptions, decides how the tag's recipes reach the feeds
+    subscriber_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     recipes = relationship(
         "DB_Recipe", secondary=recipe_tag_association_table, back_populates="tags"
@@ -181,5 +245,93 @@ class DB_Rating(Base):
     recipe_id = Column(Integer, ForeignKey("recipes.recipe_id", ondelete="CASCADE"), nullable=False)
     rating = Column(Integer, nullable=False)
 
+    __table_args__ = (UniqueConstraint("author_id", "recipe_id"),)
+
     recipe = relationship("DB_Recipe", back_populates="ratings")
     author = relationship("DB_User", back_populates="ratings")
+
+
+class DB_RecipeSearchTerm(Base):
+    """Inverted index entry used for full-text recipe search.
+
+    Each row stores how strongly a given term is associated with a recipe,
+    based on where and how many times it appears in the recipe's texts.
+    """
+
+    __tablename__ = "recipe_search_terms"
+
+    # compared byte by byte, as the default collation of MySQL would consider
+    # some of the terms distinct in Python equal, e.g. "café" and "cafe"
+    term = Column(
+        String(100).with_variant(mysql.VARCHAR(100, collation="utf8mb4_bin"), "mysql"),
+        primary_key=True,
+    )
+    recipe_id = Column(
+        Integer, ForeignKey("recipes.recipe_id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    weight = Column(Integer, nullable=False)
+
+
+class DB_FeedEntry(Base):
+    """Entry of a user's precomputed home feed.
+
+    Each row makes a recipe appear in the feed of a user following its author
+    or subscribed to one of its tags.
+    """
+
+    __tablename__ = "feed_entries"
+
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    recipe_id = Column(
+        Integer, ForeignKey("recipes.recipe_id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+
+class DB_RecipeSimilarity(Base):
+    """Precomputed similarity of two recipes based on the ratings they received.
+
+    Only the most similar recipes of every recipe are stored.
+    """
+
+    __tablename__ = "recipe_similarities"
+
+    recipe_id = Column(
+        Integer, ForeignKey("recipes.recipe_id", ondelete="CASCADE"), primary_key=True
+    )
+    similar_recipe_id = Column(
+        Integer, ForeignKey("recipes.recipe_id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    score = Column(Float, nullable=False)
+
+
+class DB_FollowSuggestion(Base):
+    """Precomputed suggestion of a user to follow, found among the followed users' follows.
+
+    Only the best suggestions for every user are stored.
+    """
+
+    __tablename__ = "follow_suggestions"
+
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    suggested_user_id = Column(
+        Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    score = Column(Float, nullable=False)
+    mutual_follow_count = Column(Integer, nullable=False)
+    shared_tag_count = Column(Integer, nullable=False)
+
+
+class DB_TagCooccurrence(Base):
+    """Number of recipes having both of the given tags.
+
+    Every pair of tags is stored in both directions, so the tags co-occurring
+    with a given one can be read with a single index range scan.
+    """
+
+    __tablename__ = "tag_cooccurrences"
+
+    tag_id = Column(Integer, ForeignKey("tags.tag_id", ondelete="CASCADE"), primary_key=True)
+    other_tag_id = Column(
+        Integer, ForeignKey("tags.tag_id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    recipe_count = Column(Integer, nullable=False)
@@ -0,0 +1,163 @@
+"""Snapshots of the small reference tables, i.e. units and tags."""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import DB_Tag, DB_Unit
+
+# seconds during which IDs missing from the snapshot do not trigger another reload
+MISSED_ID_RETRY_INTERVAL = 5
+MAX_MISSED_IDS = 1024
+
+
+@dataclass(frozen=True)
+class UnitEntry:
+    """Read-only copy of a `DB_Unit` row."""
+
+    unit_id: int
+    unit: str
+    liquid: bool
+
+
+@dataclass(frozen=True)
+class TagEntry:
+    """Read-only copy of a `DB_Tag` row."""
+
+    tag_id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Snapshot of all the units and tags, keyed by their IDs and by their names.
+
+    When several units share a name, `units_by_name` points to the one with the lowest ID.
+    """
+
+    version: int
+    units_by_id: dict[int, UnitEntry]
+    units_by_name: dict[str, UnitEntry]
+    tags_by_id: dict[int, TagEntry]
+    tags_by_name: dict[str, TagEntry]
+
+
+class ReferenceDataCache:
+    """Thread-safe cache of a `ReferenceData` snapshot.
+
+    The snapshot is loaded with two queries on first use and kept until it is
+    invalidated, or until it gets older than `max_age` seconds, which bounds how
+    long changes made by other processes stay unnoticed. `version` is bumped
+    whenever the snapshot's data changes.
+
+    The queries run outside of the lock, so lookups are never blocked by a
+    reload. IDs which were missing from a freshly loaded snapshot are
+    remembered for `MISSED_ID_RETRY_INTERVAL` seconds and do not trigger
+    further reloads meanwhile.
+    """
+
+    def __init__(self, max_age: float) -> None:
+        self.max_age = max_age
+        self.version = 0
+        self._snapshot: ReferenceData | None = None
+        self._loaded_at = 0.0
+        self._loading = False
+        self._invalidations = 0
+        self._missed_ids: dict[tuple[str, int], float] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, db: Session, tag_ids: Iterable[int] = (), unit_ids: Iterable[int] = ()
+    ) -> ReferenceData:
+        """Get the current snapshot, loading it from the DB when needed.
+
+        Args:
+            tag_ids: IDs of tags about to be looked up, the snapshot is reloaded once
+                    if any of them is missing, as it might have been added by another process.
+            unit_ids: IDs of units about to be looked up, handled like `tag_ids`.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                now = time.monotonic()
+                missing_ids = {("tag", tag_id) for tag_id in tag_ids} - {
+                    ("tag", tag_id) for tag_id in snapshot.tags_by_id
+                }
+                missing_ids |= {("unit", unit_id) for unit_id in unit_ids} - {
+                    ("unit", unit_id) for unit_id in snapshot.units_by_id
+                }
+                recently_missed_ids = {
+                    missing_id
+                    for missing_id in missing_ids
+                    if now - self._missed_ids.get(missing_id, -math.inf) < MISSED_ID_RETRY_INTERVAL
+                }
+                if missing_ids <= recently_missed_ids and (
+                    now - self._loaded_at <= self.max_age or self._loading
+                ):
+                    return snapshot
+                for missing_id in missing_ids - recently_missed_ids:
+                    self._remember_missed_id(missing_id, now)
+            self._loading = True
+        try:
+            return self._load(db)
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def invalidate(self) -> None:
+        """Drop the snapshot after units or tags were changed."""
+        with self._lock:
+            self.version += 1
+            self._invalidations += 1
+            self._snapshot = None
+            self._missed_ids.clear()
+
+    def _load(self, db: Session) -> ReferenceData:
+        while True:
+            with self._lock:
+                invalidations = self._invalidations
+            units = [
+                UnitEntry(unit_id=unit_id, unit=unit, liquid=liquid)
+                for unit_id, unit, liquid in db.execute(
+                    select(DB_Unit.unit_id, DB_Unit.unit, DB_Unit.liquid).order_by(DB_Unit.unit_id)
+                )
+            ]
+            tags = [
+                TagEntry(tag_id=tag_id, name=name)
+                for tag_id, name in db.execute(
+                    select(DB_Tag.tag_id, DB_Tag.name).order_by(DB_Tag.tag_id)
+                )
+            ]
+            units_by_id = {unit.unit_id: unit for unit in units}
+            tags_by_id = {tag.tag_id: tag for tag in tags}
+            with self._lock:
+                # the data might have been read before the invalidating change was committed
+                if invalidations != self._invalidations:
+                    continue
+                snapshot = self._snapshot
+                if (
+                    snapshot is None
+                    or snapshot.units_by_id != units_by_id
+                    or snapshot.tags_by_id != tags_by_id
+                ):
+                    self.version += 1
+                    self._snapshot = ReferenceData(
+                        version=self.version,
+                        units_by_id=units_by_id,
+                        units_by_name={unit.unit: unit for unit in reversed(units)},
+                        tags_by_id=tags_by_id,
+                        tags_by_name={tag.name: tag for tag in tags},
+                    )
+                self._loaded_at = time.monotonic()
+                return self._snapshot
+
+    def _remember_missed_id(self, missed_id: tuple[str, int], missed_at: float) -> None:
+        self._missed_ids.pop(missed_id, None)
+        self._missed_ids[missed_id] = missed_at
+        if len(self._missed_ids) > MAX_MISSED_IDS:
+            del self._missed_ids[next(iter(self._missed_ids))]
@@ -0,0 +1,30 @@
+"""Helpers for maintaining row versions used to build ETags."""
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .models import DB_Recipe, DB_User
+
+
+def bump_recipe_versions(db: Session, *recipe_ids: int) -> None:
+    """Mark the representation of the given recipes as changed.
+
+    The transaction is left open for the caller to commit.
+    """
+    if recipe_ids:
+        db.execute(
+            update(DB_Recipe)
+            .where(DB_Recipe.recipe_id.in_(recipe_ids))
+            .values(version=DB_Recipe.version + 1)
+        )
+
+
+def bump_user_versions(db: Session, *user_ids: int) -> None:
+    """Mark the representation of the given users as changed.
+
+    The transaction is left open for the caller to commit.
+    """
+    if user_ids:
+        db.execute(
+            update(DB_User).where(DB_User.user_id.in_(user_ids)).values(version=DB_User.version + 1)
+        )
@@ -2,7 +2,7 @@
 
 from fastapi import FastAPI
 
-from src.routes import auth, ratings, recipes, tags
+from src.routes import auth, backup, feed, ratings, recipes, tags
 from src.utils import ConfigManager
 
 config = ConfigManager.get_config()
@@ -20,3 +20,5 @@ app.include_router(tags.router)
 app.include_router(tags.admin_router)
 app.include_router(ratings.router)
 app.include_router(ratings.admin_router)
+app.include_router(feed.router)
+app.include_router(backup.admin_router)
@@ -1,17 +1,21 @@
 """Endpoints for the auth package FOR ADMINS."""
 
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 
+from src.cache import principal_cache
 from src.db.models import DB_User
 from src.dependencies import get_db
 from src.roles import Roles
 from src.tags import Tags
+from src.utils import decode_after_cursor, split_page, stream_ndjson
 
-from .crud import delete_user_from_db, get_all_users_from_db, get_user_from_db
-from .models import UserInResponseAdmin
+from .crud import delete_user_from_db, get_all_users_from_db, get_user_from_db, stream_users_from_db
+from .models import PrincipalCacheStats, UserInResponseAdmin, UserPageAdmin, UserSummaryAdmin
 from .utils import RoleChecker
 
 admin_router = APIRouter(prefix="/auth", tags=[Tags.admin.value])
@@ -38,16 +42,50 @@ def get_user(
     db: Annotated[Session, Depends(get_db)],
 ) -> DB_User:
     """Get user with the given ID."""
-    return get_user_from_db(db=db, user_id=user_id)
+    return get_user_from_db(db=db, user_id=user_id, load_details=True)
 
 
 @admin_router.get(
     "/users",
-    response_model=list[UserInResponseAdmin],
+    response_model=UserPageAdmin,
     dependencies=[Depends(RoleChecker(allowed_roles=[Roles.ADMIN.value]))],
 )
 def get_users(
     db: Annotated[Session, Depends(get_db)],
-) -> list[DB_User]:
-    """Get a list of all users from the DB."""
-    return get_all_users_from_db(db=db)
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Annotated[str | None, Query()] = None,
+    stream: Annotated[bool, Query()] = False,
+) -> dict[Literal["users", "next_cursor"], list[Row] | str | None] | StreamingResponse:
+    """Get summaries of users from the DB page by page, ordered by their IDs.
+
+    All the details of a single user can be fetched from `/auth/users/{user_id}`.
+
+    The `next_cursor` from the response should be passed as `cursor` to get the next
+    page. With `stream` set, all the users after the `cursor` are instead streamed
+    as NDJSON, one user per line, and `limit` is ignored.
+
+    Raises:
+        HTTPException: Raised when the cursor is invalid.
+    """
+    after = decode_after_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(
+                stream_users_from_db(db=db, after=after), UserSummaryAdmin, close=db.close
+            ),
+            media_type="application/x-ndjson",
+        )
+    users, next_cursor = split_page(
+        get_all_users_from_db(db=db, limit=limit + 1, after=after), limit=limit, key="user_id"
+    )
+    return {"users": users, "next_cursor": next_cursor}
+
+
+@admin_router.get(
+    "/cache/stats",
+    response_model=PrincipalCacheStats,
+    dependencies=[Depends(RoleChecker(allowed_roles=[Roles.ADMIN.value]))],
+)
+def get_principal_cache_stats() -> dict[str, int | float]:
+    """Get size, counters and hit ratio of this worker's cache of authenticated access tokens."""
+    return principal_cache.stats()
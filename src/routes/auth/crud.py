@@ -1,18 +1,48 @@
 """CRUD operations for the auth package."""
 
 from pathlib import Path
-from typing import Optional
+from typing import Collection, Iterator, Optional
 
 from fastapi import HTTPException, status
+from sqlalchemy import Insert, Row, Select, delete, insert, or_, select, update
+from sqlalchemy.dialects import mysql
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from src.db.models import DB_User
+from src.cache import principal_cache
+from src.db import (
+    bump_user_versions,
+    select_loader_options,
+    user_loader_options,
+    user_relationship_loaders,
+)
+from src.db.dialects import dialect_insert
+from src.db.keyset import select_after, stream_rows
+from src.db.models import (
+    DB_FollowSuggestion,
+    DB_Recipe,
+    DB_Tag,
+    DB_User,
+    user_recipe_association_table,
+    user_tag_association_table,
+    user_user_association_table,
+)
 from src.roles import Roles
+from src.routes.feed.crud import add_author_to_feed, remove_author_from_feed
 
 from .models import UserAdd, UserUpdate
+from .suggestions import FollowGraph
 from .utils import get_password_hash
 
+# columns of the `UserSummary` and `UserSummaryAdmin` models
+USER_SUMMARY_COLUMNS = (DB_User.user_id, DB_User.username, DB_User.first_name, DB_User.last_name)
+USER_SUMMARY_ADMIN_COLUMNS = (
+    *USER_SUMMARY_COLUMNS,
+    DB_User.email,
+    DB_User.role,
+    DB_User.create_date,
+)
+
 
 def create_user(db: Session, user_data: UserAdd, role: int = Roles.USER.value) -> DB_User:
     """Save User and return it's DB representation.
@@ -46,13 +76,29 @@ def update_user_in_db(db: Session, user_id: int, user_data: UserUpdate) -> Optio
     db_user_query = db.query(DB_User).filter(DB_User.user_id == user_id)
     if db_user_query:
         user_dict = {k: v for k, v in user_data.model_dump().items() if not v is None}
+        user_dict["version"] = DB_User.version + 1
         db_user_query.update(user_dict, synchronize_session=False)
         db.commit()
-        db_user = db_user_query.first()
+        principal_cache.invalidate(user_id)
+        db_user = db_user_query.options(*user_loader_options).first()
         db.refresh(db_user)
         return db_user
 
 
+def revoke_user_tokens_in_db(db: Session, user_id: int) -> None:
+    """Bump the token version of the given User.
+
+    None of the access tokens issued to the User before is accepted afterwards.
+    """
+    db.execute(
+        update(DB_User)
+        .where(DB_User.user_id == user_id)
+        .values(token_version=DB_User.token_version + 1)
+    )
+    db.commit()
+    principal_cache.invalidate(user_id)
+
+
 def delete_user_from_db(db: Session, user_id: int) -> bool:
     """Delete user with the given ID from DB.
 
@@ -64,19 +110,100 @@ def delete_user_from_db(db: Session, user_id: int) -> bool:
     user = db.query(DB_User).filter(DB_User.user_id == user_id).first()
     if not user:
         return False
+    # remove the user's edges of the follow graph without loading them
+    db.execute(
+        update(DB_User)
+        .where(DB_User.user_id.in_(select_followed_user_ids(user_id)))
+        .values(follower_count=DB_User.follower_count - 1, version=DB_User.version + 1)
+    )
+    db.execute(
+        update(DB_User)
+        .where(DB_User.user_id.in_(select_follower_ids(user_id)))
+        .values(following_count=DB_User.following_count - 1, version=DB_User.version + 1)
+    )
+    db.execute(
+        delete(user_user_association_table).where(
+            or_(
+                user_user_association_table.c.follower_id == user_id,
+                user_user_association_table.c.followed_user_id == user_id,
+            )
+        )
+    )
+    db.execute(
+        update(DB_Tag)
+        .where(
+            DB_Tag.tag_id.in_(
+                select(user_tag_association_table.c.tag_id).where(
+                    user_tag_association_table.c.user_id == user_id
+                )
+            )
+        )
+        .values(subscriber_count=DB_Tag.subscriber_count - 1)
+    )
+    db.execute(
+        delete(DB_FollowSuggestion).where(
+            or_(
+                DB_FollowSuggestion.user_id == user_id,
+                DB_FollowSuggestion.suggested_user_id == user_id,
+            )
+        )
+    )
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user_id)
     return True
 
 
-def get_all_users_from_db(db: Session) -> list[DB_User]:
-    """List all users in the DB."""
-    return db.query(DB_User).all()
+def get_all_users_from_db(
+    db: Session, limit: int | None = None, after: int | None = None
+) -> list[Row]:
+    """List summaries of users in the DB, ordered by their IDs.
 
+    Only the columns of the `UserSummaryAdmin` model are selected.
 
-def get_user_from_db(db: Session, user_id: int) -> DB_User:
-    """Get a specific user from the DB."""
-    user = db.query(DB_User).filter(DB_User.user_id == user_id).first()
+    Args:
+        limit: Maximal number of returned users, all are returned when `None`.
+        after: Only users with higher IDs are returned, used to fetch the next page.
+    """
+    return db.execute(select_users(after=after).limit(limit)).all()
+
+
+def stream_users_from_db(db: Session, after: int | None = None) -> Iterator[Row]:
+    """Iterate over summaries of all the users with IDs higher than `after`.
+
+    The users are read in batches instead of being loaded at once.
+    """
+    return stream_rows(db=db, query=select_users(after=after))
+
+
+def select_users(after: int | None = None) -> Select:
+    """Build a query selecting summaries of users ordered by their IDs."""
+    return select_after(select(*USER_SUMMARY_ADMIN_COLUMNS), DB_User.user_id, after=after)
+
+
+def get_user_from_db(
+    db: Session,
+    user_id: int,
+    load_details: bool = False,
+    relationships: Collection[str] | None = None,
+) -> DB_User:
+    """Get a specific user from the DB.
+
+    Args:
+        load_details: Whether to eagerly load all the relationships serialized
+                    in the `UserInResponse` model, using a fixed number of queries.
+        relationships: Names of the relationships loaded when `load_details`
+                    is set, all of them by default.
+    """
+    # the session may hold a possibly outdated snapshot of the current user from the principal cache
+    query = (
+        db.query(DB_User)
+        .filter(DB_User.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    if load_details:
+        query = query.options(*select_loader_options(user_relationship_loaders, relationships))
+    user = query.first()
     if user is None:
         raise HTTPException(
             status_code=404, detail="User with the given ID does not exist in the DB."
@@ -87,6 +214,9 @@ def get_user_from_db(db: Session, user_id: int) -> DB_User:
 def follow_user_in_db(db: Session, follower_db_user: DB_User, followed_user_id: int) -> bool:
     """Follow user with the given ID.
 
+    Neither of the users' lists of followers is loaded, the edge is inserted with
+    a single statement which skips it when it already exists.
+
     Args:
         follower_db_user: An instance of the DB_User model representing
                         the User that aims to follow another User.
@@ -109,26 +239,25 @@ def follow_user_in_db(db: Session, follower_db_user: DB_User, followed_user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Users can't follow themselves."
         )
-    db_followed_user = db.query(DB_User).filter(DB_User.user_id == followed_user_id).first()
-    if db_followed_user is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User with the given ID was not found in the DB.",
-        )
-    if db_followed_user in follower_db_user.followed_users:
+    check_user_exists_in_db(db=db, user_id=followed_user_id)
+    if not add_follow_edge(
+        db=db, follower_id=follower_db_user.user_id, followed_user_id=followed_user_id
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The first user already follows the second one.",
         )
-    follower_db_user.followed_users.append(db_followed_user)
+    add_author_to_feed(db=db, user_id=follower_db_user.user_id, author_id=followed_user_id)
     db.commit()
-    db.refresh(follower_db_user)
     return True
 
 
 def unfollow_user_in_db(db: Session, follower_db_user: DB_User, followed_user_id: int):
     """Unfollow a user with the given ID.
 
+    Neither of the users' lists of followers is loaded, the edge is deleted with
+    a single statement.
+
     Args:
         follower_db_user: An instance of the DB_User model representing
                         the User that aims to unfollow another User.
@@ -150,52 +279,210 @@ def unfollow_user_in_db(db: Session, follower_db_user: DB_User, followed_user_id
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Users can't follow themselves."
         )
-    db_followed_user = db.query(DB_User).filter(DB_User.user_id == followed_user_id).first()
-    if db_followed_user is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User with the given ID was not found in the DB.",
-        )
-    try:
-        follower_db_user.followed_users.remove(db_followed_user)
-    except ValueError:
+    check_user_exists_in_db(db=db, user_id=followed_user_id)
+    if not remove_follow_edge(
+        db=db, follower_id=follower_db_user.user_id, followed_user_id=followed_user_id
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="The user was not followed."
         )
+    remove_author_from_feed(db=db, user_id=follower_db_user.user_id, author_id=followed_user_id)
     db.commit()
     return True
 
 
-def get_followers_from_db(db: Session, user_id: int) -> list[DB_User]:
-    """Get all users following the user with the given ID.
+def add_follow_edge(db: Session, follower_id: int, followed_user_id: int) -> bool:
+    """Insert an edge of the follow graph unless it already exists.
+
+    The counters of both users are updated only when the edge is inserted, so
+    concurrent follows are counted once. The transaction is left open for the
+    caller to commit.
+
+    Returns:
+        Whether the edge was inserted.
+    """
+    inserted = db.execute(
+        _insert_follow_edge(db=db, follower_id=follower_id, followed_user_id=followed_user_id)
+    ).rowcount
+    if inserted:
+        update_follow_counts(
+            db=db, follower_id=follower_id, followed_user_id=followed_user_id, change=1
+        )
+    return bool(inserted)
+
+
+def _insert_follow_edge(db: Session, follower_id: int, followed_user_id: int) -> Insert:
+    """Build an INSERT of the follow edge which does nothing when the edge exists.
+
+    Raises:
+        UnsupportedDialectError: Raised when the DB's dialect has no supported upsert.
+    """
+    statement = dialect_insert(db, user_user_association_table).values(
+        follower_id=follower_id, followed_user_id=followed_user_id
+    )
+    if isinstance(statement, mysql.Insert):
+        # an ON DUPLICATE KEY UPDATE no-op would still count the existing row as affected
+        return statement.prefix_with("IGNORE")
+    return statement.on_conflict_do_nothing()
+
+
+def remove_follow_edge(db: Session, follower_id: int, followed_user_id: int) -> bool:
+    """Delete an edge of the follow graph if it exists.
+
+    The counters of both users are updated only when the edge is deleted. The
+    transaction is left open for the caller to commit.
+
+    Returns:
+        Whether the edge was deleted.
+    """
+    deleted = db.execute(
+        delete(user_user_association_table).where(
+            user_user_association_table.c.follower_id == follower_id,
+            user_user_association_table.c.followed_user_id == followed_user_id,
+        )
+    ).rowcount
+    if deleted:
+        update_follow_counts(
+            db=db, follower_id=follower_id, followed_user_id=followed_user_id, change=-1
+        )
+    return bool(deleted)
+
+
+def check_follows_in_db(db: Session, follower_id: int, followed_user_id: int) -> bool:
+    """Check if a user follows another one with a primary key lookup."""
+    return (
+        db.scalar(
+            select(user_user_association_table.c.follower_id).where(
+                user_user_association_table.c.follower_id == follower_id,
+                user_user_association_table.c.followed_user_id == followed_user_id,
+            )
+        )
+        is not None
+    )
+
+
+def update_follow_counts(db: Session, follower_id: int, followed_user_id: int, change: int) -> None:
+    """Add (`change=1`) or remove (`change=-1`) a follow to the counters of both users.
+
+    The versions of both users are bumped, as the counters are part of their
+    representation. The transaction is left open for the caller to commit.
+    """
+    db.execute(
+        update(DB_User)
+        .where(DB_User.user_id == followed_user_id)
+        .values(follower_count=DB_User.follower_count + change)
+    )
+    db.execute(
+        update(DB_User)
+        .where(DB_User.user_id == follower_id)
+        .values(following_count=DB_User.following_count + change)
+    )
+    bump_user_versions(db, follower_id, followed_user_id)
+
+
+def check_user_exists_in_db(db: Session, user_id: int) -> None:
+    """Check if a user with the given ID exists without loading it.
 
     Raises:
         HTTPException: Raised when the user with the given ID
                         is not found in the DB.
     """
-    db_user = db.query(DB_User).filter(DB_User.user_id == user_id).first()
-    if db_user is None:
+    if db.scalar(select(DB_User.user_id).where(DB_User.user_id == user_id)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User with the given ID was not found in the DB.",
         )
-    return [user for user in db_user.followers]
 
 
-def get_followed_users_from_db(db: Session, user_id: int) -> list[DB_User]:
-    """Get all users that the user with the given ID follows.
+def get_followers_from_db(db: Session, user_id: int) -> list[Row]:
+    """Get summaries of all users following the user with the given ID.
+
+    Only the columns of the `UserSummary` model are selected.
+
+    Raises:
+        HTTPException: Raised when the user with the given ID
+                        is not found in the DB.
+    """
+    check_user_exists_in_db(db=db, user_id=user_id)
+    return db.execute(
+        select(*USER_SUMMARY_COLUMNS)
+        .join(
+            user_user_association_table,
+            user_user_association_table.c.follower_id == DB_User.user_id,
+        )
+        .where(user_user_association_table.c.followed_user_id == user_id)
+        .order_by(DB_User.user_id)
+    ).all()
+
+
+def get_followed_users_from_db(db: Session, user_id: int) -> list[Row]:
+    """Get summaries of all users that the user with the given ID follows.
+
+    Only the columns of the `UserSummary` model are selected.
 
     Raises:
         HTTPException: Raised when the user with the given ID
                         is not found in the DB.
     """
-    db_user = db.query(DB_User).filter(DB_User.user_id == user_id).first()
-    if db_user is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User with the given ID was not found in the DB.",
+    check_user_exists_in_db(db=db, user_id=user_id)
+    return db.execute(
+        select(*USER_SUMMARY_COLUMNS)
+        .join(
+            user_user_association_table,
+            user_user_association_table.c.followed_user_id == DB_User.user_id,
+        )
+        .where(user_user_association_table.c.follower_id == user_id)
+        .order_by(DB_User.user_id)
+    ).all()
+
+
+def select_follower_ids(user_id: int) -> Select:
+    """Build a query selecting IDs of the users following the user with the given ID."""
+    return select(user_user_association_table.c.follower_id).where(
+        user_user_association_table.c.followed_user_id == user_id
+    )
+
+
+def select_followed_user_ids(user_id: int) -> Select:
+    """Build a query selecting IDs of the users followed by the user with the given ID."""
+    return select(user_user_association_table.c.followed_user_id).where(
+        user_user_association_table.c.follower_id == user_id
+    )
+
+
+def get_user_summaries_versions_from_db(
+    db: Session, user_ids: Select | list[int]
+) -> list[tuple[int, ...]]:
+    """Get versions of the given users, without the recipes they saved.
+
+    The versions change whenever the `UserSummary` representation of any of
+    the users changes, so they can be used to build ETags of user listings.
+    """
+    return [
+        tuple(row)
+        for row in db.execute(
+            select(DB_User.user_id, DB_User.version)
+            .where(DB_User.user_id.in_(user_ids))
+            .order_by(DB_User.user_id)
         )
-    return [user for user in db_user.followed_users]
+    ]
+
+
+def get_users_versions_from_db(db: Session, user_ids: Select | list[int]) -> list[tuple[int, ...]]:
+    """Get versions of the given users and of the recipes they saved.
+
+    Together the versions change whenever the `UserInResponse` representation
+    of any of the users changes, so they can be used to build ETags without
+    loading the users with all of their relationships.
+    """
+    users_versions = get_user_summaries_versions_from_db(db=db, user_ids=user_ids)
+    saved_recipes_versions = db.execute(
+        select(user_recipe_association_table.c.user_id, DB_Recipe.recipe_id, DB_Recipe.version)
+        .join(DB_Recipe, DB_Recipe.recipe_id == user_recipe_association_table.c.recipe_id)
+        .where(user_recipe_association_table.c.user_id.in_(user_ids))
+        .order_by(user_recipe_association_table.c.user_id, DB_Recipe.recipe_id)
+    ).all()
+    return users_versions + [tuple(row) for row in saved_recipes_versions]
 
 
 def update_users_profile_pic_path(db: Session, user_id: int, profile_pic_path: Path) -> DB_User:
@@ -213,5 +500,62 @@ def update_users_profile_pic_path(db: Session, user_id: int, profile_pic_path: P
         )
     db_user.profile_pic_path = str(profile_pic_path)
     db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(db_user)
     return db_user
+
+
+def compute_follow_suggestions(db: Session, top_k: int = 20, batch_size: int = 1000) -> int:
+    """Compute the best users to follow for every user and store them in the DB.
+
+    The whole follow graph is loaded into a `FollowGraph` once and the suggestions
+    are then computed from memory, without querying the DB for every user. Users are
+    processed in batches of `batch_size` consecutive IDs, each committed separately.
+
+    Returns:
+        Number of users with at least one suggestion.
+    """
+    follow_graph = FollowGraph.load(db=db)
+    users_with_suggestions_count = 0
+    for batch_start in range(0, follow_graph.max_user_id + 1, batch_size):
+        batch_end = batch_start + batch_size
+        rows = [
+            {"user_id": user_id, **suggestion._asdict()}
+            for user_id in range(batch_start, min(batch_end, follow_graph.max_user_id + 1))
+            for suggestion in follow_graph.suggest(user_id=user_id, limit=top_k)
+        ]
+        users_with_suggestions_count += len({row["user_id"] for row in rows})
+        db.execute(
+            delete(DB_FollowSuggestion).where(
+                DB_FollowSuggestion.user_id >= batch_start, DB_FollowSuggestion.user_id < batch_end
+            )
+        )
+        if rows:
+            db.execute(insert(DB_FollowSuggestion), rows)
+        db.commit()
+    return users_with_suggestions_count
+
+
+def get_follow_suggestions_from_db(db: Session, user_id: int, limit: int) -> list[Row]:
+    """Get the precomputed suggestions of users to follow for the given user.
+
+    Users followed since the suggestions were computed are skipped.
+
+    Returns:
+        Rows with the columns of the `UserSuggestion` model, the best suggestion first.
+    """
+    return db.execute(
+        select(
+            *USER_SUMMARY_COLUMNS,
+            DB_FollowSuggestion.score,
+            DB_FollowSuggestion.mutual_follow_count,
+            DB_FollowSuggestion.shared_tag_count,
+        )
+        .join(DB_User, DB_User.user_id == DB_FollowSuggestion.suggested_user_id)
+        .where(
+            DB_FollowSuggestion.user_id == user_id,
+            DB_FollowSuggestion.suggested_user_id.not_in(select_followed_user_ids(user_id)),
+        )
+        .order_by(DB_FollowSuggestion.score.desc(), DB_FollowSuggestion.suggested_user_id)
+        .limit(limit)
+    ).all()
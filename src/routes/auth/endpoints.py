@@ -2,31 +2,60 @@
 
 from typing import Annotated, Literal
 
-from fastapi import APIRouter, Body, Depends, File, HTTPException, Path, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
 from fastapi.responses import FileResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import FilePath
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 
+from src.db import user_relationship_loaders
 from src.db.models import DB_User
 from src.dependencies import get_db
 from src.roles import Roles
 from src.tags import Tags
-from src.utils import FileStorageManager
+from src.utils import FileStorageManager, etag_matches, make_etag, prune_model, select_fields
 
 from .crud import (
+    check_follows_in_db,
+    check_user_exists_in_db,
     create_user,
     delete_user_from_db,
     follow_user_in_db,
+    get_follow_suggestions_from_db,
     get_followed_users_from_db,
     get_followers_from_db,
     get_user_from_db,
+    get_user_summaries_versions_from_db,
+    get_users_versions_from_db,
+    revoke_user_tokens_in_db,
+    select_followed_user_ids,
+    select_follower_ids,
     unfollow_user_in_db,
     update_user_in_db,
     update_users_profile_pic_path,
 )
-from .models import Token, UserAdd, UserInResponse, UserUpdate
-from .utils import RoleChecker, authenticate_user, create_access_token, get_current_user
+from .models import Token, UserAdd, UserInResponse, UserSuggestion, UserSummary, UserUpdate
+from .utils import (
+    RoleChecker,
+    TokenClaims,
+    authenticate_user,
+    create_access_token,
+    get_current_user,
+    get_token_claims,
+)
 
 router = APIRouter(
     prefix="/auth",
@@ -40,28 +69,65 @@ async def login(
     db: Annotated[Session, Depends(get_db)],
 ) -> dict[str, str]:
     """Return access token if the user is authenticated."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(user=user)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post(
+    "/token/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def revoke_tokens(
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[DB_User, Depends(get_current_user)],
+) -> None:
+    """Revoke all the access tokens of the currently logged in user, including the current one.
+
+    The tokens are rejected by this worker right away, but the other workers keep
+    accepting them from their caches for up to `principal_cache_max_age` seconds.
+    """
+    revoke_user_tokens_in_db(db=db, user_id=current_user.user_id)
+
+
 @router.get(
     "/me",
     response_model=UserInResponse,
     dependencies=[Depends(RoleChecker(allowed_roles=[Roles.USER.value, Roles.ADMIN.value]))],
 )
-async def read_users_me(
+def read_users_me(
+    response: Response,
     current_user: Annotated[DB_User, Depends(get_current_user)],
-) -> DB_User:
-    """Return an object representing the currently logged in User."""
-    return current_user
+    db: Annotated[Session, Depends(get_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
+    fields: Annotated[str | None, Query()] = None,
+    expand: Annotated[str | None, Query()] = None,
+) -> DB_User | Response:
+    """Return an object representing the currently logged in User.
+
+    Responds with 304 when the representation matches the `If-None-Match` header.
+    The user can be limited to the comma-separated `fields` and relationships
+    to `expand`, only the serialized relationships are loaded.
+
+    Raises:
+        HTTPException: Raised when an unknown field is requested.
+    """
+    return get_user_response(
+        user_id=current_user.user_id,
+        response=response,
+        db=db,
+        if_none_match=if_none_match,
+        fields=fields,
+        expand=expand,
+    )
 
 
 @router.get("/me/profile_picture", response_class=FileResponse)
@@ -146,28 +212,156 @@ def unfollow_user(
     }
 
 
+@router.get(
+    "/follows/{followed_user_id}",
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def check_follows(
+    followed_user_id: Annotated[int, Path()],
+    db: Annotated[Session, Depends(get_db)],
+    claims: Annotated[TokenClaims, Depends(get_token_claims)],
+) -> dict[Literal["follows"], bool]:
+    """Check if the currently logged in user follows the user with the given ID."""
+    return {
+        "follows": check_follows_in_db(
+            db=db, follower_id=claims.user_id, followed_user_id=followed_user_id
+        )
+    }
+
+
+@router.get(
+    "/suggestions",
+    response_model=list[UserSuggestion],
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def get_follow_suggestions(
+    db: Annotated[Session, Depends(get_db)],
+    claims: Annotated[TokenClaims, Depends(get_token_claims)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> list[Row]:
+    """Get users the currently logged in user may know, based on whom their followed users follow.
+
+    Suggestions are computed periodically with the `compute-follow-suggestions` CLI command.
+    """
+    return get_follow_suggestions_from_db(db=db, user_id=claims.user_id, limit=limit)
+
+
 @router.get(
     "/followers/{user_id}",
-    response_model=list[UserInResponse],
+    response_model=list[UserSummary],
 )
 def get_followers(
-    user_id: Annotated[int, Path()], db: Annotated[Session, Depends(get_db)]
-) -> list[DB_User]:
-    """Get all users following the user with the given ID."""
+    user_id: Annotated[int, Path()],
+    response: Response,
+    db: Annotated[Session, Depends(get_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> list[Row] | Response:
+    """Get summaries of all users following the user with the given ID.
+
+    Tags and saved recipes of a single user can be fetched from `/auth/user/{user_id}`.
+    Responds with 304 when the representation matches the `If-None-Match` header.
+    """
+    check_user_exists_in_db(db=db, user_id=user_id)
+    etag = make_etag(
+        "followers",
+        user_id,
+        get_user_summaries_versions_from_db(db=db, user_ids=select_follower_ids(user_id)),
+    )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return get_followers_from_db(db=db, user_id=user_id)
 
 
 @router.get(
     "/followed/{user_id}",
-    response_model=list[UserInResponse],
+    response_model=list[UserSummary],
 )
 def get_followed_users(
-    user_id: Annotated[int, Path()], db: Annotated[Session, Depends(get_db)]
-) -> list[DB_User]:
-    """Get all users that the user with the given ID follows."""
+    user_id: Annotated[int, Path()],
+    response: Response,
+    db: Annotated[Session, Depends(get_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> list[Row] | Response:
+    """Get summaries of all users that the user with the given ID follows.
+
+    Tags and saved recipes of a single user can be fetched from `/auth/user/{user_id}`.
+    Responds with 304 when the representation matches the `If-None-Match` header.
+    """
+    check_user_exists_in_db(db=db, user_id=user_id)
+    etag = make_etag(
+        "followed",
+        user_id,
+        get_user_summaries_versions_from_db(db=db, user_ids=select_followed_user_ids(user_id)),
+    )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return get_followed_users_from_db(db=db, user_id=user_id)
 
 
+@router.get("/user/{user_id}", response_model=UserInResponse)
+def get_user(
+    user_id: Annotated[int, Path()],
+    response: Response,
+    db: Annotated[Session, Depends(get_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
+    fields: Annotated[str | None, Query()] = None,
+    expand: Annotated[str | None, Query()] = None,
+) -> DB_User | Response:
+    """Get the user with the given ID together with their tags and saved recipes.
+
+    Responds with 304 when the representation matches the `If-None-Match` header.
+    The user can be limited to the comma-separated `fields` and relationships
+    to `expand`, only the serialized relationships are loaded.
+
+    Raises:
+        HTTPException: Raised when the user does not exist or an unknown field is requested.
+    """
+    check_user_exists_in_db(db=db, user_id=user_id)
+    return get_user_response(
+        user_id=user_id,
+        response=response,
+        db=db,
+        if_none_match=if_none_match,
+        fields=fields,
+        expand=expand,
+    )
+
+
+def get_user_response(
+    user_id: int,
+    response: Response,
+    db: Session,
+    if_none_match: str | None,
+    fields: str | None,
+    expand: str | None,
+) -> DB_User | Response:
+    """Build the `UserInResponse` representation of an existing user, possibly pruned."""
+    selected_fields = select_fields(
+        UserInResponse, user_relationship_loaders.keys(), fields=fields, expand=expand
+    )
+    etag_parts = ["user", get_users_versions_from_db(db=db, user_ids=[user_id])]
+    if selected_fields is not None:
+        etag_parts.append(sorted(selected_fields))
+    etag = make_etag(*etag_parts)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    user = get_user_from_db(
+        db=db, user_id=user_id, load_details=True, relationships=selected_fields
+    )
+    if selected_fields is None:
+        response.headers["ETag"] = etag
+        return user
+    return Response(
+        content=prune_model(UserInResponse, selected_fields)
+        .model_validate(user, from_attributes=True)
+        .model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
+
+
 @router.get("/profile_picture/{user_id}", response_class=FileResponse)
 def get_given_users_profile_pic(
     user_id: Annotated[int, Path()], db: Annotated[Session, Depends(get_db)]
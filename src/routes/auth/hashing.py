@@ -0,0 +1,76 @@
+"""Hashing and verification of passwords on a bounded pool of threads."""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from src.utils import ConfigManager
+
+config = ConfigManager.get_config()
+
+T = TypeVar("T")
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.password_hash_rounds
+)
+
+
+class PasswordHasher:
+    """Process-wide pool of threads hashing and verifying passwords.
+
+    bcrypt releases the GIL, so hashing on `password_hash_workers` threads keeps
+    the CPU-bound work off the event loop while limiting how many cores it takes.
+    At most `password_hash_max_pending` operations may be running or waiting for
+    a thread, further ones are rejected straight away instead of queueing up.
+    """
+
+    _executor: ThreadPoolExecutor | None = None
+    _pending: threading.BoundedSemaphore | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def hash(cls, password: str) -> str:
+        """Hash the password, blocking the calling thread until it is hashed."""
+        return cls._submit(pwd_context.hash, password).result()
+
+    @classmethod
+    def verify(cls, password: str, hashed_password: str) -> bool:
+        """Verify the password, blocking the calling thread until it is verified."""
+        return cls._submit(pwd_context.verify, password, hashed_password).result()
+
+    @classmethod
+    async def verify_async(cls, password: str, hashed_password: str) -> bool:
+        """Verify the password without blocking the event loop."""
+        return await asyncio.wrap_future(cls._submit(pwd_context.verify, password, hashed_password))
+
+    @classmethod
+    def _submit(cls, fn: Callable[..., T], *args) -> Future[T]:
+        """Run the function on the pool.
+
+        Raises:
+            HTTPException: Raised when the maximum number of pending
+                            operations is reached.
+        """
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=config.password_hash_workers, thread_name_prefix="password-hash"
+                )
+                cls._pending = threading.BoundedSemaphore(config.password_hash_max_pending)
+        if not cls._pending.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again later.",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            future = cls._executor.submit(fn, *args)
+        except BaseException:
+            cls._pending.release()
+            raise
+        future.add_done_callback(lambda _: cls._pending.release())
+        return future
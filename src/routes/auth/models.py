@@ -34,6 +34,8 @@ class UserInResponse(UserBase):
 
     user_id: int
     role: Roles
+    follower_count: int
+    following_count: int
     tags: list[Tag]
     saved_recipes: list[Recipe]
 
@@ -46,6 +48,48 @@ class UserInResponseAdmin(UserInResponse):
     profile_pic_path: str
 
 
+class UserSummary(BaseModel):
+    """Model with the basic User information returned in user listings.
+
+    Tags and saved recipes are only returned for a single user, with `UserInResponse`.
+    """
+
+    user_id: int
+    username: str
+    first_name: str
+    last_name: str
+
+    class Config:
+        from_attributes = True
+
+
+class UserSuggestion(UserSummary):
+    """Model for returning a suggested user to follow.
+
+    `mutual_follow_count` is the number of the followed users who follow the
+    suggested user and `shared_tag_count` the number of tags both users subscribed to.
+    """
+
+    score: float
+    mutual_follow_count: int
+    shared_tag_count: int
+
+
+class UserSummaryAdmin(UserSummary):
+    """Model with the basic User information returned in user listings for an admin."""
+
+    email: str
+    role: Roles
+    create_date: date
+
+
+class UserPageAdmin(BaseModel):
+    """Model with a single page of the user listing for an admin."""
+
+    users: list[UserSummaryAdmin]
+    next_cursor: str | None
+
+
 class UserUpdate(UserBase):
     """Model for updating the User info."""
 
@@ -57,6 +101,19 @@ class UserUpdate(UserBase):
     description: str | None = None
 
 
+class PrincipalCacheStats(BaseModel):
+    """Model with the size and usage statistics of the cache of authenticated access tokens."""
+
+    entries: int
+    max_entries: int
+    max_age: float
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    hit_ratio: float
+
+
 class Token(BaseModel):
     """Model with token information."""
 
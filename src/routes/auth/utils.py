@@ -1,33 +1,59 @@
 """Utils for the auth package."""
 
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Optional, Union
+from typing import Annotated, NamedTuple, Optional, Union
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from src.cache import principal_cache
 from src.db.models import DB_User
 from src.dependencies import get_db
+from src.roles import Roles
 from src.utils import ConfigManager
 
-config = ConfigManager.get_config()
+from .hashing import PasswordHasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+config = ConfigManager.get_config()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+# HTTP methods of the endpoints which only read data
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class TokenClaims(BaseModel):
+    """Model for the verified claims of an access token."""
+
+    user_id: int
+    role: int
+    token_version: int
+
+
+class Principal(NamedTuple):
+    """Verified access token and, once loaded, a detached snapshot of its user."""
+
+    claims: TokenClaims
+    # expiry of the token as a UNIX timestamp
+    expires_at: float
+    user: DB_User | None = None
+
 
 def verify_password(plain_password, hashed_password) -> bool:
     """Verify if the provided password matches the hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return PasswordHasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password) -> str:
     """Generate a hash for the given password."""
-    return pwd_context.hash(password)
+    return PasswordHasher.hash(password)
 
 
 def get_user(db: Session, username: str) -> Optional[DB_User]:
@@ -35,58 +61,159 @@ def get_user(db: Session, username: str) -> Optional[DB_User]:
     return db.query(DB_User).filter(DB_User.username == username).first()
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Union[bool, DB_User]:
-    """Authenticate the user based on the given username and password."""
-    user = get_user(db, username)
+async def authenticate_user(db: Session, username: str, password: str) -> Union[bool, DB_User]:
+    """Authenticate the user based on the given username and password.
+
+    Neither the query nor the password verification run on the event loop.
+    """
+    user = await run_in_threadpool(get_user, db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await PasswordHasher.verify_async(password, user.hashed_password):
         return False
     return user
 
 
-def create_access_token(data: dict) -> str:
-    """Create JWT based on the provided JSON"""
-    to_encode = data.copy()
+def create_access_token(user: DB_User) -> str:
+    """Create a JWT carrying the claims needed to authorize the given user.
+
+    Besides the user's ID in `sub` the token carries their role and token version,
+    so that permissions can be checked without querying the DB, and expires after
+    the configured number of minutes.
+    """
+    to_encode = {
+        "sub": str(user.user_id),
+        "role": user.role,
+        "ver": user.token_version,
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=config.access_token_expire_minutes),
+    }
     encoded_jwt = jwt.encode(
         to_encode, config.token_signing_key, algorithm=config.token_signing_algorithm
     )
     return encoded_jwt
 
 
-def get_current_user(
-    db: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(oauth2_scheme)]
-) -> DB_User:
-    """Authenticate the user and return the object representing them based on the token provided in the header."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def get_principal(token: Annotated[str, Depends(oauth2_scheme)]) -> Principal:
+    """Verify the token provided in the header, unless it was verified recently.
+
+    Verified tokens are cached by their digest until they expire, for at most
+    `principal_cache_max_age` seconds.
+    """
+    digest = _token_digest(token)
+    principal = principal_cache.get(digest)
+    if principal is not None:
+        return principal
     try:
         payload = jwt.decode(
-            token, config.token_signing_key, algorithms=[config.token_signing_algorithm]
+            token,
+            config.token_signing_key,
+            algorithms=[config.token_signing_algorithm],
+            options={"require": ["sub", "role", "ver", "exp"]},
+        )
+        principal = Principal(
+            claims=TokenClaims(
+                user_id=int(payload["sub"]), role=payload["role"], token_version=payload["ver"]
+            ),
+            expires_at=payload["exp"],
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except jwt.InvalidTokenError:
-        raise credentials_exception
-    user = get_user(db, username)
-    if user is None:
-        raise credentials_exception
+    except (jwt.InvalidTokenError, ValueError):
+        raise _credentials_exception()
+    principal_cache.set(
+        digest,
+        principal,
+        group=principal.claims.user_id,
+        max_age=principal.expires_at - time.time(),
+    )
+    return principal
+
+
+def get_token_claims(principal: Annotated[Principal, Depends(get_principal)]) -> TokenClaims:
+    """Return the verified claims of the token provided in the header, without querying the DB."""
+    return principal.claims
+
+
+def get_current_user(
+    db: Annotated[Session, Depends(get_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+    principal: Annotated[Principal, Depends(get_principal)],
+) -> DB_User:
+    """Authenticate the user and return the object representing them.
+
+    The user is the one the token provided in the header was issued to. Tokens
+    issued before the user's token version was bumped or their role was changed
+    are rejected. The user is loaded once per cached token and later merged into
+    the session from the cached snapshot, without a query. The snapshot is
+    invalidated when the user's details change, but not when their counters do,
+    so queries reading the whole row should refresh it with `populate_existing`.
+    """
+    if principal.user is not None:
+        return db.merge(principal.user, load=False)
+    cache_version = principal_cache.version
+    user = db.get(DB_User, principal.claims.user_id)
+    if (
+        user is None
+        or user.token_version != principal.claims.token_version
+        or user.role != principal.claims.role
+    ):
+        raise _credentials_exception()
+    principal_cache.set(
+        _token_digest(token),
+        principal._replace(user=_detached_copy(user)),
+        group=user.user_id,
+        max_age=principal.expires_at - time.time(),
+        version=cache_version,
+    )
     return user
 
 
 class RoleChecker:
-    """DEpendency for checking the permissions of the currently logged in user."""
+    """DEpendency for checking the permissions of the currently logged in user.
+
+    The permissions are checked against the role in the token's claims, so
+    reading endpoints of regular users make no query. Admin tokens and tokens
+    used to write are also checked against the user's row with `get_current_user`,
+    so that they stop being accepted as soon as they are revoked, the user is
+    demoted or deleted.
+    """
 
     def __init__(self, allowed_roles):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, user: Annotated[DB_User, Depends(get_current_user)]):
-        if user.role in self.allowed_roles:
-            return True
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="You don't have enough permissions"
-        )
+    def __call__(
+        self,
+        request: Request,
+        db: Annotated[Session, Depends(get_db)],
+        token: Annotated[str, Depends(oauth2_scheme)],
+        principal: Annotated[Principal, Depends(get_principal)],
+    ):
+        if principal.claims.role not in self.allowed_roles:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="You don't have enough permissions",
+            )
+        if principal.claims.role == Roles.ADMIN.value or request.method not in SAFE_METHODS:
+            get_current_user(db=db, token=token, principal=principal)
+        return True
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _detached_copy(user: DB_User) -> DB_User:
+    snapshot = DB_User(
+        **{
+            attribute.key: getattr(user, attribute.key)
+            for attribute in inspect(DB_User).column_attrs
+        }
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
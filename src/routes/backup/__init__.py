@@ -0,0 +1,5 @@
+"""Package with the DB backup endpoints."""
+
+from .admin import admin_router
+
+__all__ = ["admin_router"]
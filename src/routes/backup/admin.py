@@ -0,0 +1,38 @@
+"""Endpoints for the backup package FOR ADMINS."""
+
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from src.db.dump import DumpFormat, iter_db_dump
+from src.dependencies import get_db
+from src.roles import Roles
+from src.routes.auth.utils import RoleChecker
+from src.tags import Tags
+
+admin_router = APIRouter(
+    prefix="/backup",
+    tags=[Tags.admin.value],
+    dependencies=[Depends(RoleChecker(allowed_roles=[Roles.ADMIN.value]))],
+)
+
+
+@admin_router.get("/export", response_class=StreamingResponse)
+def export_db(
+    db: Annotated[Session, Depends(get_db)],
+    dump_format: Annotated[DumpFormat, Query(alias="format")] = DumpFormat.NDJSON,
+) -> StreamingResponse:
+    """Download a consistent snapshot of the whole DB as a ZIP archive.
+
+    The archive has one compressed NDJSON or CSV part per table and is built while
+    it is being sent. It can be restored with the `restore-db` CLI command.
+    """
+    file_name = f"recipes_{datetime.now():%Y%m%d_%H%M%S}.zip"
+    return StreamingResponse(
+        iter_db_dump(engine=db.get_bind(), dump_format=dump_format),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+    )
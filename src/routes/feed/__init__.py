@@ -0,0 +1,5 @@
+"""Package with the personalized feed endpoints."""
+
+from .endpoints import router
+
+__all__ = ["router"]
@@ -0,0 +1,278 @@
+"""CRUD operations for the feed package.
+
+Feeds are precomputed: when a recipe is created, it is written to the feeds of
+the users following its author and subscribed to its tags (fan-out on write).
+Recipes of authors with more than `feed_fanout_max_followers` followers, and
+recipes reaching the subscribers of tags with more than
+`feed_fanout_max_subscribers` subscribers, are not written anywhere for them and
+are instead merged into the feeds when they are read (fan-out on read), so a
+single recipe never has to be written to a huge number of feeds.
+"""
+
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    and_,
+    delete,
+    exists,
+    insert,
+    literal,
+    or_,
+    select,
+    union,
+)
+from sqlalchemy.orm import Session
+
+from src.db.models import (
+    DB_FeedEntry,
+    DB_Recipe,
+    DB_Tag,
+    DB_User,
+    recipe_tag_association_table,
+    user_tag_association_table,
+    user_user_association_table,
+)
+from src.utils import ConfigManager
+
+# maximum number of recipes written to a feed after a follow or a tag subscription
+FEED_BACKFILL_SIZE = 1000
+
+
+def fan_out_recipes(db: Session, recipe_ids: list[int]) -> None:
+    """Write newly created recipes to the feeds of the interested users.
+
+    Should be called once the recipes' tags are saved. The transaction is left
+    open for the caller to commit.
+    """
+    config = ConfigManager.get_config()
+    followers = (
+        select(user_user_association_table.c.follower_id, DB_Recipe.recipe_id)
+        .join(DB_Recipe, DB_Recipe.author_id == user_user_association_table.c.followed_user_id)
+        .join(DB_User, DB_User.user_id == DB_Recipe.author_id)
+        .where(
+            DB_Recipe.recipe_id.in_(recipe_ids),
+            DB_User.follower_count <= config.feed_fanout_max_followers,
+        )
+    )
+    subscribers = (
+        select(user_tag_association_table.c.user_id, DB_Recipe.recipe_id)
+        .join(
+            recipe_tag_association_table,
+            recipe_tag_association_table.c.tag_id == user_tag_association_table.c.tag_id,
+        )
+        .join(DB_Recipe, DB_Recipe.recipe_id == recipe_tag_association_table.c.recipe_id)
+        .join(DB_Tag, DB_Tag.tag_id == recipe_tag_association_table.c.tag_id)
+        .where(
+            DB_Recipe.recipe_id.in_(recipe_ids),
+            user_tag_association_table.c.user_id != DB_Recipe.author_id,
+            DB_Tag.subscriber_count <= config.feed_fanout_max_subscribers,
+        )
+    )
+    db.execute(
+        insert(DB_FeedEntry).from_select(
+            [DB_FeedEntry.user_id, DB_FeedEntry.recipe_id], union(followers, subscribers)
+        )
+    )
+
+
+def add_author_to_feed(db: Session, user_id: int, author_id: int) -> None:
+    """Write recent recipes of a newly followed author to the user's feed.
+
+    Up to `FEED_BACKFILL_SIZE` most recent recipes of the author are written,
+    skipping the ones already in the feed, so the cost does not depend on how
+    many other users the user follows. Nothing is written for authors whose
+    recipes are merged into the feeds when they are read. The transaction is
+    left open for the caller to commit.
+    """
+    max_followers = ConfigManager.get_config().feed_fanout_max_followers
+    recipe_ids = (
+        select(DB_Recipe.recipe_id)
+        .join(DB_User, DB_User.user_id == DB_Recipe.author_id)
+        .where(DB_Recipe.author_id == author_id, DB_User.follower_count <= max_followers)
+    )
+    _add_recipes_to_feed(db=db, user_id=user_id, recipe_ids=recipe_ids)
+
+
+def remove_author_from_feed(db: Session, user_id: int, author_id: int) -> None:
+    """Remove recipes of an unfollowed author from the user's feed.
+
+    Recipes with tags the user is still subscribed to are kept. Should be
+    called once the follow is removed, the transaction is left open for the
+    caller to commit.
+    """
+    _remove_recipes_from_feeds(
+        db=db,
+        user_ids=[user_id],
+        recipe_ids=select(DB_Recipe.recipe_id).where(DB_Recipe.author_id == author_id),
+    )
+
+
+def add_tag_to_feed(db: Session, user_id: int, tag_id: int) -> None:
+    """Write recent recipes with a newly subscribed tag to the user's feed.
+
+    Works like `add_author_to_feed`, the user's own recipes are skipped.
+    """
+    max_subscribers = ConfigManager.get_config().feed_fanout_max_subscribers
+    recipe_ids = (
+        select(DB_Recipe.recipe_id)
+        .join(
+            recipe_tag_association_table,
+            recipe_tag_association_table.c.recipe_id == DB_Recipe.recipe_id,
+        )
+        .join(DB_Tag, DB_Tag.tag_id == recipe_tag_association_table.c.tag_id)
+        .where(
+            recipe_tag_association_table.c.tag_id == tag_id,
+            DB_Recipe.author_id != user_id,
+            DB_Tag.subscriber_count <= max_subscribers,
+        )
+    )
+    _add_recipes_to_feed(db=db, user_id=user_id, recipe_ids=recipe_ids)
+
+
+def remove_tag_from_feed(db: Session, user_id: int, tag_id: int) -> None:
+    """Remove recipes with an unsubscribed tag from the user's feed.
+
+    Recipes of followed authors and with other tags the user is still subscribed
+    to are kept. Should be called once the subscription is removed, the
+    transaction is left open for the caller to commit.
+    """
+    _remove_recipes_from_feeds(
+        db=db,
+        user_ids=[user_id],
+        recipe_ids=select(recipe_tag_association_table.c.recipe_id).where(
+            recipe_tag_association_table.c.tag_id == tag_id
+        ),
+    )
+
+
+def _add_recipes_to_feed(db: Session, user_id: int, recipe_ids: Select) -> None:
+    """Write the most recent of the selected recipes to the feed, unless they are in it already."""
+    db.flush()
+    recipe_ids = (
+        recipe_ids.where(
+            ~exists().where(
+                DB_FeedEntry.user_id == user_id, DB_FeedEntry.recipe_id == DB_Recipe.recipe_id
+            )
+        )
+        .order_by(DB_Recipe.recipe_id.desc())
+        .limit(FEED_BACKFILL_SIZE)
+        .subquery()
+    )
+    db.execute(
+        insert(DB_FeedEntry).from_select(
+            [DB_FeedEntry.user_id, DB_FeedEntry.recipe_id],
+            select(literal(user_id), recipe_ids.c.recipe_id),
+        )
+    )
+
+
+def remove_deleted_tag_from_feeds(db: Session, user_ids: list[int], recipe_ids: list[int]) -> None:
+    """Remove recipes with a deleted tag from the feeds of the tag's former subscribers.
+
+    Works like `remove_tag_from_feed` for all the users at once. Should be called
+    once the tag is removed from the recipes and the users, the transaction is
+    left open for the caller to commit.
+    """
+    if user_ids and recipe_ids:
+        _remove_recipes_from_feeds(db=db, user_ids=user_ids, recipe_ids=recipe_ids)
+
+
+def _remove_recipes_from_feeds(
+    db: Session, user_ids: list[int], recipe_ids: Select | list[int]
+) -> None:
+    """Remove the selected recipes from the feeds, unless they still reach them another way."""
+    db.flush()
+    config = ConfigManager.get_config()
+    still_followed = select(DB_Recipe.recipe_id).where(
+        DB_Recipe.recipe_id == DB_FeedEntry.recipe_id,
+        DB_Recipe.author_id.in_(
+            select_followed_author_ids(DB_FeedEntry.user_id).where(
+                DB_User.follower_count <= config.feed_fanout_max_followers
+            )
+        ),
+    )
+    still_subscribed = select(recipe_tag_association_table.c.recipe_id).where(
+        recipe_tag_association_table.c.recipe_id == DB_FeedEntry.recipe_id,
+        recipe_tag_association_table.c.tag_id.in_(
+            select_subscribed_tag_ids(DB_FeedEntry.user_id).where(
+                DB_Tag.subscriber_count <= config.feed_fanout_max_subscribers
+            )
+        ),
+    )
+    db.execute(
+        delete(DB_FeedEntry).where(
+            DB_FeedEntry.user_id.in_(user_ids),
+            DB_FeedEntry.recipe_id.in_(recipe_ids),
+            ~still_followed.exists(),
+            ~still_subscribed.exists(),
+        )
+    )
+
+
+def get_feed_recipe_ids_from_db(
+    db: Session, user_id: int, limit: int, before: int | None = None
+) -> list[int]:
+    """Get IDs of the most recent recipes in the user's feed.
+
+    Args:
+        before: Only recipes with lower IDs are returned, used to fetch the next page.
+
+    Returns:
+        Up to `limit` recipe IDs, the most recent recipe first.
+    """
+    config = ConfigManager.get_config()
+    written = select(DB_FeedEntry.recipe_id).where(DB_FeedEntry.user_id == user_id)
+    merged = select(DB_Recipe.recipe_id).where(
+        or_(
+            DB_Recipe.author_id.in_(
+                select_followed_author_ids(user_id).where(
+                    DB_User.follower_count > config.feed_fanout_max_followers
+                )
+            ),
+            and_(
+                DB_Recipe.author_id != user_id,
+                exists().where(
+                    recipe_tag_association_table.c.recipe_id == DB_Recipe.recipe_id,
+                    recipe_tag_association_table.c.tag_id.in_(
+                        select_subscribed_tag_ids(user_id).where(
+                            DB_Tag.subscriber_count > config.feed_fanout_max_subscribers
+                        )
+                    ),
+                ),
+            ),
+        )
+    )
+    if before is not None:
+        written = written.where(DB_FeedEntry.recipe_id < before)
+        merged = merged.where(DB_Recipe.recipe_id < before)
+    written = written.order_by(DB_FeedEntry.recipe_id.desc()).limit(limit).subquery()
+    merged = merged.order_by(DB_Recipe.recipe_id.desc()).limit(limit).subquery()
+    feed = union(select(written.c.recipe_id), select(merged.c.recipe_id)).subquery()
+    return db.scalars(select(feed.c.recipe_id).order_by(feed.c.recipe_id.desc()).limit(limit)).all()
+
+
+def select_followed_author_ids(user_id: int | ColumnElement[int]) -> Select:
+    """Build a query selecting IDs of the users followed by the user with the given ID.
+
+    The followed users are joined, so the query can be filtered by their columns.
+    """
+    return (
+        select(DB_User.user_id)
+        .join(
+            user_user_association_table,
+            user_user_association_table.c.followed_user_id == DB_User.user_id,
+        )
+        .where(user_user_association_table.c.follower_id == user_id)
+    )
+
+
+def select_subscribed_tag_ids(user_id: int | ColumnElement[int]) -> Select:
+    """Build a query selecting IDs of the tags the user with the given ID is subscribed to.
+
+    The tags are joined, so the query can be filtered by their columns.
+    """
+    return (
+        select(DB_Tag.tag_id)
+        .join(user_tag_association_table, user_tag_association_table.c.tag_id == DB_Tag.tag_id)
+        .where(user_tag_association_table.c.user_id == user_id)
+    )
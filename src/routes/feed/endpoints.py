@@ -0,0 +1,59 @@
+"""Endpoints for the feed package."""
+
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from src.db.models import DB_Recipe
+from src.dependencies import get_db
+from src.roles import Roles
+from src.routes.auth.utils import RoleChecker, TokenClaims, get_token_claims
+from src.routes.recipes.crud import get_recipes_from_db
+from src.routes.recipes.models import RecipePage
+from src.tags import Tags
+from src.utils import decode_cursor, encode_cursor
+
+from .crud import get_feed_recipe_ids_from_db
+
+router = APIRouter(prefix="/feed", tags=[Tags.feed])
+
+
+@router.get(
+    "",
+    response_model=RecipePage,
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def get_feed(
+    db: Annotated[Session, Depends(get_db)],
+    claims: Annotated[TokenClaims, Depends(get_token_claims)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Annotated[str | None, Query()] = None,
+) -> dict[Literal["recipes", "next_cursor"], list[DB_Recipe] | str | None]:
+    """List the most recent recipes by the followed users and with the subscribed tags.
+
+    The `next_cursor` from the response should be passed as `cursor` to get the next page.
+
+    Raises:
+        HTTPException: Raised when the cursor is malformed.
+    """
+    before = None
+    if cursor is not None:
+        try:
+            before = int(decode_cursor(cursor)["before"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor."
+            )
+
+    recipe_ids = get_feed_recipe_ids_from_db(
+        db=db, user_id=claims.user_id, limit=limit + 1, before=before
+    )
+    next_cursor = None
+    if len(recipe_ids) > limit:
+        recipe_ids = recipe_ids[:limit]
+        next_cursor = encode_cursor({"before": recipe_ids[-1]})
+    return {
+        "recipes": get_recipes_from_db(db=db, recipe_ids=recipe_ids),
+        "next_cursor": next_cursor,
+    }
@@ -1,8 +1,9 @@
 """Endpoints for the auth package FOR ADMINS."""
 
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from src.db.models import DB_Rating
@@ -10,9 +11,15 @@ from src.dependencies import get_db
 from src.roles import Roles
 from src.routes.auth.utils import RoleChecker
 from src.tags import Tags
+from src.utils import decode_after_cursor, split_page, stream_ndjson
 
-from .crud import delete_rating_from_db, get_rating_from_db, list_ratings_from_db
-from .models import Rating
+from .crud import (
+    delete_rating_from_db,
+    get_rating_from_db,
+    list_ratings_from_db,
+    stream_ratings_from_db,
+)
+from .models import Rating, RatingPage
 
 admin_router = APIRouter(
     prefix="/ratings",
@@ -21,10 +28,32 @@ admin_router = APIRouter(
 )
 
 
-@admin_router.get("/list", response_model=list[Rating])
-def list_ratings(db: Annotated[Session, Depends(get_db)]) -> list[DB_Rating]:
-    """List all available ratings."""
-    return list_ratings_from_db(db=db)
+@admin_router.get("/list", response_model=RatingPage)
+def list_ratings(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Annotated[str | None, Query()] = None,
+    stream: Annotated[bool, Query()] = False,
+) -> dict[Literal["ratings", "next_cursor"], list[DB_Rating] | str | None] | StreamingResponse:
+    """List available ratings page by page, ordered by their IDs.
+
+    The `next_cursor` from the response should be passed as `cursor` to get the next
+    page. With `stream` set, all the ratings after the `cursor` are instead streamed
+    as NDJSON, one rating per line, and `limit` is ignored.
+
+    Raises:
+        HTTPException: Raised when the cursor is invalid.
+    """
+    after = decode_after_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(stream_ratings_from_db(db=db, after=after), Rating, close=db.close),
+            media_type="application/x-ndjson",
+        )
+    ratings, next_cursor = split_page(
+        list_ratings_from_db(db=db, limit=limit + 1, after=after), limit=limit, key="rating_id"
+    )
+    return {"ratings": ratings, "next_cursor": next_cursor}
 
 
 @admin_router.delete("/delete_admin/{rating_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,14 +1,30 @@
 """CRUD operations for the ratingd package."""
 
-from typing import Annotated
+import heapq
+import math
+from typing import Annotated, Iterator
 
 from fastapi import Depends, HTTPException, Path, status
+from sqlalchemy import (
+    ColumnElement,
+    ScalarSelect,
+    Select,
+    and_,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
-from src.db.models import DB_Rating
+from src.cache import recipe_cache
+from src.db.keyset import select_after, stream_scalars
+from src.db.models import RATING_STARS, DB_Rating, DB_Recipe, DB_RecipeSimilarity
 from src.dependencies import get_db
 
+from .leaderboard import RecipeLeaderboard
 from .models import RatingAdd
 
 
@@ -17,13 +33,21 @@ def create_rating_in_db(db: Session, rating_data: RatingAdd, author_id: int) ->
     db_rating = DB_Rating(**rating_data.model_dump(), author_id=author_id)
     db.add(db_rating)
     try:
-        db.commit()
+        # flushed first, so that a duplicate is detected before the aggregates are updated
+        db.flush()
     except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Rating for the given recipe by the given user already exists.",
         )
+    update_recipe_rating_aggregates(
+        db=db, recipe_id=db_rating.recipe_id, rating=db_rating.rating, change=1
+    )
+    db.commit()
     db.refresh(db_rating)
+    recipe_cache.invalidate(db_rating.recipe_id)
+    RecipeLeaderboard.update_recipe(db=db, recipe_id=db_rating.recipe_id)
     return db_rating
 
 
@@ -48,10 +72,189 @@ def get_rating_from_db(
 
 def delete_rating_from_db(db: Session, rating: DB_Rating) -> None:
     """Delete given rating from DB."""
+    recipe_id, stars = rating.recipe_id, rating.rating
     db.delete(rating)
+    update_recipe_rating_aggregates(db=db, recipe_id=recipe_id, rating=stars, change=-1)
     db.commit()
+    recipe_cache.invalidate(recipe_id)
+    RecipeLeaderboard.update_recipe(db=db, recipe_id=recipe_id)
+
+
+def list_ratings_from_db(
+    db: Session, limit: int | None = None, after: int | None = None
+) -> list[DB_Rating]:
+    """List avilable ratings from DB, ordered by their IDs.
+
+    Args:
+        limit: Maximal number of returned ratings, all are returned when `None`.
+        after: Only ratings with higher IDs are returned, used to fetch the next page.
+    """
+    return db.scalars(select_ratings(after=after).limit(limit)).all()
+
+
+def stream_ratings_from_db(db: Session, after: int | None = None) -> Iterator[DB_Rating]:
+    """Iterate over all the ratings with IDs higher than `after` without loading them at once."""
+    return stream_scalars(db=db, query=select_ratings(after=after))
+
 
+def select_ratings(after: int | None = None) -> Select:
+    """Build a query selecting ratings ordered by their IDs."""
+    return select_after(select(DB_Rating), DB_Rating.rating_id, after=after)
 
-def list_ratings_from_db(db: Session) -> list[DB_Rating]:
-    """List all avilable ratings from DB."""
-    return db.query(DB_Rating).all()
+
+def update_recipe_rating_aggregates(db: Session, recipe_id: int, rating: int, change: int) -> None:
+    """Add (`change=1`) or remove (`change=-1`) a rating to the aggregates of a recipe.
+
+    The aggregates are updated with a single atomic UPDATE relative to their current
+    values, which also bumps the version of the recipe. The transaction is left open
+    for the caller to commit.
+    """
+    rating_star_count = getattr(DB_Recipe, f"rating_{rating}_count")
+    db.execute(
+        update(DB_Recipe)
+        .where(DB_Recipe.recipe_id == recipe_id)
+        .values(
+            {
+                DB_Recipe.rating_count: DB_Recipe.rating_count + change,
+                DB_Recipe.rating_sum: DB_Recipe.rating_sum + change * rating,
+                rating_star_count: rating_star_count + change,
+                DB_Recipe.version: DB_Recipe.version + 1,
+            }
+        )
+    )
+
+
+def recompute_rating_aggregates(db: Session, batch_size: int = 1000) -> int:
+    """Recompute rating aggregates of all recipes from the ratings table.
+
+    Recipes are processed in batches of `batch_size`, each committed separately.
+
+    Returns:
+        Number of recipes with recomputed aggregates.
+    """
+
+    def count_ratings(*conditions: ColumnElement[bool]) -> ScalarSelect[int]:
+        return (
+            select(func.count())
+            .where(DB_Rating.recipe_id == DB_Recipe.recipe_id, *conditions)
+            .scalar_subquery()
+        )
+
+    recomputed_recipes_count = 0
+    last_recipe_id = 0
+    while True:
+        recipe_ids = db.scalars(
+            select(DB_Recipe.recipe_id)
+            .where(DB_Recipe.recipe_id > last_recipe_id)
+            .order_by(DB_Recipe.recipe_id)
+            .limit(batch_size)
+        ).all()
+        if not recipe_ids:
+            break
+        db.execute(
+            update(DB_Recipe)
+            .where(DB_Recipe.recipe_id.in_(recipe_ids))
+            .values(
+                {
+                    DB_Recipe.rating_count: count_ratings(),
+                    DB_Recipe.rating_sum: select(func.coalesce(func.sum(DB_Rating.rating), 0))
+                    .where(DB_Rating.recipe_id == DB_Recipe.recipe_id)
+                    .scalar_subquery(),
+                    **{
+                        getattr(DB_Recipe, f"rating_{stars}_count"): count_ratings(
+                            DB_Rating.rating == stars
+                        )
+                        for stars in RATING_STARS
+                    },
+                    DB_Recipe.version: DB_Recipe.version + 1,
+                }
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        recomputed_recipes_count += len(recipe_ids)
+        last_recipe_id = recipe_ids[-1]
+    recipe_cache.clear()
+    RecipeLeaderboard.load(db)
+    return recomputed_recipes_count
+
+
+def compute_recipe_similarities(
+    db: Session, top_k: int = 20, batch_size: int = 500, shrinkage: int = 10
+) -> int:
+    """Compute the most similar recipes of every rated recipe and store them in the DB.
+
+    Two recipes are similar when the same users rated them, and rated them alike.
+    The similarity is the cosine of the recipes' rating vectors, shrunk by
+    `n / (n + shrinkage)` where `n` is the number of users who rated both of them,
+    so that similarities backed by only a few users are trusted less.
+
+    The rated recipes are processed in batches of `batch_size`, each committed
+    separately. Dot products of the rating vectors are summed up by the DB and
+    streamed back, so apart from the rating vector norms of all the recipes only
+    the `top_k` best matches of a single batch are kept in memory.
+
+    Returns:
+        Number of recipes with computed similarities.
+    """
+    norms = {
+        recipe_id: math.sqrt(squares_sum)
+        for recipe_id, squares_sum in db.execute(
+            select(DB_Rating.recipe_id, func.sum(DB_Rating.rating * DB_Rating.rating))
+            .group_by(DB_Rating.recipe_id)
+            .execution_options(yield_per=10000)
+        )
+    }
+    recipe_ids = sorted(norms)
+    rating, other_rating = aliased(DB_Rating), aliased(DB_Rating)
+    for batch_start in range(0, len(recipe_ids), batch_size):
+        batch = recipe_ids[batch_start : batch_start + batch_size]
+        best_matches: dict[int, list[tuple[float, int]]] = {recipe_id: [] for recipe_id in batch}
+        for recipe_id, other_recipe_id, dot_product, common_ratings_count in db.execute(
+            select(
+                rating.recipe_id,
+                other_rating.recipe_id,
+                func.sum(rating.rating * other_rating.rating),
+                func.count(),
+            )
+            .join(
+                other_rating,
+                and_(
+                    other_rating.author_id == rating.author_id,
+                    other_rating.recipe_id != rating.recipe_id,
+                ),
+            )
+            .where(rating.recipe_id.in_(batch))
+            .group_by(rating.recipe_id, other_rating.recipe_id)
+            .execution_options(yield_per=10000)
+        ):
+            score = (
+                dot_product
+                / (norms[recipe_id] * norms[other_recipe_id])
+                * common_ratings_count
+                / (common_ratings_count + shrinkage)
+            )
+            matches = best_matches[recipe_id]
+            if len(matches) < top_k:
+                heapq.heappush(matches, (score, other_recipe_id))
+            elif score > matches[0][0]:
+                heapq.heapreplace(matches, (score, other_recipe_id))
+
+        db.execute(delete(DB_RecipeSimilarity).where(DB_RecipeSimilarity.recipe_id.in_(batch)))
+        rows = [
+            {"recipe_id": recipe_id, "similar_recipe_id": other_recipe_id, "score": score}
+            for recipe_id, matches in best_matches.items()
+            for score, other_recipe_id in matches
+        ]
+        if rows:
+            db.execute(insert(DB_RecipeSimilarity), rows)
+        db.commit()
+
+    # recipes which lost all of their ratings since the last run
+    db.execute(
+        delete(DB_RecipeSimilarity).where(
+            DB_RecipeSimilarity.recipe_id.not_in(select(DB_Rating.recipe_id))
+        )
+    )
+    db.commit()
+    return len(recipe_ids)
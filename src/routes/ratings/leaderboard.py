@@ -0,0 +1,172 @@
+"""In-memory leaderboard of the top-rated recipes, overall and per tag."""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.db.models import DB_Recipe, recipe_tag_association_table
+
+
+class RecipeLeaderboard:
+    """Process-wide ranking of rated recipes by their Bayesian average rating.
+
+    A recipe's score is `(C * m + rating_sum) / (C + rating_count)`, where `m` is
+    the mean rating of all the recipes and `C` the mean number of ratings of a rated
+    recipe, so recipes with only a few ratings are pulled towards the overall mean.
+    Both priors are fixed when the leaderboard is built, which lets `update_recipe`
+    move a single recipe without rescoring the others; the leaderboard is rebuilt
+    from the DB once it gets older than `REBUILD_INTERVAL` seconds.
+
+    Rankings are kept as lists of `(-score, recipe_id)` sorted in ascending order,
+    one for all the recipes (under the `None` key) and one per tag, so reading the
+    top N recipes is a slice of a list.
+    """
+
+    REBUILD_INTERVAL = 60 * 60
+
+    _rankings: dict[int | None, list[tuple[float, int]]] = {}
+    _aggregates: dict[int, tuple[int, int]] = {}
+    _tags: dict[int, tuple[int, ...]] = {}
+    _prior_mean: float = 0.0
+    _prior_weight: float = 1.0
+    _built_at: float | None = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def load(cls, db: Session) -> None:
+        """(Re)build the leaderboard from the rating aggregates stored in the DB."""
+        with cls._lock:
+            rated_recipes_count, rating_count, rating_sum = db.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(DB_Recipe.rating_count), 0),
+                    func.coalesce(func.sum(DB_Recipe.rating_sum), 0),
+                ).where(DB_Recipe.rating_count > 0)
+            ).one()
+            cls._prior_mean = rating_sum / rating_count if rating_count else 0.0
+            cls._prior_weight = (
+                max(rating_count / rated_recipes_count, 1.0) if rating_count else 1.0
+            )
+
+            aggregates = {}
+            for recipe_id, recipe_rating_count, recipe_rating_sum in db.execute(
+                select(DB_Recipe.recipe_id, DB_Recipe.rating_count, DB_Recipe.rating_sum)
+                .where(DB_Recipe.rating_count > 0)
+                .execution_options(yield_per=10000)
+            ):
+                aggregates[recipe_id] = (recipe_rating_count, recipe_rating_sum)
+            tags = defaultdict(list)
+            for recipe_id, tag_id in db.execute(
+                select(
+                    recipe_tag_association_table.c.recipe_id, recipe_tag_association_table.c.tag_id
+                )
+                .join(DB_Recipe, DB_Recipe.recipe_id == recipe_tag_association_table.c.recipe_id)
+                .where(DB_Recipe.rating_count > 0)
+                .execution_options(yield_per=10000)
+            ):
+                tags[recipe_id].append(tag_id)
+
+            rankings = defaultdict(list)
+            for recipe_id, (recipe_rating_count, recipe_rating_sum) in aggregates.items():
+                entry = (-cls._score(recipe_rating_count, recipe_rating_sum), recipe_id)
+                for key in (None, *tags[recipe_id]):
+                    rankings[key].append(entry)
+            for ranking in rankings.values():
+                ranking.sort()
+
+            cls._aggregates = aggregates
+            cls._tags = {recipe_id: tuple(tag_ids) for recipe_id, tag_ids in tags.items()}
+            cls._rankings = dict(rankings)
+            cls._built_at = time.monotonic()
+
+    @classmethod
+    def ensure_loaded(cls, db: Session) -> None:
+        """Build the leaderboard unless it was built less than `REBUILD_INTERVAL` ago."""
+        with cls._lock:
+            if cls._built_at is None or time.monotonic() - cls._built_at > cls.REBUILD_INTERVAL:
+                cls.load(db)
+
+    @classmethod
+    def update_recipe(cls, db: Session, recipe_id: int) -> None:
+        """Move a recipe after a rating of it was added or removed.
+
+        Should be called after the change is committed. The recipe's rating
+        aggregates and tags are read from the DB instead of applying the change
+        to the cached ones, so a change already seen by a concurrent `load` is
+        not counted twice.
+        """
+        with cls._lock:
+            if cls._built_at is None:
+                return
+            aggregates = db.execute(
+                select(DB_Recipe.rating_count, DB_Recipe.rating_sum).where(
+                    DB_Recipe.recipe_id == recipe_id
+                )
+            ).one_or_none()
+            if recipe_id in cls._aggregates:
+                cls._remove(recipe_id)
+            cls._tags.pop(recipe_id, None)
+            if aggregates is None or aggregates.rating_count <= 0:
+                return
+            cls._aggregates[recipe_id] = tuple(aggregates)
+            cls._tags[recipe_id] = tuple(
+                db.scalars(
+                    select(recipe_tag_association_table.c.tag_id).where(
+                        recipe_tag_association_table.c.recipe_id == recipe_id
+                    )
+                ).all()
+            )
+            entry = (-cls._score(*aggregates), recipe_id)
+            for key in (None, *cls._tags[recipe_id]):
+                bisect.insort(cls._rankings.setdefault(key, []), entry)
+
+    @classmethod
+    def remove_tag(cls, tag_id: int) -> None:
+        """Remove a deleted tag from the leaderboard."""
+        with cls._lock:
+            cls._rankings.pop(tag_id, None)
+            for recipe_id, tag_ids in cls._tags.items():
+                if tag_id in tag_ids:
+                    cls._tags[recipe_id] = tuple(
+                        other_tag_id for other_tag_id in tag_ids if other_tag_id != tag_id
+                    )
+
+    @classmethod
+    def remove_recipe(cls, recipe_id: int) -> None:
+        """Remove a deleted recipe from the leaderboard."""
+        with cls._lock:
+            if recipe_id in cls._aggregates:
+                cls._remove(recipe_id)
+            cls._tags.pop(recipe_id, None)
+
+    @classmethod
+    def top(cls, limit: int, tag_id: int | None = None) -> list[tuple[int, float]]:
+        """Get up to `limit` best recipes, optionally only those with the given tag.
+
+        Returns:
+            Tuples with the recipe ID and its score, the best recipe first.
+        """
+        with cls._lock:
+            return [
+                (recipe_id, -negative_score)
+                for negative_score, recipe_id in cls._rankings.get(tag_id, [])[:limit]
+            ]
+
+    @classmethod
+    def _score(cls, rating_count: int, rating_sum: int) -> float:
+        return (cls._prior_weight * cls._prior_mean + rating_sum) / (
+            cls._prior_weight + rating_count
+        )
+
+    @classmethod
+    def _remove(cls, recipe_id: int) -> None:
+        entry = (-cls._score(*cls._aggregates.pop(recipe_id)), recipe_id)
+        for key in (None, *cls._tags.get(recipe_id, ())):
+            ranking = cls._rankings[key]
+            del ranking[bisect.bisect_left(ranking, entry)]
+            if not ranking:
+                del cls._rankings[key]
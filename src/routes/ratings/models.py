@@ -1,6 +1,8 @@
 """Pydantic models for the ratings package."""
 
-from pydantic import BaseModel
+from typing import Annotated
+
+from pydantic import BaseModel, Field
 
 
 class RatingBase(BaseModel):
@@ -13,9 +15,29 @@ class RatingBase(BaseModel):
 class RatingAdd(RatingBase):
     """Model for adding a new rating."""
 
+    rating: Annotated[int, Field(ge=1, le=5)]
+
 
 class Rating(RatingBase):
     """Model with all the rating information."""
 
     rating_id: int
     author_id: int
+
+
+class RatingPage(BaseModel):
+    """Model with a single page of the rating listing."""
+
+    ratings: list[Rating]
+    next_cursor: str | None
+
+
+class RatingSummary(BaseModel):
+    """Model with aggregated information about the ratings of a recipe.
+
+    `histogram` contains the number of ratings with one to five stars.
+    """
+
+    count: int
+    average: float | None
+    histogram: list[int]
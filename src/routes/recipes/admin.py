@@ -1,15 +1,18 @@
 """Endpoints for the recipes package FOR ADMINS."""
 
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Body, Depends, Path
+from fastapi import APIRouter, Body, Depends, Path, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from src.cache import recipe_cache
 from src.db.models import DB_Ingredient, DB_Instruction, DB_NutritionInfo, DB_Unit
 from src.dependencies import get_db
 from src.roles import Roles
 from src.routes.auth.utils import RoleChecker
 from src.tags import Tags
+from src.utils import decode_after_cursor, split_page, stream_ndjson
 
 from .crud import (
     add_measurment_unit,
@@ -19,8 +22,21 @@ from .crud import (
     list_ingredients_from_db,
     list_instructions_from_db,
     list_nutrition_infos_from_db,
+    stream_ingredients_from_db,
+    stream_instructions_from_db,
+    stream_nutrition_infos_from_db,
+)
+from .models import (
+    CacheStats,
+    Ingredient,
+    IngredientPage,
+    Instruction,
+    InstructionPage,
+    NutritionInfoAdmin,
+    NutritionInfoPage,
+    Unit,
+    UnitAdd,
 )
-from .models import Ingredient, Instruction, NutritionInfoAdmin, Unit, UnitAdd
 
 admin_router = APIRouter(
     prefix="/recipes",
@@ -59,19 +75,114 @@ def get_nutrition_info(
     return get_nutrition_info_from_db(db=db, nutrition_info_id=nutrition_info_id)
 
 
-@admin_router.get("/nutrtion_info/list", response_model=list[NutritionInfoAdmin])
-def list_nutrition_info(db: Annotated[Session, Depends(get_db)]) -> list[DB_NutritionInfo]:
-    """List all available nutrition infos."""
-    return list_nutrition_infos_from_db(db=db)
-
-
-@admin_router.get("/instructions/list", response_model=list[Instruction])
-def list_instructions(db: Annotated[Session, Depends(get_db)]) -> list[DB_Instruction]:
-    """List all available instructions"""
-    return list_instructions_from_db(db=db)
-
-
-@admin_router.get("/ingredients/list", response_model=list[Ingredient])
-def list_ingredients(db: Annotated[Session, Depends(get_db)]) -> list[DB_Ingredient]:
-    """List all available ingredients"""
-    return list_ingredients_from_db(db=db)
+@admin_router.get("/nutrtion_info/list", response_model=NutritionInfoPage)
+def list_nutrition_info(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Annotated[str | None, Query()] = None,
+    stream: Annotated[bool, Query()] = False,
+) -> (
+    dict[Literal["nutrition_infos", "next_cursor"], list[DB_NutritionInfo] | str | None]
+    | StreamingResponse
+):
+    """List available nutrition infos page by page, ordered by their IDs.
+
+    The `next_cursor` from the response should be passed as `cursor` to get the next
+    page. With `stream` set, all the nutrition infos after the `cursor` are instead streamed
+    as NDJSON, one nutrition info per line, and `limit` is ignored.
+
+    Raises:
+        HTTPException: Raised when the cursor is invalid.
+    """
+    after = decode_after_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(
+                stream_nutrition_infos_from_db(db=db, after=after),
+                NutritionInfoAdmin,
+                close=db.close,
+            ),
+            media_type="application/x-ndjson",
+        )
+    nutrition_infos, next_cursor = split_page(
+        list_nutrition_infos_from_db(db=db, limit=limit + 1, after=after),
+        limit=limit,
+        key="nutritio_info_id",
+    )
+    return {"nutrition_infos": nutrition_infos, "next_cursor": next_cursor}
+
+
+@admin_router.get("/instructions/list", response_model=InstructionPage)
+def list_instructions(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Annotated[str | None, Query()] = None,
+    stream: Annotated[bool, Query()] = False,
+) -> (
+    dict[Literal["instructions", "next_cursor"], list[DB_Instruction] | str | None]
+    | StreamingResponse
+):
+    """List available instructions page by page, ordered by their IDs.
+
+    The `next_cursor` from the response should be passed as `cursor` to get the next
+    page. With `stream` set, all the instructions after the `cursor` are instead streamed
+    as NDJSON, one instruction per line, and `limit` is ignored.
+
+    Raises:
+        HTTPException: Raised when the cursor is invalid.
+    """
+    after = decode_after_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(
+                stream_instructions_from_db(db=db, after=after), Instruction, close=db.close
+            ),
+            media_type="application/x-ndjson",
+        )
+    instructions, next_cursor = split_page(
+        list_instructions_from_db(db=db, limit=limit + 1, after=after),
+        limit=limit,
+        key="instruction_id",
+    )
+    return {"instructions": instructions, "next_cursor": next_cursor}
+
+
+@admin_router.get("/ingredients/list", response_model=IngredientPage)
+def list_ingredients(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Annotated[str | None, Query()] = None,
+    stream: Annotated[bool, Query()] = False,
+) -> (
+    dict[Literal["ingredients", "next_cursor"], list[DB_Ingredient] | str | None]
+    | StreamingResponse
+):
+    """List available ingredients page by page, ordered by their IDs.
+
+    The `next_cursor` from the response should be passed as `cursor` to get the next
+    page. With `stream` set, all the ingredients after the `cursor` are instead streamed
+    as NDJSON, one ingredient per line, and `limit` is ignored.
+
+    Raises:
+        HTTPException: Raised when the cursor is invalid.
+    """
+    after = decode_after_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(
+                stream_ingredients_from_db(db=db, after=after), Ingredient, close=db.close
+            ),
+            media_type="application/x-ndjson",
+        )
+    ingredients, next_cursor = split_page(
+        list_ingredients_from_db(db=db, limit=limit + 1, after=after),
+        limit=limit,
+        key="ingredient_id",
+    )
+    return {"ingredients": ingredients, "next_cursor": next_cursor}
+
+
+@admin_router.get("/cache/stats", response_model=CacheStats)
+def get_recipe_cache_stats() -> dict[str, int]:
+    """Get size and hit, miss and eviction counters of this worker's recipe cache."""
+    return recipe_cache.stats()
@@ -1,23 +1,61 @@
 """CRUD operations for the recipes package."""
 
+import math
+import operator
+from collections import Counter, defaultdict
 from pathlib import Path
+from typing import Any, Collection, Iterator, get_args
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-
+from sqlalchemy import Select, and_, case, delete, func, insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from src.cache import recipe_cache, reference_data_cache
+from src.db import (
+    bump_user_versions,
+    recipe_loader_options,
+    recipe_relationship_loaders,
+    select_loader_options,
+)
+from src.db.keyset import select_after, stream_scalars
 from src.db.models import (
+    DB_FeedEntry,
     DB_Ingredient,
     DB_Instruction,
     DB_NutritionInfo,
+    DB_Rating,
     DB_Recipe,
     DB_RecipeImage,
+    DB_RecipeSearchTerm,
+    DB_RecipeSimilarity,
     DB_Tag,
     DB_Unit,
     DB_User,
+    recipe_tag_association_table,
+    user_recipe_association_table,
 )
+from src.db.reference import UnitEntry
+from src.routes.feed.crud import fan_out_recipes
+from src.routes.ratings.leaderboard import RecipeLeaderboard
+from src.routes.tags.crud import update_tag_cooccurrences
 
 from .models import RecipeAdd, UnitAdd
-from .types import IngredientAddDict, InstructionAddDict, NutritionInfoAddDict
+from .pantry import PantryIndex, normalize_ingredient_name
+from .search import get_recipe_term_weights, tokenize
+from .types import (
+    IngredientAddDict,
+    InstructionAddDict,
+    Nutrient,
+    NutritionInfoAddDict,
+    RecipeOrder,
+)
+from .units import DISPLAY_UNITS, UnitConversions
+
+RECIPE_CHILDREN = ("instructions", "ingredients", "nutrition_info", "tags")
+NUTRIENTS: tuple[Nutrient, ...] = get_args(Nutrient)
+# ratings above it make similar recipes recommended, ratings below it make them avoided
+NEUTRAL_RATING = 3
 
 
 def add_measurment_unit(db: Session, unit_data: UnitAdd) -> DB_Unit:
@@ -26,6 +64,7 @@ def add_measurment_unit(db: Session, unit_data: UnitAdd) -> DB_Unit:
     db.add(unit)
     db.commit()
     db.refresh(unit)
+    reference_data_cache.invalidate()
     return unit
 
 
@@ -43,11 +82,16 @@ def delete_measurment_unit(db: Session, unit_id: int) -> None:
         )
     db.delete(unit)
     db.commit()
+    reference_data_cache.invalidate()
+    recipe_cache.clear()
 
 
-def list_measurment_units(db: Session) -> list[DB_Unit]:
-    """List all measurments unit available in the DB."""
-    return db.query(DB_Unit).all()
+def list_measurment_units(db: Session) -> list[UnitEntry]:
+    """List all measurments unit available in the DB.
+
+    Units are read from the cached snapshot of the reference data.
+    """
+    return list(reference_data_cache.get(db=db).units_by_id.values())
 
 
 def delete_recipe_from_db(db: Session, recipe_id: int) -> None:
@@ -62,18 +106,63 @@ def delete_recipe_from_db(db: Session, recipe_id: int) -> None:
         raise HTTPException(
             status_code=404, detail="Recipe with the given ID was nout found in the DB."
         )
+    update_tag_cooccurrences(
+        db=db, tag_ids={recipe_id: [tag.tag_id for tag in recipe.tags]}, change=-1
+    )
+    db.execute(delete(DB_RecipeSearchTerm).where(DB_RecipeSearchTerm.recipe_id == recipe_id))
+    db.execute(delete(DB_FeedEntry).where(DB_FeedEntry.recipe_id == recipe_id))
+    db.execute(
+        delete(DB_RecipeSimilarity).where(
+            or_(
+                DB_RecipeSimilarity.recipe_id == recipe_id,
+                DB_RecipeSimilarity.similar_recipe_id == recipe_id,
+            )
+        )
+    )
     db.delete(recipe)
     db.commit()
+    PantryIndex.remove_recipe(recipe_id)
+    RecipeLeaderboard.remove_recipe(recipe_id)
+    recipe_cache.invalidate(recipe_id)
+
+
+def get_recipe_version_from_db(db: Session, recipe_id: int) -> int:
+    """Get version of the recipe with the given ID without loading the recipe.
+
+    Raises:
+        HTTPException: Raises when a recipe with the given ID
+                was not found in the DB.
+    """
+    version = db.scalar(select(DB_Recipe.version).where(DB_Recipe.recipe_id == recipe_id))
+    if version is None:
+        raise HTTPException(
+            status_code=404, detail="Recipe with the given ID was nout found in the DB."
+        )
+    return version
 
 
-def get_recipe_from_db(db: Session, recipe_id: int) -> DB_Recipe:
+def get_recipe_from_db(
+    db: Session,
+    recipe_id: int,
+    load_details: bool = False,
+    relationships: Collection[str] | None = None,
+) -> DB_Recipe:
     """Get recipe with the given ID from the DB.
 
+    Args:
+        load_details: Whether to eagerly load all the relationships serialized
+                    in the `Recipe` model, using a fixed number of queries.
+        relationships: Names of the relationships loaded when `load_details`
+                    is set, all of them by default.
+
     Raises:
         HTTPException: Raises when a recipe with the given ID
                 was not found in the DB.
     """
-    recipe = db.query(DB_Recipe).filter(DB_Recipe.recipe_id == recipe_id).first()
+    query = db.query(DB_Recipe).filter(DB_Recipe.recipe_id == recipe_id)
+    if load_details:
+        query = query.options(*select_loader_options(recipe_relationship_loaders, relationships))
+    recipe = query.first()
     if not recipe:
         raise HTTPException(
             status_code=404, detail="Recipe with the given ID was nout found in the DB."
@@ -81,71 +170,434 @@ def get_recipe_from_db(db: Session, recipe_id: int) -> DB_Recipe:
     return recipe
 
 
-def add_recipe_to_db(db: Session, recipe_data: RecipeAdd) -> DB_Recipe:
-    """Add recipe to the database."""
-    recipe_dict = recipe_data.model_dump()
-    instructions = recipe_dict.pop("instructions")
-    ingredients = recipe_dict.pop("ingredients")
-    nutrition_info = recipe_dict.pop("nutrition_info")
-    tags = recipe_dict.pop("tags")
-    db_recipe = DB_Recipe(**recipe_dict)
-    db.add(db_recipe)
-    db.commit()
-    db.refresh(db_recipe)
-
-    add_instructions_to_db(db=db, instructions_data=instructions, recipe_id=db_recipe.recipe_id)
-    add_ingredients_to_db(db=db, ingredients_data=ingredients, recipe_id=db_recipe.recipe_id)
-    add_nutrition_info_to_db(
-        db=db, nutrition_info_data=nutrition_info, recipe_id=db_recipe.recipe_id
+def list_recipes_from_db(
+    db: Session,
+    limit: int,
+    order_by: RecipeOrder = "recipe_id",
+    descending: bool = False,
+    after: tuple[Any, int] | None = None,
+    author_id: int | None = None,
+    max_prep_time: int | None = None,
+    servings: int | None = None,
+    relationships: Collection[str] | None = None,
+) -> list[DB_Recipe]:
+    """List recipes using keyset pagination.
+
+    Rows are sorted by the `order_by` column with the recipe ID as a tie breaker,
+    so each page is an index range scan that costs the same regardless of its position.
+
+    Args:
+        after: Sort key of the last recipe of the previous page as a pair of the
+            `order_by` column value and the recipe ID.
+        relationships: Names of the relationships to eagerly load, all of them by default.
+    """
+    query = db.query(DB_Recipe).options(
+        *select_loader_options(recipe_relationship_loaders, relationships)
     )
-    db_recipe = (
-        add_tags_to_a_recipe(db=db, tag_ids=tags, db_recipe=db_recipe) if tags else db_recipe
+    if author_id is not None:
+        query = query.filter(DB_Recipe.author_id == author_id)
+    if max_prep_time is not None:
+        query = query.filter(DB_Recipe.prep_time <= max_prep_time)
+    if servings is not None:
+        query = query.filter(DB_Recipe.servings == servings)
+
+    compare = operator.lt if descending else operator.gt
+    sort_columns = [DB_Recipe.recipe_id]
+    if order_by != "recipe_id":
+        sort_columns.insert(0, getattr(DB_Recipe, order_by))
+    if after is not None:
+        last_value, last_recipe_id = after
+        if order_by == "recipe_id":
+            query = query.filter(compare(DB_Recipe.recipe_id, last_recipe_id))
+        else:
+            query = query.filter(
+                or_(
+                    compare(sort_columns[0], last_value),
+                    and_(
+                        sort_columns[0] == last_value,
+                        compare(DB_Recipe.recipe_id, last_recipe_id),
+                    ),
+                )
+            )
+    return (
+        query.order_by(*[column.desc() if descending else column for column in sort_columns])
+        .limit(limit)
+        .all()
     )
 
-    return db_recipe
+
+def filter_recipes_by_nutrition_from_db(
+    db: Session,
+    limit: int,
+    nutrient_ranges: dict[Nutrient, tuple[float | None, float | None]],
+    tag_ids: list[int] | None = None,
+    after: int | None = None,
+) -> list[DB_Recipe]:
+    """List recipes with nutrition per serving in the given ranges, ordered by their IDs.
+
+    Ranges are compared with the indexed per-serving columns, so the DB can drive
+    the query with the index of the most selective range.
+
+    Args:
+        nutrient_ranges: Inclusive minimum and maximum value per serving, either of
+                        which may be `None`, keyed by the nutrient.
+        tag_ids: IDs of tags which all must be assigned to the returned recipes.
+        after: ID of the last recipe of the previous page.
+    """
+    query = (
+        db.query(DB_Recipe)
+        .join(DB_NutritionInfo, DB_NutritionInfo.recipe_id == DB_Recipe.recipe_id)
+        .options(*recipe_loader_options)
+    )
+    for nutrient, (minimum, maximum) in nutrient_ranges.items():
+        column = getattr(DB_NutritionInfo, f"{nutrient}_per_serving")
+        if minimum is not None:
+            query = query.filter(column >= minimum)
+        if maximum is not None:
+            query = query.filter(column <= maximum)
+    if tag_ids:
+        tag_ids = set(tag_ids)
+        query = query.filter(
+            DB_Recipe.recipe_id.in_(
+                select(recipe_tag_association_table.c.recipe_id)
+                .where(recipe_tag_association_table.c.tag_id.in_(tag_ids))
+                .group_by(recipe_tag_association_table.c.recipe_id)
+                .having(func.count() == len(tag_ids))
+            )
+        )
+    if after is not None:
+        query = query.filter(DB_Recipe.recipe_id > after)
+    return query.order_by(DB_Recipe.recipe_id).limit(limit).all()
+
+
+def add_recipe_to_db(db: Session, recipe_data: RecipeAdd) -> DB_Recipe:
+    """Add recipe to the database.
+
+    The recipe and all of its child rows are saved as a single unit of work,
+    so a failure in any of the steps leaves no partially saved recipe in the DB.
+    """
+    (recipe_id,) = add_recipes_to_db(db=db, recipes_data=[recipe_data])
+    return get_recipe_from_db(db=db, recipe_id=recipe_id, load_details=True)
+
+
+def add_recipes_to_db(db: Session, recipes_data: list[RecipeAdd]) -> list[int]:
+    """Add a batch of recipes to the database and return their IDs.
+
+    The whole batch is saved in a single transaction and the child rows of all
+    the recipes are inserted with one bulk statement per table.
+
+    Raises:
+        HTTPException: Raised when an ingredient's unit was not found in the DB.
+    """
+    recipe_dicts = [recipe_data.model_dump() for recipe_data in recipes_data]
+    unit_ids = {
+        ingredient["unit_id"] for recipe in recipe_dicts for ingredient in recipe["ingredients"]
+    }
+    if not reference_data_cache.get(db=db, unit_ids=unit_ids).units_by_id.keys() >= unit_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unit with the given ID was nout found in the DB.",
+        )
+    db_recipes = [
+        DB_Recipe(**{k: v for k, v in recipe_dict.items() if k not in RECIPE_CHILDREN})
+        for recipe_dict in recipe_dicts
+    ]
+    db.add_all(db_recipes)
+    try:
+        db.flush()
+        recipe_ids = [db_recipe.recipe_id for db_recipe in db_recipes]
+        recipes = list(zip(recipe_ids, recipe_dicts))
+        add_instructions_to_db(
+            db=db,
+            instructions_data={recipe_id: recipe["instructions"] for recipe_id, recipe in recipes},
+        )
+        add_ingredients_to_db(
+            db=db,
+            ingredients_data={recipe_id: recipe["ingredients"] for recipe_id, recipe in recipes},
+        )
+        add_nutrition_info_to_db(
+            db=db,
+            nutrition_info_data={
+                recipe_id: recipe["nutrition_info"] for recipe_id, recipe in recipes
+            },
+            servings={recipe_id: recipe["servings"] for recipe_id, recipe in recipes},
+        )
+        add_tags_to_recipes(
+            db=db,
+            tag_ids={recipe_id: recipe["tags"] for recipe_id, recipe in recipes if recipe["tags"]},
+        )
+        add_recipes_to_search_index(
+            db=db,
+            term_weights={
+                recipe_id: get_recipe_term_weights(
+                    description=recipe["description"],
+                    ingredients=[ingredient["ingredient"] for ingredient in recipe["ingredients"]],
+                    instructions=[instruction["text"] for instruction in recipe["instructions"]],
+                )
+                for recipe_id, recipe in recipes
+            },
+        )
+        fan_out_recipes(db=db, recipe_ids=recipe_ids)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    recipe_cache.invalidate(*recipe_ids)
+    for recipe_id, recipe in recipes:
+        PantryIndex.add_recipe(
+            recipe_id, [ingredient["ingredient"] for ingredient in recipe["ingredients"]]
+        )
+    return recipe_ids
 
 
 def add_instructions_to_db(
-    db: Session, instructions_data: list[InstructionAddDict], recipe_id: int
+    db: Session, instructions_data: dict[int, list[InstructionAddDict]]
 ) -> None:
-    """Save instructions for the given recipe in the DB."""
-    for instruction in instructions_data:
-        db_instruction = DB_Instruction(**instruction, recipe_id=recipe_id)
-        db.add(db_instruction)
-        db.commit()
-        db.refresh(db_instruction)
+    """Save instructions, keyed by the ID of the recipe they belong to, in the DB.
+
+    The rows are inserted in bulk and the transaction is left open for the caller to commit.
+    """
+    rows = [
+        {**instruction, "recipe_id": recipe_id}
+        for recipe_id, instructions in instructions_data.items()
+        for instruction in instructions
+    ]
+    if rows:
+        db.execute(insert(DB_Instruction), rows)
 
 
 def add_ingredients_to_db(
-    db: Session, ingredients_data: list[IngredientAddDict], recipe_id: int
+    db: Session, ingredients_data: dict[int, list[IngredientAddDict]]
 ) -> None:
-    """Save ingredients for the given recipe in the DB."""
-    for ingredient in ingredients_data:
-        db_ingredient = DB_Ingredient(**ingredient, recipe_id=recipe_id)
-        db.add(db_ingredient)
-        db.commit()
-        db.refresh(db_ingredient)
+    """Save ingredients, keyed by the ID of the recipe they belong to, in the DB.
+
+    The rows are inserted in bulk and the transaction is left open for the caller to commit.
+    """
+    rows = [
+        {**ingredient, "recipe_id": recipe_id}
+        for recipe_id, ingredients in ingredients_data.items()
+        for ingredient in ingredients
+    ]
+    if rows:
+        db.execute(insert(DB_Ingredient), rows)
 
 
 def add_nutrition_info_to_db(
-    db: Session, nutrition_info_data: NutritionInfoAddDict, recipe_id: int
+    db: Session, nutrition_info_data: dict[int, NutritionInfoAddDict], servings: dict[int, int]
 ) -> None:
-    """Save nutrition info for the given recipe in the DB."""
-    db_nutrition_info = DB_NutritionInfo(**nutrition_info_data, recipe_id=recipe_id)
-    db.add(db_nutrition_info)
-    db.commit()
-    db.refresh(db_nutrition_info)
+    """Save nutrition infos, keyed by the ID of the recipe they belong to, in the DB.
+
+    Values per serving are computed from the `servings`, keyed by the recipe ID.
+    The rows are inserted in bulk and the transaction is left open for the caller to commit.
+    """
+    rows = [
+        {
+            **nutrition_info,
+            **{
+                f"{nutrient}_per_serving": nutrition_info[nutrient] / max(servings[recipe_id], 1)
+                for nutrient in NUTRIENTS
+            },
+            "recipe_id": recipe_id,
+        }
+        for recipe_id, nutrition_info in nutrition_info_data.items()
+    ]
+    if rows:
+        db.execute(insert(DB_NutritionInfo), rows)
+
+
+def add_tags_to_recipes(db: Session, tag_ids: dict[int, list[int]]) -> None:
+    """Assign tags, keyed by the ID of the recipe they should be added to, to recipes.
+
+    Tags that don't exist are ignored. Existing tags are looked up in the cached
+    snapshot of the reference data and the associations are inserted in bulk.
+    The transaction is left open for the caller to commit.
+    """
+    requested_tag_ids = {tag_id for recipe_tag_ids in tag_ids.values() for tag_id in recipe_tag_ids}
+    if not requested_tag_ids:
+        return
+    existing_tag_ids = reference_data_cache.get(db=db, tag_ids=requested_tag_ids).tags_by_id
+    rows = [
+        {"recipe_id": recipe_id, "tag_id": tag_id}
+        for recipe_id, recipe_tag_ids in tag_ids.items()
+        for tag_id in dict.fromkeys(recipe_tag_ids)
+        if tag_id in existing_tag_ids
+    ]
+    if rows:
+        db.execute(insert(recipe_tag_association_table), rows)
+        update_tag_cooccurrences(
+            db=db,
+            tag_ids={
+                recipe_id: [tag_id for tag_id in recipe_tag_ids if tag_id in existing_tag_ids]
+                for recipe_id, recipe_tag_ids in tag_ids.items()
+            },
+            change=1,
+        )
+
 
+def add_recipes_to_search_index(db: Session, term_weights: dict[int, Counter[str]]) -> None:
+    """Save search index entries, keyed by the ID of the recipe they point to, in the DB.
+
+    The rows are inserted in bulk and the transaction is left open for the caller to commit.
+    """
+    rows = [
+        {"term": term, "recipe_id": recipe_id, "weight": weight}
+        for recipe_id, recipe_term_weights in term_weights.items()
+        for term, weight in recipe_term_weights.items()
+    ]
+    if rows:
+        db.execute(insert(DB_RecipeSearchTerm), rows)
 
-def add_tags_to_a_recipe(db: Session, tag_ids: list[int], db_recipe: DB_Recipe) -> DB_Recipe:
-    """Add tags to a given recipe and return the refreshed recipe object with tags included."""
-    tags = [db.query(DB_Tag).filter(DB_Tag.tag_id == tag_id).first() for tag_id in tag_ids]
-    for tag in tags:
-        if tag:
-            db_recipe.tags.append(tag)
+
+def rebuild_search_index(db: Session, batch_size: int = 500) -> int:
+    """Rebuild the search index from scratch and return the number of indexed recipes.
+
+    Recipes are read in batches of `batch_size`, so memory usage doesn't grow
+    with the number of recipes in the DB.
+    """
+    db.execute(delete(DB_RecipeSearchTerm))
+    indexed_recipes_count = 0
+    last_recipe_id = 0
+    while True:
+        db_recipes = (
+            db.query(DB_Recipe)
+            .filter(DB_Recipe.recipe_id > last_recipe_id)
+            .order_by(DB_Recipe.recipe_id)
+            .options(selectinload(DB_Recipe.ingredientes), selectinload(DB_Recipe.instructions))
+            .limit(batch_size)
+            .all()
+        )
+        if not db_recipes:
+            break
+        add_recipes_to_search_index(
+            db=db,
+            term_weights={
+                db_recipe.recipe_id: get_recipe_term_weights(
+                    description=db_recipe.description,
+                    ingredients=[ingredient.ingredient for ingredient in db_recipe.ingredientes],
+                    instructions=[instruction.text for instruction in db_recipe.instructions],
+                )
+                for db_recipe in db_recipes
+            },
+        )
+        indexed_recipes_count += len(db_recipes)
+        last_recipe_id = db_recipes[-1].recipe_id
+        db.expunge_all()
     db.commit()
-    db.refresh(db_recipe)
-    return db_recipe
+    return indexed_recipes_count
+
+
+def search_recipes_in_db(db: Session, query: str, limit: int, offset: int = 0) -> list[DB_Recipe]:
+    """Find recipes matching the given query, the most relevant ones first.
+
+    A recipe's score is the sum of the weights of the matched terms, each multiplied
+    by the term's inverse document frequency, so rare terms matter more than common ones.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    document_frequencies = db.execute(
+        select(DB_RecipeSearchTerm.term, func.count())
+        .where(DB_RecipeSearchTerm.term.in_(terms))
+        .group_by(DB_RecipeSearchTerm.term)
+    ).all()
+    if not document_frequencies:
+        return []
+    recipes_count = db.scalar(select(func.count()).select_from(DB_Recipe))
+    inverse_document_frequencies = {
+        term: math.log(1 + recipes_count / frequency) for term, frequency in document_frequencies
+    }
+
+    score = func.sum(
+        DB_RecipeSearchTerm.weight
+        * case(inverse_document_frequencies, value=DB_RecipeSearchTerm.term)
+    )
+    recipe_ids = db.scalars(
+        select(DB_RecipeSearchTerm.recipe_id)
+        .where(DB_RecipeSearchTerm.term.in_(inverse_document_frequencies))
+        .group_by(DB_RecipeSearchTerm.recipe_id)
+        .order_by(score.desc(), DB_RecipeSearchTerm.recipe_id)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    return get_recipes_from_db(db=db, recipe_ids=recipe_ids)
+
+
+def get_recipes_from_db(db: Session, recipe_ids: list[int]) -> list[DB_Recipe]:
+    """Get recipes with the given IDs, in the same order, with their details loaded.
+
+    IDs of recipes that do not exist in the DB are skipped.
+    """
+    db_recipes = (
+        db.query(DB_Recipe)
+        .filter(DB_Recipe.recipe_id.in_(recipe_ids))
+        .options(*recipe_loader_options)
+        .all()
+    )
+    positions = {recipe_id: position for position, recipe_id in enumerate(recipe_ids)}
+    return sorted(db_recipes, key=lambda db_recipe: positions[db_recipe.recipe_id])
+
+
+def get_ranked_recipes_from_db(
+    db: Session, ranking: list[tuple[int, float]]
+) -> list[dict[str, DB_Recipe | float]]:
+    """Get recipes from a ranking of recipe IDs and scores, in the same order.
+
+    IDs of recipes deleted since the ranking was computed are skipped.
+    """
+    scores = dict(ranking)
+    return [
+        {"score": scores[db_recipe.recipe_id], "recipe": db_recipe}
+        for db_recipe in get_recipes_from_db(
+            db=db, recipe_ids=[recipe_id for recipe_id, _ in ranking]
+        )
+    ]
+
+
+def get_similar_recipe_ids_from_db(
+    db: Session, recipe_id: int, limit: int
+) -> list[tuple[int, float]]:
+    """Get IDs of the recipes most similar to the given one, based on their ratings.
+
+    Similarities are read from the table filled by `compute_recipe_similarities`.
+
+    Returns:
+        Tuples with the recipe ID and its similarity, the most similar recipe first.
+    """
+    return db.execute(
+        select(DB_RecipeSimilarity.similar_recipe_id, DB_RecipeSimilarity.score)
+        .where(DB_RecipeSimilarity.recipe_id == recipe_id)
+        .order_by(DB_RecipeSimilarity.score.desc(), DB_RecipeSimilarity.similar_recipe_id)
+        .limit(limit)
+    ).all()
+
+
+def get_recommended_recipe_ids_from_db(
+    db: Session, user_id: int, limit: int
+) -> list[tuple[int, float]]:
+    """Get IDs of the recipes recommended to the user based on the recipes they rated.
+
+    Every recipe similar to a rated one gets the similarity multiplied by how much
+    the rating differs from `NEUTRAL_RATING`. Recipes with a positive total score
+    which the user did not rate yet are recommended.
+
+    Returns:
+        Tuples with the recipe ID and its score, the best recommendation first.
+    """
+    score = func.sum(DB_RecipeSimilarity.score * (DB_Rating.rating - NEUTRAL_RATING))
+    return db.execute(
+        select(DB_RecipeSimilarity.similar_recipe_id, score)
+        .join(DB_Rating, DB_Rating.recipe_id == DB_RecipeSimilarity.recipe_id)
+        .where(
+            DB_Rating.author_id == user_id,
+            DB_RecipeSimilarity.similar_recipe_id.not_in(
+                select(DB_Rating.recipe_id).where(DB_Rating.author_id == user_id)
+            ),
+        )
+        .group_by(DB_RecipeSimilarity.similar_recipe_id)
+        .having(score > 0)
+        .order_by(score.desc(), DB_RecipeSimilarity.similar_recipe_id)
+        .limit(limit)
+    ).all()
 
 
 def get_nutrition_info_from_db(db: Session, nutrition_info_id: int) -> DB_NutritionInfo:
@@ -167,19 +619,137 @@ def get_nutrition_info_from_db(db: Session, nutrition_info_id: int) -> DB_Nutrit
     return nutrition_info
 
 
-def list_nutrition_infos_from_db(db: Session) -> list[DB_NutritionInfo]:
-    """List all available nutrition infos from the DB."""
-    return db.query(DB_NutritionInfo).all()
+def list_nutrition_infos_from_db(
+    db: Session, limit: int | None = None, after: int | None = None
+) -> list[DB_NutritionInfo]:
+    """List available nutrition infos from the DB, ordered by their IDs.
+
+    Args:
+        limit: Maximal number of returned nutrition infos, all are returned when `None`.
+        after: Only nutrition infos with higher IDs are returned, used to fetch the next page.
+    """
+    return db.scalars(select_nutrition_infos(after=after).limit(limit)).all()
+
+
+def stream_nutrition_infos_from_db(
+    db: Session, after: int | None = None
+) -> Iterator[DB_NutritionInfo]:
+    """Iterate over all the nutrition infos with IDs higher than `after`.
+
+    The rows are read in batches instead of being loaded at once.
+    """
+    return stream_scalars(db=db, query=select_nutrition_infos(after=after))
+
 
+def select_nutrition_infos(after: int | None = None) -> Select:
+    """Build a query selecting nutrition infos ordered by their IDs."""
+    return select_after(select(DB_NutritionInfo), DB_NutritionInfo.nutritio_info_id, after=after)
+
+
+def list_instructions_from_db(
+    db: Session, limit: int | None = None, after: int | None = None
+) -> list[DB_Instruction]:
+    """List available instructions from the DB, ordered by their IDs.
+
+    Args:
+        limit: Maximal number of returned instructions, all are returned when `None`.
+        after: Only instructions with higher IDs are returned, used to fetch the next page.
+    """
+    return db.scalars(select_instructions(after=after).limit(limit)).all()
 
-def list_instructions_from_db(db: Session) -> list[DB_Instruction]:
-    """List all available instructions from teh DB."""
-    return db.query(DB_Instruction).all()
 
+def stream_instructions_from_db(db: Session, after: int | None = None) -> Iterator[DB_Instruction]:
+    """Iterate over all the instructions with IDs higher than `after`.
+
+    The rows are read in batches instead of being loaded at once.
+    """
+    return stream_scalars(db=db, query=select_instructions(after=after))
+
+
+def select_instructions(after: int | None = None) -> Select:
+    """Build a query selecting instructions ordered by their IDs."""
+    return select_after(select(DB_Instruction), DB_Instruction.instruction_id, after=after)
+
+
+def list_ingredients_from_db(
+    db: Session, limit: int | None = None, after: int | None = None
+) -> list[DB_Ingredient]:
+    """List available ingredients from the DB, ordered by their IDs.
+
+    Args:
+        limit: Maximal number of returned ingredients, all are returned when `None`.
+        after: Only ingredients with higher IDs are returned, used to fetch the next page.
+    """
+    return db.scalars(select_ingredients(after=after).limit(limit)).all()
 
-def list_ingredients_from_db(db: Session) -> list[DB_Ingredient]:
-    """List all available ingredients from the DB."""
-    return db.query(DB_Ingredient).all()
+
+def stream_ingredients_from_db(db: Session, after: int | None = None) -> Iterator[DB_Ingredient]:
+    """Iterate over all the ingredients with IDs higher than `after`.
+
+    The rows are read in batches instead of being loaded at once.
+    """
+    return stream_scalars(db=db, query=select_ingredients(after=after))
+
+
+def select_ingredients(after: int | None = None) -> Select:
+    """Build a query selecting ingredients ordered by their IDs.
+
+    Units are joined in, so serializing the ingredients runs no further queries,
+    which would otherwise be executed while a streaming cursor is still open.
+    """
+    return select_after(
+        select(DB_Ingredient).options(joinedload(DB_Ingredient.unit)),
+        DB_Ingredient.ingredient_id,
+        after=after,
+    )
+
+
+def get_shopping_list_from_db(
+    db: Session, user_id: int, recipe_ids: list[int] | None = None, servings: int | None = None
+) -> list[dict[str, str | float]]:
+    """Sum up the ingredients of the given recipes, or of the recipes saved by the user.
+
+    Ingredients of all the recipes are loaded with a single query. Amounts in compatible
+    units are converted to a common one before being summed up and big totals are then
+    shown in a larger unit, e.g. 200 g and 1 kg of flour become 1.2 kg of flour.
+
+    Args:
+        recipe_ids: IDs of the recipes to shop for, the user's saved recipes by default.
+        servings: Number of servings every recipe is going to be made for, the amounts
+                are scaled accordingly. Recipes are not scaled by default.
+    """
+    query = select(
+        DB_Ingredient.ingredient, DB_Ingredient.amount, DB_Ingredient.unit_id, DB_Recipe.servings
+    ).join(DB_Recipe, DB_Recipe.recipe_id == DB_Ingredient.recipe_id)
+    if recipe_ids is None:
+        query = query.where(
+            DB_Recipe.recipe_id.in_(
+                select(user_recipe_association_table.c.recipe_id).where(
+                    user_recipe_association_table.c.user_id == user_id
+                )
+            )
+        )
+    else:
+        query = query.where(DB_Recipe.recipe_id.in_(recipe_ids))
+    ingredients = db.execute(query).all()
+
+    conversions = UnitConversions.get(
+        db=db, unit_ids={unit_id for _, _, unit_id, _ in ingredients} - {None}
+    )
+    totals = defaultdict(float)
+    for ingredient, amount, unit_id, recipe_servings in ingredients:
+        unit, factor = conversions.get(unit_id, ("", 1))
+        if servings is not None and recipe_servings > 0:
+            factor *= servings / recipe_servings
+        totals[normalize_ingredient_name(ingredient), unit] += amount * factor
+
+    shopping_list = []
+    for (ingredient, unit), amount in sorted(totals.items()):
+        if unit in DISPLAY_UNITS and amount >= DISPLAY_UNITS[unit][1]:
+            unit, factor = DISPLAY_UNITS[unit]
+            amount /= factor
+        shopping_list.append({"ingredient": ingredient, "amount": round(amount, 2), "unit": unit})
+    return shopping_list
 
 
 def add_recipe_to_saved_list(db: Session, recipe_id: int, db_user: DB_User) -> DB_User:
@@ -199,6 +769,7 @@ def add_recipe_to_saved_list(db: Session, recipe_id: int, db_user: DB_User) -> D
     if recipe in db_user.saved_recipes:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Recipe already saved.")
     db_user.saved_recipes.append(recipe)
+    bump_user_versions(db, db_user.user_id)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -225,6 +796,7 @@ def delete_recipe_from_users_saved_list(db: Session, recipe_id: int, db_user: DB
             status_code=404,
             detail="Recipe with the given ID was nout found in the User's list of saved recipes.",
         )
+    bump_user_versions(db, db_user.user_id)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -241,6 +813,7 @@ def save_recipe_images_in_db(
         db.commit()
         db.refresh(db_recipe_image)
         db_recipe_images.append(db_recipe_image)
+    recipe_cache.invalidate(recipe_id)
     return db_recipe_images
 
 
@@ -1,30 +1,78 @@
 """Endpoints for the recipes package."""
 
+from datetime import date
 from typing import Annotated, Literal
 
-from fastapi import APIRouter, Body, Depends, File, HTTPException, Path, UploadFile, status
-from fastapi.responses import FileResponse
-from pydantic import FilePath
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+from pydantic import FilePath, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from src.cache import recipe_cache
+from src.db import recipe_relationship_loaders
 from src.db.models import DB_Recipe, DB_Unit, DB_User
 from src.dependencies import get_db
 from src.roles import Roles
-from src.routes.auth.utils import RoleChecker, get_current_user
+from src.routes.auth.utils import RoleChecker, TokenClaims, get_current_user, get_token_claims
+from src.routes.ratings.leaderboard import RecipeLeaderboard
 from src.tags import Tags
-from src.utils import FileStorageManager
+from src.utils import (
+    FileStorageManager,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+    iter_ndjson_lines,
+    make_etag,
+    prune_model,
+    select_fields,
+)
 
 from .crud import (
     add_recipe_to_db,
     add_recipe_to_saved_list,
+    add_recipes_to_db,
     delete_recipe_from_db,
     delete_recipe_from_users_saved_list,
+    filter_recipes_by_nutrition_from_db,
+    get_ranked_recipes_from_db,
     get_recipe_from_db,
     get_recipe_image_from_db,
+    get_recipe_version_from_db,
+    get_recommended_recipe_ids_from_db,
+    get_shopping_list_from_db,
+    get_similar_recipe_ids_from_db,
     list_measurment_units,
+    list_recipes_from_db,
     save_recipe_images_in_db,
+    search_recipes_in_db,
+)
+from .models import (
+    PantryMatch,
+    RankedRecipe,
+    Recipe,
+    RecipeAdd,
+    RecipeImportLineResult,
+    RecipeImportReport,
+    RecipePage,
+    ShoppingListItem,
+    Unit,
 )
-from .models import Recipe, RecipeAdd, Unit
+from .pantry import PantryIndex
+from .types import RecipeOrder
 
 router = APIRouter(
     prefix="/recipes",
@@ -32,6 +80,233 @@ router = APIRouter(
 )
 
 
+@router.get("", response_model=RecipePage)
+def list_recipes(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    order_by: Annotated[RecipeOrder, Query()] = "recipe_id",
+    descending: Annotated[bool, Query()] = False,
+    cursor: Annotated[str | None, Query()] = None,
+    author_id: Annotated[int | None, Query()] = None,
+    max_prep_time: Annotated[int | None, Query()] = None,
+    servings: Annotated[int | None, Query()] = None,
+    fields: Annotated[str | None, Query()] = None,
+    expand: Annotated[str | None, Query()] = None,
+) -> dict[Literal["recipes", "next_cursor"], list[DB_Recipe] | str | None] | Response:
+    """List recipes page by page.
+
+    The `next_cursor` from the response should be passed as `cursor` together with
+    the same sorting and filtering parameters to get the next page. The recipes
+    can be limited to the comma-separated `fields` and relationships to `expand`,
+    only the serialized relationships are loaded.
+
+    Raises:
+        HTTPException: Raised when the cursor is malformed or was issued for a
+                        different sort order, or when an unknown field is requested.
+    """
+    selected_fields = select_fields(
+        Recipe, recipe_relationship_loaders.keys(), fields=fields, expand=expand
+    )
+    after = None
+    if cursor is not None:
+        cursor_data = decode_cursor(cursor)
+        try:
+            if (cursor_data["order_by"], cursor_data["descending"]) != (order_by, descending):
+                raise ValueError
+            last_value, last_recipe_id = cursor_data["after"]
+            if order_by == "create_date":
+                last_value = date.fromisoformat(last_value)
+            after = (last_value, int(last_recipe_id))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not match the requested sort order.",
+            )
+
+    recipes = list_recipes_from_db(
+        db=db,
+        limit=limit + 1,
+        order_by=order_by,
+        descending=descending,
+        after=after,
+        author_id=author_id,
+        max_prep_time=max_prep_time,
+        servings=servings,
+        relationships=selected_fields,
+    )
+    next_cursor = None
+    if len(recipes) > limit:
+        recipes = recipes[:limit]
+        last_recipe = recipes[-1]
+        next_cursor = encode_cursor(
+            {
+                "order_by": order_by,
+                "descending": descending,
+                "after": [getattr(last_recipe, order_by), last_recipe.recipe_id],
+            }
+        )
+    if selected_fields is not None:
+        recipe_model = prune_model(Recipe, selected_fields)
+        return JSONResponse(
+            {
+                "recipes": [
+                    recipe_model.model_validate(recipe, from_attributes=True).model_dump(
+                        mode="json"
+                    )
+                    for recipe in recipes
+                ],
+                "next_cursor": next_cursor,
+            }
+        )
+    return {"recipes": recipes, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=RecipePage)
+def search_recipes(
+    q: Annotated[str, Query(min_length=1, max_length=300)],
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Annotated[str | None, Query()] = None,
+) -> dict[Literal["recipes", "next_cursor"], list[DB_Recipe] | str | None]:
+    """Search recipes by their description, ingredients and instructions.
+
+    Results are ordered by relevance. The `next_cursor` from the response should
+    be passed as `cursor` together with the same query to get the next page.
+
+    Raises:
+        HTTPException: Raised when the cursor is malformed or was issued for
+                        a different query.
+    """
+    offset = 0
+    if cursor is not None:
+        cursor_data = decode_cursor(cursor)
+        offset = cursor_data.get("offset")
+        if cursor_data.get("query") != q or not isinstance(offset, int) or offset < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not match the search query.",
+            )
+
+    recipes = search_recipes_in_db(db=db, query=q, limit=limit + 1, offset=offset)
+    next_cursor = None
+    if len(recipes) > limit:
+        recipes = recipes[:limit]
+        next_cursor = encode_cursor({"query": q, "offset": offset + limit})
+    return {"recipes": recipes, "next_cursor": next_cursor}
+
+
+@router.get("/top", response_model=list[RankedRecipe])
+def list_top_recipes(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    tag_id: int | None = None,
+) -> list[dict]:
+    """List the top-rated recipes, optionally only those with the given tag.
+
+    Recipes are ranked by their Bayesian average rating, read from an in-memory
+    leaderboard kept up to date as ratings are added and deleted.
+    """
+    RecipeLeaderboard.ensure_loaded(db=db)
+    ranking = RecipeLeaderboard.top(limit=limit, tag_id=tag_id)
+    return get_ranked_recipes_from_db(db=db, ranking=ranking)
+
+
+@router.get(
+    "/recommended",
+    response_model=list[RankedRecipe],
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def list_recommended_recipes(
+    db: Annotated[Session, Depends(get_db)],
+    claims: Annotated[TokenClaims, Depends(get_token_claims)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> list[dict]:
+    """List recipes recommended to the current user based on the recipes they rated."""
+    ranking = get_recommended_recipe_ids_from_db(db=db, user_id=claims.user_id, limit=limit)
+    return get_ranked_recipes_from_db(db=db, ranking=ranking)
+
+
+@router.get("/nutrition", response_model=RecipePage)
+def filter_recipes_by_nutrition(
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Annotated[str | None, Query()] = None,
+    tag_ids: Annotated[list[int] | None, Query()] = None,
+    min_calories: Annotated[float | None, Query(ge=0)] = None,
+    max_calories: Annotated[float | None, Query(ge=0)] = None,
+    min_protein: Annotated[float | None, Query(ge=0)] = None,
+    max_protein: Annotated[float | None, Query(ge=0)] = None,
+    min_carbohydrates: Annotated[float | None, Query(ge=0)] = None,
+    max_carbohydrates: Annotated[float | None, Query(ge=0)] = None,
+    min_sugar: Annotated[float | None, Query(ge=0)] = None,
+    max_sugar: Annotated[float | None, Query(ge=0)] = None,
+    min_fiber: Annotated[float | None, Query(ge=0)] = None,
+    max_fiber: Annotated[float | None, Query(ge=0)] = None,
+    min_fat: Annotated[float | None, Query(ge=0)] = None,
+    max_fat: Annotated[float | None, Query(ge=0)] = None,
+) -> dict[Literal["recipes", "next_cursor"], list[DB_Recipe] | str | None]:
+    """List recipes with nutrition values per serving in the given ranges.
+
+    All the ranges are inclusive and only recipes with all the given tags are listed.
+    The `next_cursor` from the response should be passed as `cursor` together with
+    the same filters to get the next page.
+
+    Raises:
+        HTTPException: Raised when the cursor is malformed.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = int(decode_cursor(cursor)["after"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor."
+            )
+
+    nutrient_ranges = {
+        "calories": (min_calories, max_calories),
+        "protein": (min_protein, max_protein),
+        "carbohydrates": (min_carbohydrates, max_carbohydrates),
+        "sugar": (min_sugar, max_sugar),
+        "fiber": (min_fiber, max_fiber),
+        "fat": (min_fat, max_fat),
+    }
+    recipes = filter_recipes_by_nutrition_from_db(
+        db=db, limit=limit + 1, nutrient_ranges=nutrient_ranges, tag_ids=tag_ids, after=after
+    )
+    next_cursor = None
+    if len(recipes) > limit:
+        recipes = recipes[:limit]
+        next_cursor = encode_cursor({"after": recipes[-1].recipe_id})
+    return {"recipes": recipes, "next_cursor": next_cursor}
+
+
+@router.get("/pantry", response_model=list[PantryMatch])
+def find_recipes_for_pantry(
+    ingredients: Annotated[list[str], Query(min_length=1, max_length=100)],
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[PantryMatch]:
+    """Find recipes that can be made with the given ingredients.
+
+    Recipes are ranked by the share of their ingredients that the user already has.
+    Matches are computed from an in-memory index, so the DB is only queried when
+    the index is built on first use.
+    """
+    PantryIndex.ensure_loaded(db=db)
+    return [
+        PantryMatch(
+            recipe_id=recipe_id,
+            coverage=len(matched) / (len(matched) + len(missing)),
+            matched_ingredients=sorted(matched),
+            missing_ingredients=sorted(missing),
+        )
+        for recipe_id, matched, missing in PantryIndex.find_recipes(
+            ingredients=ingredients, limit=limit
+        )
+    ]
+
+
 @router.post(
     "/units/list",
     response_model=list[Unit],
@@ -55,12 +330,155 @@ def add_recipe(
     return add_recipe_to_db(db=db, recipe_data=recipe_data)
 
 
+@router.post(
+    "/recipe/import",
+    response_model=RecipeImportReport,
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+            "required": True,
+        }
+    },
+)
+async def import_recipes(
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    chunk_size: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> RecipeImportReport:
+    """Import recipes from an NDJSON body with one `RecipeAdd` document per line.
+
+    Lines are validated as they are received and saved in chunks of `chunk_size`
+    recipes, so only a single chunk is held in memory at a time.
+    """
+    results = []
+    chunk: list[tuple[int, RecipeAdd]] = []
+    async for line_number, line in iter_ndjson_lines(request.stream()):
+        try:
+            chunk.append((line_number, RecipeAdd.model_validate_json(line)))
+        except ValidationError as e:
+            results.append(RecipeImportLineResult(line=line_number, error=str(e)))
+        if len(chunk) == chunk_size:
+            results.extend(await run_in_threadpool(save_recipes_chunk, db=db, chunk=chunk))
+            chunk = []
+    if chunk:
+        results.extend(await run_in_threadpool(save_recipes_chunk, db=db, chunk=chunk))
+
+    results.sort(key=lambda result: result.line)
+    imported = sum(1 for result in results if result.error is None)
+    return RecipeImportReport(imported=imported, failed=len(results) - imported, results=results)
+
+
+def save_recipes_chunk(
+    db: Session, chunk: list[tuple[int, RecipeAdd]]
+) -> list[RecipeImportLineResult]:
+    """Save a chunk of imported recipes and report the result for each line.
+
+    When the chunk can't be saved as a whole, its recipes are saved one by one
+    so that a single faulty recipe doesn't fail the rest of the chunk.
+    """
+    try:
+        recipe_ids = add_recipes_to_db(db=db, recipes_data=[recipe for _, recipe in chunk])
+    except (SQLAlchemyError, HTTPException):
+        results = []
+        for line_number, recipe in chunk:
+            try:
+                (recipe_id,) = add_recipes_to_db(db=db, recipes_data=[recipe])
+            except HTTPException as e:
+                results.append(RecipeImportLineResult(line=line_number, error=e.detail))
+            except SQLAlchemyError as e:
+                results.append(
+                    RecipeImportLineResult(line=line_number, error=str(e.__cause__ or e))
+                )
+            else:
+                results.append(RecipeImportLineResult(line=line_number, recipe_id=recipe_id))
+        return results
+    return [
+        RecipeImportLineResult(line=line_number, recipe_id=recipe_id)
+        for (line_number, _), recipe_id in zip(chunk, recipe_ids)
+    ]
+
+
 @router.get("/recipe/{recipe_id}", response_model=Recipe)
 def get_recipe(
-    recipe_id: Annotated[int, Path()], db: Annotated[Session, Depends(get_db)]
-) -> DB_Recipe:
-    """Return a recipe with the given ID."""
-    return get_recipe_from_db(db=db, recipe_id=recipe_id)
+    recipe_id: Annotated[int, Path()],
+    db: Annotated[Session, Depends(get_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
+    fields: Annotated[str | None, Query()] = None,
+    expand: Annotated[str | None, Query()] = None,
+) -> Response:
+    """Return a recipe with the given ID.
+
+    Serialized recipes are cached in memory until the recipe is changed. Responds
+    with 304 when the representation matches the `If-None-Match` header. The recipe
+    can be limited to the comma-separated `fields` and relationships to `expand`,
+    such representations are not cached and only their relationships are loaded.
+
+    Raises:
+        HTTPException: Raised when an unknown field is requested.
+    """
+    selected_fields = select_fields(
+        Recipe, recipe_relationship_loaders.keys(), fields=fields, expand=expand
+    )
+    if selected_fields is not None:
+        etag_parts = ("recipe", recipe_id, sorted(selected_fields))
+        if if_none_match:
+            etag = make_etag(*etag_parts, get_recipe_version_from_db(db, recipe_id))
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        db_recipe = get_recipe_from_db(
+            db=db, recipe_id=recipe_id, load_details=True, relationships=selected_fields
+        )
+        recipe_json = (
+            prune_model(Recipe, selected_fields)
+            .model_validate(db_recipe, from_attributes=True)
+            .model_dump_json()
+        )
+        return Response(
+            content=recipe_json,
+            media_type="application/json",
+            headers={"ETag": make_etag(*etag_parts, db_recipe.version)},
+        )
+
+    cached_recipe = recipe_cache.get(recipe_id)
+    if cached_recipe is None:
+        cache_version = recipe_cache.version
+        if if_none_match:
+            etag = make_etag("recipe", recipe_id, get_recipe_version_from_db(db, recipe_id))
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        db_recipe = get_recipe_from_db(db=db, recipe_id=recipe_id, load_details=True)
+        etag = make_etag("recipe", recipe_id, db_recipe.version)
+        recipe_json = (
+            Recipe.model_validate(db_recipe, from_attributes=True).model_dump_json().encode()
+        )
+        recipe_cache.set(
+            recipe_id,
+            (etag, recipe_json),
+            size=len(etag) + len(recipe_json),
+            version=cache_version,
+        )
+    else:
+        etag, recipe_json = cached_recipe
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=recipe_json, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/recipe/{recipe_id}/similar", response_model=list[RankedRecipe])
+def list_similar_recipes(
+    recipe_id: Annotated[int, Path()],
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> list[dict]:
+    """List recipes similar to the one with the given ID, based on their ratings.
+
+    Raises:
+        HTTPException: Raised when a recipe with the given ID was not found in the DB.
+    """
+    get_recipe_version_from_db(db=db, recipe_id=recipe_id)
+    ranking = get_similar_recipe_ids_from_db(db=db, recipe_id=recipe_id, limit=limit)
+    return get_ranked_recipes_from_db(db=db, ranking=ranking)
 
 
 @router.delete(
@@ -116,6 +534,27 @@ def delete_recipe_from_saved(
     delete_recipe_from_users_saved_list(db=db, recipe_id=recipe_id, db_user=current_user)
 
 
+@router.get(
+    "/saved/shopping_list",
+    response_model=list[ShoppingListItem],
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def get_shopping_list(
+    db: Annotated[Session, Depends(get_db)],
+    claims: Annotated[TokenClaims, Depends(get_token_claims)],
+    recipe_ids: Annotated[list[int] | None, Query(max_length=500)] = None,
+    servings: Annotated[int | None, Query(ge=1)] = None,
+) -> list[dict]:
+    """Get a shopping list with the ingredients of the given recipes.
+
+    Uses the recipes saved by the current user when no recipes are given. When
+    `servings` is given, every recipe is scaled to that number of servings.
+    """
+    return get_shopping_list_from_db(
+        db=db, user_id=claims.user_id, recipe_ids=recipe_ids, servings=servings
+    )
+
+
 @router.post(
     "/recipe/pictures/upload/{recipe_id}",
     status_code=status.HTTP_204_NO_CONTENT,
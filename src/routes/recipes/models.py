@@ -2,7 +2,7 @@
 
 from pydantic import BaseModel
 
-from src.routes.ratings.models import Rating
+from src.routes.ratings.models import Rating, RatingSummary
 from src.routes.tags.models import Tag
 
 
@@ -131,6 +131,94 @@ class Recipe(RecipeBase):
     nutrition_info: list[NutritionInfo]
     tags: list[Tag]
     ratings: list[Rating]
+    rating_summary: RatingSummary
 
     class Config:
         from_attributes = True
+
+
+class RecipePage(BaseModel):
+    """Model with a single page of the recipe listing.
+
+    `next_cursor` should be sent back to fetch the following page and is
+    `None` on the last page.
+    """
+
+    recipes: list[Recipe]
+    next_cursor: str | None
+
+
+class InstructionPage(BaseModel):
+    """Model with a single page of the instruction listing."""
+
+    instructions: list[Instruction]
+    next_cursor: str | None
+
+
+class IngredientPage(BaseModel):
+    """Model with a single page of the ingredient listing."""
+
+    ingredients: list[Ingredient]
+    next_cursor: str | None
+
+
+class NutritionInfoPage(BaseModel):
+    """Model with a single page of the nutrition info listing."""
+
+    nutrition_infos: list[NutritionInfoAdmin]
+    next_cursor: str | None
+
+
+class RankedRecipe(BaseModel):
+    """Model with a recipe ranked by a score, e.g. its rating or its similarity to another one."""
+
+    score: float
+    recipe: Recipe
+
+
+class PantryMatch(BaseModel):
+    """Model with a recipe matching the ingredients available to the user."""
+
+    recipe_id: int
+    coverage: float
+    matched_ingredients: list[str]
+    missing_ingredients: list[str]
+
+
+class ShoppingListItem(BaseModel):
+    """Model with the total amount of an ingredient needed for the selected recipes."""
+
+    ingredient: str
+    amount: float
+    unit: str
+
+
+class RecipeImportLineResult(BaseModel):
+    """Model with the result of importing a single line of an NDJSON recipe import.
+
+    Exactly one of `recipe_id` and `error` is set.
+    """
+
+    line: int
+    recipe_id: int | None = None
+    error: str | None = None
+
+
+class RecipeImportReport(BaseModel):
+    """Model with the results of a bulk recipe import."""
+
+    imported: int
+    failed: int
+    results: list[RecipeImportLineResult]
+
+
+class CacheStats(BaseModel):
+    """Model with the size and usage statistics of an in-memory cache."""
+
+    entries: int
+    size_bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
@@ -0,0 +1,124 @@
+"""In-memory index for finding recipes that can be made from the given ingredients."""
+
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.db.models import DB_Ingredient
+
+
+def normalize_ingredient_name(ingredient: str) -> str:
+    """Normalize an ingredient name so that different spellings of it match."""
+    return " ".join(ingredient.lower().split())
+
+
+class PantryIndex:
+    """Process-wide inverted index from ingredient names to the recipes using them.
+
+    The index is built from the DB on first use and then kept up to date by
+    `add_recipe` and `remove_recipe`, which should be called after the
+    corresponding changes are committed. Those only update the index of the
+    process which made the change, so the index is rebuilt from the DB once it
+    gets older than `REBUILD_INTERVAL` seconds to pick up changes made by
+    other workers.
+    """
+
+    REBUILD_INTERVAL = 5 * 60
+
+    _recipes_by_ingredient: dict[str, set[int]] = defaultdict(set)
+    _ingredients_by_recipe: dict[int, frozenset[str]] = {}
+    _built_at: float | None = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def load(cls, db: Session) -> None:
+        """(Re)build the index from all the ingredients stored in the DB.
+
+        Rows are streamed from the DB, so only the index itself is kept in memory.
+        """
+        recipes_by_ingredient = defaultdict(set)
+        ingredients_by_recipe = defaultdict(set)
+        with cls._lock:
+            rows = db.execute(
+                select(DB_Ingredient.recipe_id, DB_Ingredient.ingredient).execution_options(
+                    yield_per=10000
+                )
+            )
+            for recipe_id, ingredient in rows:
+                ingredient = normalize_ingredient_name(ingredient)
+                recipes_by_ingredient[ingredient].add(recipe_id)
+                ingredients_by_recipe[recipe_id].add(ingredient)
+            cls._recipes_by_ingredient = recipes_by_ingredient
+            cls._ingredients_by_recipe = {
+                recipe_id: frozenset(ingredients)
+                for recipe_id, ingredients in ingredients_by_recipe.items()
+            }
+            cls._built_at = time.monotonic()
+
+    @classmethod
+    def ensure_loaded(cls, db: Session) -> None:
+        """Build the index unless it was built less than `REBUILD_INTERVAL` ago."""
+        with cls._lock:
+            if cls._built_at is None or time.monotonic() - cls._built_at > cls.REBUILD_INTERVAL:
+                cls.load(db)
+
+    @classmethod
+    def add_recipe(cls, recipe_id: int, ingredients: Iterable[str]) -> None:
+        """Add ingredients of a newly created recipe to the index."""
+        with cls._lock:
+            if cls._built_at is None:
+                return
+            normalized_ingredients = frozenset(map(normalize_ingredient_name, ingredients))
+            for ingredient in normalized_ingredients:
+                cls._recipes_by_ingredient[ingredient].add(recipe_id)
+            cls._ingredients_by_recipe[recipe_id] = normalized_ingredients
+
+    @classmethod
+    def remove_recipe(cls, recipe_id: int) -> None:
+        """Remove a deleted recipe from the index."""
+        with cls._lock:
+            for ingredient in cls._ingredients_by_recipe.pop(recipe_id, ()):
+                recipe_ids = cls._recipes_by_ingredient[ingredient]
+                recipe_ids.discard(recipe_id)
+                if not recipe_ids:
+                    del cls._recipes_by_ingredient[ingredient]
+
+    @classmethod
+    def find_recipes(
+        cls, ingredients: Iterable[str], limit: int
+    ) -> list[tuple[int, frozenset[str], frozenset[str]]]:
+        """Find recipes using the most of the given ingredients.
+
+        Recipes are ranked by the share of their ingredients covered by the given
+        ones, then by the number of covered ingredients.
+
+        Returns:
+            Up to `limit` tuples with the recipe ID, the covered ingredients and
+            the missing ingredients.
+        """
+        pantry = frozenset(map(normalize_ingredient_name, ingredients))
+        with cls._lock:
+            matches_count = Counter()
+            for ingredient in pantry:
+                matches_count.update(cls._recipes_by_ingredient.get(ingredient, ()))
+            best_matches = heapq.nlargest(
+                limit,
+                matches_count.items(),
+                key=lambda match: (
+                    match[1] / len(cls._ingredients_by_recipe[match[0]]),
+                    match[1],
+                    -match[0],
+                ),
+            )
+            recipes_ingredients = [
+                (recipe_id, cls._ingredients_by_recipe[recipe_id]) for recipe_id, _ in best_matches
+            ]
+        return [
+            (recipe_id, recipe_ingredients & pantry, recipe_ingredients - pantry)
+            for recipe_id, recipe_ingredients in recipes_ingredients
+        ]
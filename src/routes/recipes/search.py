@@ -0,0 +1,51 @@
+"""Text processing for the full-text recipe search."""
+
+import re
+import unicodedata
+from collections import Counter
+
+TERM_PATTERN = re.compile(r"\w+")
+MAX_TERM_LENGTH = 100
+
+DESCRIPTION_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+INSTRUCTION_WEIGHT = 1
+
+
+def tokenize(text: str) -> list[str]:
+    """Split the given text into normalized search terms, skipping one-character words.
+
+    Terms are case-folded and stripped of accents, so that e.g. "Café" and
+    "cafe" or "Straße" and "strasse" are the same term.
+    """
+    return [
+        term[:MAX_TERM_LENGTH]
+        for term in TERM_PATTERN.findall(normalize_text(text))
+        if len(term) > 1
+    ]
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold the text and strip the accents from its letters."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def get_recipe_term_weights(
+    description: str, ingredients: list[str], instructions: list[str]
+) -> Counter[str]:
+    """Count the weighted occurrences of every term in the texts of a recipe.
+
+    Terms from the description count more than the ones from the ingredients,
+    which in turn count more than the ones from the instructions.
+    """
+    weights: Counter[str] = Counter()
+    for texts, weight in (
+        ([description], DESCRIPTION_WEIGHT),
+        (ingredients, INGREDIENT_WEIGHT),
+        (instructions, INSTRUCTION_WEIGHT),
+    ):
+        for text in texts:
+            for term in tokenize(text):
+                weights[term] += weight
+    return weights
@@ -1,6 +1,6 @@
 """Types for the recipes package."""
 
-from typing import TypedDict
+from typing import Literal, TypedDict
 
 
 class IngredientAddDict(TypedDict):
@@ -27,3 +27,10 @@ class NutritionInfoAddDict(TypedDict):
     sugar: int
     fiber: int
     fat: int
+
+
+RecipeOrder = Literal["recipe_id", "create_date"]
+"""Columns recipes can be listed by."""
+
+Nutrient = Literal["calories", "protein", "carbohydrates", "sugar", "fiber", "fat"]
+"""Nutrients stored in the nutrition info of a recipe."""
@@ -0,0 +1,51 @@
+"""Conversions between compatible measurment units."""
+
+import threading
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from src.cache import reference_data_cache
+
+# factors converting known units to the base unit of their kind, keyed by the `liquid` flag
+BASE_UNIT_FACTORS: dict[bool, dict[str, float]] = {
+    False: {"mg": 0.001, "g": 1, "dag": 10, "kg": 1000},
+    True: {"ml": 1, "cl": 10, "dl": 100, "l": 1000},
+}
+BASE_UNITS = {False: "g", True: "ml"}
+# larger units used to display big amounts of the base units
+DISPLAY_UNITS = {"g": ("kg", 1000), "ml": ("l", 1000)}
+
+
+class UnitConversions:
+    """Process-wide table converting amounts in any stored unit to a common unit.
+
+    Units known by name are converted to grams or milliliters depending on their
+    `liquid` flag, other units are kept as they are. The table is derived from the
+    cached snapshot of the units and rebuilt whenever a new snapshot is loaded.
+    """
+
+    _conversions: dict[int, tuple[str, float]] = {}
+    _version: int | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, db: Session, unit_ids: Iterable[int] = ()) -> dict[int, tuple[str, float]]:
+        """Get the name of the common unit and the factor converting to it, keyed by unit ID.
+
+        Args:
+            unit_ids: IDs of the units about to be converted.
+        """
+        reference_data = reference_data_cache.get(db=db, unit_ids=unit_ids)
+        with cls._lock:
+            if cls._version != reference_data.version:
+                conversions = {}
+                for unit in reference_data.units_by_id.values():
+                    factor = BASE_UNIT_FACTORS[unit.liquid].get(unit.unit.strip().lower())
+                    if factor is None:
+                        conversions[unit.unit_id] = (unit.unit, 1)
+                    else:
+                        conversions[unit.unit_id] = (BASE_UNITS[unit.liquid], factor)
+                cls._conversions = conversions
+                cls._version = reference_data.version
+            return cls._conversions
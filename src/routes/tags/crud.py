@@ -1,9 +1,32 @@
 """CRUD operations for the tags package."""
 
+import itertools
+import math
+from collections import Counter
+
 from fastapi import HTTPException, status
+from sqlalchemy import Insert, bindparam, delete, func, or_, select, update
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import Session
 
-from src.db.models import DB_Tag, DB_User
+from src.cache import recipe_cache, reference_data_cache
+from src.db import bump_recipe_versions, bump_user_versions
+from src.db.dialects import dialect_insert
+from src.db.models import (
+    DB_Recipe,
+    DB_Tag,
+    DB_TagCooccurrence,
+    DB_User,
+    recipe_tag_association_table,
+    user_tag_association_table,
+)
+from src.db.reference import TagEntry
+from src.routes.feed.crud import (
+    add_tag_to_feed,
+    remove_deleted_tag_from_feeds,
+    remove_tag_from_feed,
+)
+from src.routes.ratings.leaderboard import RecipeLeaderboard
 
 from .models import TagAdd
 
@@ -14,27 +37,61 @@ def add_tag_to_db(db: Session, tag_data: TagAdd) -> DB_Tag:
     db.add(db_tag)
     db.commit()
     db.refresh(db_tag)
+    reference_data_cache.invalidate()
     return db_tag
 
 
 def delete_tag_from_db(db: Session, tag_id: int) -> None:
     """Delete tag with the given ID from DB.
 
+    The tag is removed from all the recipes and users it was assigned to, and
+    the recipes it brought into the subscribers' feeds are removed from them.
+
     Raises:
         HTTPException: Raises when a tag with the given ID
                 was not found in the DB.
     """
-    recipe = db.query(DB_Tag).filter(DB_Tag.tag_id == tag_id).first()
-    if recipe is None:
+    if db.scalar(select(DB_Tag.tag_id).where(DB_Tag.tag_id == tag_id)) is None:
         raise HTTPException(
             status_code=404, detail="Tag with the given ID was nout found in the DB."
         )
-    return recipe
+    recipe_ids = db.scalars(
+        select(recipe_tag_association_table.c.recipe_id).where(
+            recipe_tag_association_table.c.tag_id == tag_id
+        )
+    ).all()
+    user_ids = db.scalars(
+        select(user_tag_association_table.c.user_id).where(
+            user_tag_association_table.c.tag_id == tag_id
+        )
+    ).all()
+    bump_recipe_versions(db, *recipe_ids)
+    bump_user_versions(db, *user_ids)
+    db.execute(
+        delete(recipe_tag_association_table).where(recipe_tag_association_table.c.tag_id == tag_id)
+    )
+    db.execute(
+        delete(user_tag_association_table).where(user_tag_association_table.c.tag_id == tag_id)
+    )
+    remove_deleted_tag_from_feeds(db=db, user_ids=user_ids, recipe_ids=recipe_ids)
+    db.execute(
+        delete(DB_TagCooccurrence).where(
+            or_(DB_TagCooccurrence.tag_id == tag_id, DB_TagCooccurrence.other_tag_id == tag_id)
+        )
+    )
+    db.execute(delete(DB_Tag).where(DB_Tag.tag_id == tag_id))
+    db.commit()
+    reference_data_cache.invalidate()
+    recipe_cache.invalidate(*recipe_ids)
+    RecipeLeaderboard.remove_tag(tag_id)
+
 
+def list_tags_from_db(db: Session) -> list[TagEntry]:
+    """List all available tags in the DB.
 
-def list_tags_from_db(db: Session) -> list[DB_Tag]:
-    """List all available tags in the DB."""
-    return db.query(DB_Tag).all()
+    Tags are read from the cached snapshot of the reference data.
+    """
+    return list(reference_data_cache.get(db=db).tags_by_id.values())
 
 
 def add_tag_to_a_user(db: Session, tag_id: int, db_user: DB_User) -> DB_User:
@@ -57,6 +114,13 @@ def add_tag_to_a_user(db: Session, tag_id: int, db_user: DB_User) -> DB_User:
             detail="The User is already subscribed to the given Tag.",
         )
     db_user.tags.append(tag)
+    db.execute(
+        update(DB_Tag)
+        .where(DB_Tag.tag_id == tag_id)
+        .values(subscriber_count=DB_Tag.subscriber_count + 1)
+    )
+    bump_user_versions(db, db_user.user_id)
+    add_tag_to_feed(db=db, user_id=db_user.user_id, tag_id=tag_id)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -83,6 +147,139 @@ def delete_tag_from_users_list(db: Session, tag_id: int, db_user: DB_User) -> DB
             status_code=400,
             detail="Tag with the given ID was nout found in the User's list of subscribed tags.",
         )
+    db.execute(
+        update(DB_Tag)
+        .where(DB_Tag.tag_id == tag_id)
+        .values(subscriber_count=DB_Tag.subscriber_count - 1)
+    )
+    bump_user_versions(db, db_user.user_id)
+    remove_tag_from_feed(db=db, user_id=db_user.user_id, tag_id=tag_id)
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+def update_tag_cooccurrences(db: Session, tag_ids: dict[int, list[int]], change: int) -> None:
+    """Add (`change=1`) or remove (`change=-1`) recipes to the tag co-occurrence counts.
+
+    Args:
+        tag_ids: IDs of the tags, keyed by the ID of the recipe they belong to.
+
+    New pairs are inserted and existing ones incremented with a single upsert,
+    so concurrent writers never insert the same pair twice. Rows are always
+    updated in the order of the tag IDs, so concurrent writers lock them in
+    the same order and can not deadlock.
+
+    The transaction is left open for the caller to commit.
+    """
+    tag_counts = Counter()
+    pair_counts = Counter()
+    for recipe_tag_ids in tag_ids.values():
+        unique_tag_ids = set(recipe_tag_ids)
+        tag_counts.update(unique_tag_ids)
+        pair_counts.update(itertools.permutations(unique_tag_ids, 2))
+    if not tag_counts:
+        return
+    tags_table, cooccurrences_table = DB_Tag.__table__, DB_TagCooccurrence.__table__
+    db.execute(
+        update(tags_table)
+        .where(tags_table.c.tag_id == bindparam("b_tag_id"))
+        .values(recipe_count=tags_table.c.recipe_count + bindparam("b_change")),
+        [
+            {"b_tag_id": tag_id, "b_change": change * count}
+            for tag_id, count in sorted(tag_counts.items())
+        ],
+    )
+    if not pair_counts:
+        return
+
+    if change > 0:
+        db.execute(
+            _upsert_cooccurrences(db),
+            [
+                {"tag_id": tag_id, "other_tag_id": other_tag_id, "recipe_count": change * count}
+                for (tag_id, other_tag_id), count in sorted(pair_counts.items())
+            ],
+        )
+        return
+    db.execute(
+        update(cooccurrences_table)
+        .where(
+            cooccurrences_table.c.tag_id == bindparam("b_tag_id"),
+            cooccurrences_table.c.other_tag_id == bindparam("b_other_tag_id"),
+        )
+        .values(recipe_count=cooccurrences_table.c.recipe_count + bindparam("b_change")),
+        [
+            {"b_tag_id": tag_id, "b_other_tag_id": other_tag_id, "b_change": change * count}
+            for (tag_id, other_tag_id), count in sorted(pair_counts.items())
+        ],
+    )
+    db.execute(
+        delete(DB_TagCooccurrence).where(
+            DB_TagCooccurrence.tag_id.in_(tag_counts), DB_TagCooccurrence.recipe_count <= 0
+        )
+    )
+
+
+def _upsert_cooccurrences(db: Session) -> Insert:
+    """Build an INSERT adding its `recipe_count` to the count of already existing pairs.
+
+    Raises:
+        UnsupportedDialectError: Raised when the DB's dialect has no supported upsert.
+    """
+    cooccurrences_table = DB_TagCooccurrence.__table__
+    statement = dialect_insert(db, cooccurrences_table)
+    if isinstance(statement, mysql.Insert):
+        return statement.on_duplicate_key_update(
+            recipe_count=cooccurrences_table.c.recipe_count + statement.inserted.recipe_count
+        )
+    return statement.on_conflict_do_update(
+        index_elements=[cooccurrences_table.c.tag_id, cooccurrences_table.c.other_tag_id],
+        set_={"recipe_count": cooccurrences_table.c.recipe_count + statement.excluded.recipe_count},
+    )
+
+
+def get_related_tags_from_db(
+    db: Session, tag_id: int, limit: int, min_recipe_count: int = 1
+) -> list[dict[str, DB_Tag | int | float]]:
+    """Get tags most related to the given one, based on how often they tag the same recipes.
+
+    Tags are ranked by their lift, i.e. how many times more often they appear together
+    with the given tag than they would if tags were assigned independently. The counts
+    are read from the precomputed co-occurrences, so the association table is not scanned.
+
+    Args:
+        min_recipe_count: Minimal number of recipes tagged with both tags, used to
+                        skip related tags with too little evidence.
+
+    Raises:
+        HTTPException: Raised when a tag with the given ID was not found in the DB.
+    """
+    tag_recipe_count = db.scalar(select(DB_Tag.recipe_count).where(DB_Tag.tag_id == tag_id))
+    if tag_recipe_count is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tag with the given ID was nout found in the DB.",
+        )
+    recipes_count = db.scalar(select(func.count()).select_from(DB_Recipe))
+    rows = db.execute(
+        select(DB_Tag, DB_TagCooccurrence.recipe_count)
+        .join(DB_Tag, DB_Tag.tag_id == DB_TagCooccurrence.other_tag_id)
+        .where(
+            DB_TagCooccurrence.tag_id == tag_id,
+            DB_TagCooccurrence.recipe_count >= min_recipe_count,
+        )
+        .order_by(
+            (DB_TagCooccurrence.recipe_count * 1.0 / DB_Tag.recipe_count).desc(),
+            DB_TagCooccurrence.recipe_count.desc(),
+            DB_Tag.tag_id,
+        )
+        .limit(limit)
+    ).all()
+    related_tags = []
+    for db_tag, recipe_count in rows:
+        lift = recipe_count * recipes_count / (tag_recipe_count * db_tag.recipe_count)
+        related_tags.append(
+            {"tag": db_tag, "recipe_count": recipe_count, "lift": lift, "pmi": math.log2(lift)}
+        )
+    return related_tags
@@ -2,7 +2,7 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, status
+from fastapi import APIRouter, Depends, Path, Query, status
 from sqlalchemy.orm import Session
 
 from src.db.models import DB_Tag, DB_User
@@ -11,8 +11,13 @@ from src.roles import Roles
 from src.routes.auth.utils import RoleChecker, get_current_user
 from src.tags import Tags
 
-from .crud import add_tag_to_a_user, delete_tag_from_users_list, list_tags_from_db
-from .models import Tag
+from .crud import (
+    add_tag_to_a_user,
+    delete_tag_from_users_list,
+    get_related_tags_from_db,
+    list_tags_from_db,
+)
+from .models import RelatedTag, Tag
 
 router = APIRouter(prefix="/tags", tags=[Tags.tags])
 
@@ -27,6 +32,23 @@ def tag_list(db: Annotated[Session, Depends(get_db)]) -> list[DB_Tag]:
     return list_tags_from_db(db=db)
 
 
+@router.get(
+    "/related/{tag_id}",
+    response_model=list[RelatedTag],
+    dependencies=[Depends(RoleChecker([Roles.USER.value, Roles.ADMIN.value]))],
+)
+def related_tags_list(
+    tag_id: Annotated[int, Path()],
+    db: Annotated[Session, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    min_recipe_count: Annotated[int, Query(ge=1)] = 2,
+) -> list[dict]:
+    """List tags most often used together with the given one, ranked by lift."""
+    return get_related_tags_from_db(
+        db=db, tag_id=tag_id, limit=limit, min_recipe_count=min_recipe_count
+    )
+
+
 @router.post("/subscribe/{tag_id}", status_code=status.HTTP_201_CREATED)
 def subscribe_to_tag(
     tag_id: Annotated[int, Path()],
@@ -17,3 +17,17 @@ class Tag(TagBase):
     """Model with all the Tag info."""
 
     tag_id: int
+
+
+class RelatedTag(BaseModel):
+    """Model with a tag related to another one.
+
+    `recipe_count` is the number of recipes with both tags, `lift` the ratio of
+    that number to the one expected if the tags were unrelated and `pmi` its
+    base 2 logarithm.
+    """
+
+    tag: Tag
+    recipe_count: int
+    lift: float
+    pmi: float
@@ -9,3 +9,4 @@ class Tags(Enum):
     recipes = "Recipes"
     tags = "Tags"
     ratings = "Ratings"
+    feed = "Feed"
@@ -2,7 +2,18 @@
 
 from datetime import datetime
 
+import pytest
+from sqlalchemy import create_mock_engine
+from sqlalchemy.orm import Session
+
+from src.cache import principal_cache
+from src.db import bump_recipe_versions
+from src.routes.auth.crud import _insert_follow_edge, compute_follow_suggestions
+from src.routes.auth.hashing import PasswordHasher
 from src.test.client import client
+from src.test.db import TestingSessionLocal
+from src.test.recipes.test_recipes import add_tag, add_unit, count_queries, recipe_data
+from src.test.tags.test_tags import make_admin
 
 
 class TestAuth:
@@ -356,3 +367,266 @@ class TestAuth:
         assert res_data[0]["user_id"] == 3
 
         client.logout()
+
+    def test_me_etag_matches_not_modified_returned_until_user_updated(self) -> None:
+        client.register_user(username="etag_user", password="password")
+        client.login(username="etag_user", password="password")
+        res = client.get("/auth/me")
+        etag = res.headers["ETag"]
+
+        not_modified_res = client.get("/auth/me", headers={"If-None-Match": etag})
+
+        assert not_modified_res.status_code == 304
+        assert not_modified_res.content == b""
+
+        client.put("/auth/update", json={"first_name": "FirstNameUpdated"})
+        modified_res = client.get("/auth/me", headers={"If-None-Match": etag})
+
+        assert modified_res.status_code == 200
+        assert modified_res.headers["ETag"] != etag
+        assert modified_res.json()["first_name"] == "FirstNameUpdated"
+
+        client.logout()
+
+    def test_followers_listed_as_summaries_details_fetched_per_user(self) -> None:
+        client.register_user(username="summary_followed", password="password")
+        client.register_user(username="summary_follower", password="password")
+        client.login(username="summary_followed", password="password")
+        followed_user_id = client.get("/auth/me").json()["user_id"]
+        client.logout()
+        client.login(username="summary_follower", password="password")
+        follower_user_id = client.get("/auth/me").json()["user_id"]
+        client.post(f"/auth/follow/{followed_user_id}")
+        client.logout()
+
+        followers_res = client.get(f"/auth/followers/{followed_user_id}")
+        followed_res = client.get(f"/auth/followed/{follower_user_id}")
+
+        assert followers_res.json() == [
+            {
+                "user_id": follower_user_id,
+                "username": "summary_follower",
+                "first_name": "FirstName",
+                "last_name": "LastName",
+            }
+        ]
+        assert [user["user_id"] for user in followed_res.json()] == [followed_user_id]
+
+        user_res = client.get(f"/auth/user/{follower_user_id}")
+
+        assert user_res.status_code == 200
+        assert user_res.json()["tags"] == []
+        assert user_res.json()["saved_recipes"] == []
+        assert client.get("/auth/user/100000").status_code == 404
+
+    def test_followers_etag_built_from_listed_users_only(self) -> None:
+        client.register_user(username="etag_followed", password="password")
+        client.register_user(username="etag_follower", password="password")
+        client.login(username="etag_followed", password="password")
+        followed_user_id = client.get("/auth/me").json()["user_id"]
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(followed_user_id, add_unit())
+        ).json()["recipe_id"]
+        client.logout()
+        client.login(username="etag_follower", password="password")
+        client.post(f"/auth/follow/{followed_user_id}")
+        client.post(f"/recipes/saved/save/{recipe_id}")
+        etag = client.get(f"/auth/followers/{followed_user_id}").headers["ETag"]
+
+        db = TestingSessionLocal()
+        bump_recipe_versions(db, recipe_id)
+        db.commit()
+        db.close()
+
+        assert (
+            client.get(
+                f"/auth/followers/{followed_user_id}", headers={"If-None-Match": etag}
+            ).status_code
+            == 304
+        )
+
+        client.put("/auth/update", json={"first_name": "FirstNameUpdated"})
+        res = client.get(f"/auth/followers/{followed_user_id}", headers={"If-None-Match": etag})
+
+        assert res.status_code == 200
+        assert res.json()[0]["first_name"] == "FirstNameUpdated"
+
+        client.logout()
+
+    def test_me_fields_and_expand_prune_response(self) -> None:
+        client.register_user(username="fields_user", password="password")
+        client.login(username="fields_user", password="password")
+
+        res = client.get("/auth/me", params={"fields": "username,tags,saved_recipes"})
+        assert res.json() == {"username": "fields_user", "tags": [], "saved_recipes": []}
+
+        res = client.get("/auth/me", params={"expand": "tags"})
+        assert res.json()["tags"] == []
+        assert "saved_recipes" not in res.json()
+        assert res.json()["username"] == "fields_user"
+
+        client.logout()
+
+    def test_follow_and_unfollow_counted_once_and_checked(self) -> None:
+        client.register_user(username="graph_followed", password="password")
+        client.register_user(username="graph_follower", password="password")
+        client.login(username="graph_followed", password="password")
+        followed_user_id = client.get("/auth/me").json()["user_id"]
+        client.logout()
+        client.login(username="graph_follower", password="password")
+
+        assert client.get(f"/auth/follows/{followed_user_id}").json() == {"follows": False}
+        client.post(f"/auth/follow/{followed_user_id}")
+        assert client.post(f"/auth/follow/{followed_user_id}").status_code == 403
+        assert client.get(f"/auth/follows/{followed_user_id}").json() == {"follows": True}
+        assert client.get("/auth/me").json()["following_count"] == 1
+        followed_user = client.get(f"/auth/user/{followed_user_id}").json()
+        assert followed_user["follower_count"] == 1
+
+        client.post(f"/auth/unfollow/{followed_user_id}")
+        assert client.post(f"/auth/unfollow/{followed_user_id}").status_code == 403
+        assert client.get(f"/auth/follows/{followed_user_id}").json() == {"follows": False}
+        assert client.get("/auth/me").json()["following_count"] == 0
+        followed_user = client.get(f"/auth/user/{followed_user_id}").json()
+        assert followed_user["follower_count"] == 0
+        client.logout()
+
+    @pytest.mark.parametrize(
+        "url, clause",
+        [
+            ("mysql+pymysql://", "INSERT IGNORE INTO"),
+            ("postgresql://", "ON CONFLICT DO NOTHING"),
+            ("sqlite://", "ON CONFLICT DO NOTHING"),
+        ],
+    )
+    def test_follow_edge_insert_ignores_duplicates_for_dialect(self, url: str, clause: str) -> None:
+        mock_engine = create_mock_engine(url, executor=lambda *args, **kwargs: None)
+        statement = _insert_follow_edge(
+            db=Session(bind=mock_engine), follower_id=1, followed_user_id=2
+        )
+        assert clause in str(statement.compile(dialect=mock_engine.dialect))
+
+    def test_follow_suggestions_ranked_by_mutual_follows_and_shared_tags(self) -> None:
+        user_ids = {}
+        for username in ("suggest_a", "suggest_b", "suggest_c", "suggest_d"):
+            client.register_user(username=username, password="password")
+            client.login(username=username, password="password")
+            user_ids[username] = client.get("/auth/me").json()["user_id"]
+            client.logout()
+        tag_id = add_tag("suggestions_tag")
+
+        client.login(username="suggest_b", password="password")
+        client.post(f"/auth/follow/{user_ids['suggest_c']}")
+        client.post(f"/auth/follow/{user_ids['suggest_d']}")
+        client.logout()
+        client.login(username="suggest_c", password="password")
+        client.post(f"/tags/subscribe/{tag_id}")
+        client.logout()
+        client.login(username="suggest_a", password="password")
+        client.post(f"/tags/subscribe/{tag_id}")
+        client.post(f"/auth/follow/{user_ids['suggest_b']}")
+
+        db = TestingSessionLocal()
+        compute_follow_suggestions(db=db)
+        db.close()
+
+        res = client.get("/auth/suggestions")
+
+        assert res.status_code == 200
+        assert [user["user_id"] for user in res.json()] == [
+            user_ids["suggest_c"],
+            user_ids["suggest_d"],
+        ]
+        assert res.json()[0]["mutual_follow_count"] == 1
+        assert res.json()[0]["shared_tag_count"] == 1
+
+        client.post(f"/auth/follow/{user_ids['suggest_c']}")
+        res = client.get("/auth/suggestions")
+
+        assert [user["user_id"] for user in res.json()] == [user_ids["suggest_d"]]
+        client.logout()
+
+    def test_token_claims_authorize_without_loading_user_and_can_be_revoked(self) -> None:
+        client.register_user(username="claims_user", password="password")
+        client.login(username="claims_user", password="password")
+        user_id = client.get("/auth/me").json()["user_id"]
+
+        with count_queries() as statements:
+            res = client.get(f"/auth/follows/{user_id}")
+
+        assert res.status_code == 200
+        assert not any("FROM users" in statement for statement in statements)
+
+        assert client.post("/auth/token/revoke").status_code == 204
+        assert client.get("/auth/me").status_code == 401
+        assert client.post("/auth/token/revoke").status_code == 401
+
+        client.login(username="claims_user", password="password")
+        assert client.get("/auth/me").status_code == 200
+        client.logout()
+
+    def test_cached_principal_skips_user_query_until_user_changes(self) -> None:
+        client.register_user(username="cached_principal", password="password")
+        client.login(username="cached_principal", password="password")
+        client.get("/auth/me/profile_picture")
+
+        with count_queries() as statements:
+            res = client.get("/auth/me/profile_picture")
+
+        assert res.status_code == 200
+        assert not any("FROM users" in statement for statement in statements)
+
+        client.put("/auth/update", json={"first_name": "Changed"})
+        with count_queries() as statements:
+            client.get("/auth/me/profile_picture")
+
+        assert any("FROM users" in statement for statement in statements)
+        client.logout()
+
+        make_admin("principal_cache_admin")
+        client.login(username="principal_cache_admin", password="password")
+        principal_cache.clear()
+        client.get("/auth/cache/stats")
+        stats = client.get("/auth/cache/stats").json()
+
+        assert stats["hits"] >= 1
+        assert 0 < stats["hit_ratio"] <= 1
+        client.logout()
+
+    def test_login_rejected_with_503_when_password_hashing_saturated(self) -> None:
+        client.register_user(username="hashing_user", password="password")
+        pending_slots = 0
+        while PasswordHasher._pending.acquire(blocking=False):
+            pending_slots += 1
+        try:
+            res = client.post(
+                "/auth/token", data={"username": "hashing_user", "password": "password"}
+            )
+        finally:
+            for _ in range(pending_slots):
+                PasswordHasher._pending.release()
+
+        assert res.status_code == 503
+        assert res.headers["Retry-After"] == "1"
+
+        client.login(username="hashing_user", password="password")
+        assert client.get("/auth/me").status_code == 200
+        client.logout()
+
+    def test_revoked_admin_token_rejected_on_admin_endpoints(self) -> None:
+        client.register_user(username="revoked_admin_target", password="password")
+        make_admin("revoked_admin")
+        client.login(username="revoked_admin_target", password="password")
+        target_user_id = client.get("/auth/me").json()["user_id"]
+        client.logout()
+        client.login(username="revoked_admin", password="password")
+        admin_headers = dict(client.headers)
+
+        assert client.post("/auth/token/revoke").status_code == 204
+        res = client.delete(f"/auth/delete/{target_user_id}", headers=admin_headers)
+
+        assert res.status_code == 401
+        client.logout()
+        client.login(username="revoked_admin_target", password="password")
+        assert client.get("/auth/me").status_code == 200
+        client.logout()
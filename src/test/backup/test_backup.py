@@ -0,0 +1,112 @@
+"""Tests for the backup package."""
+
+import io
+import json
+import zipfile
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from src.db.dump import DumpRestoreError, restore_db_dump
+from src.db.models import Base
+from src.test.client import client
+from src.test.db import engine
+from src.test.recipes.test_recipes import add_tag, add_unit, recipe_data
+from src.test.tags.test_tags import make_admin
+
+
+def count_rows(db_engine) -> dict[str, int]:
+    """Count rows in all the tables of the given DB."""
+    with db_engine.connect() as connection:
+        return {
+            table.name: connection.execute(select(func.count()).select_from(table)).scalar()
+            for table in Base.metadata.sorted_tables
+        }
+
+
+class TestBackup:
+
+    @pytest.mark.parametrize("dump_format", ["ndjson", "csv"])
+    def test_exported_archive_restored_into_empty_db(self, dump_format: str) -> None:
+        make_admin(f"backup_admin_{dump_format}")
+        client.login(username=f"backup_admin_{dump_format}", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        tag_id = add_tag(f"backup_{dump_format}")
+        recipe_id = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(author_id, unit_id, tags=[tag_id], description='Line,\n"quoted"'),
+        ).json()["recipe_id"]
+        client.post(f"/recipes/saved/save/{recipe_id}")
+        escaped_recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, unit_id, description="\\N")
+        ).json()["recipe_id"]
+
+        response = client.get("/backup/export", params={"format": dump_format})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        manifest = json.loads(archive.read("manifest.json"))
+        assert manifest == {"format": dump_format, "tables": count_rows(engine)}
+
+        restored_engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=restored_engine)
+        row_counts = restore_db_dump(
+            engine=restored_engine, archive_file=io.BytesIO(response.content), batch_size=2
+        )
+        assert row_counts == manifest["tables"]
+        assert count_rows(restored_engine) == manifest["tables"]
+        with restored_engine.connect() as connection:
+            assert (
+                connection.execute(
+                    select(Base.metadata.tables["recipes"]).where(
+                        Base.metadata.tables["recipes"].c.recipe_id == recipe_id
+                    )
+                )
+                .one()
+                ._mapping["description"]
+                == 'Line,\n"quoted"'
+            )
+            assert (
+                connection.execute(
+                    select(Base.metadata.tables["recipes"]).where(
+                        Base.metadata.tables["recipes"].c.recipe_id == escaped_recipe_id
+                    )
+                )
+                .one()
+                ._mapping["description"]
+                == "\\N"
+            )
+
+        with pytest.raises(DumpRestoreError):
+            restore_db_dump(engine=engine, archive_file=io.BytesIO(response.content))
+        client.logout()
+
+    @pytest.mark.parametrize(
+        "format, parts",
+        [
+            ("csv", {"units.csv": "unit_id,name\n1,kg\n"}),
+            ("csv", {"units.csv": "unit_id,unit,liquid\n1,kg\n"}),
+            ("ndjson", {"units.ndjson": '{"unit_id": 1, "unit": "kg", "liquid": false'}),
+            ("ndjson", {}),
+        ],
+    )
+    def test_malformed_archive_part_rejected(self, format: str, parts: dict[str, str]) -> None:
+        archive_file = io.BytesIO()
+        with zipfile.ZipFile(archive_file, "w") as archive:
+            archive.writestr(
+                "manifest.json", json.dumps({"format": format, "tables": {"units": 1}})
+            )
+            for name, content in parts.items():
+                archive.writestr(name, content)
+        restored_engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=restored_engine)
+
+        with pytest.raises(DumpRestoreError):
+            restore_db_dump(engine=restored_engine, archive_file=archive_file)
+        assert count_rows(restored_engine)["units"] == 0
@@ -0,0 +1,164 @@
+from src.db.models import DB_FeedEntry
+from src.test.client import client
+from src.test.db import TestingSessionLocal
+from src.test.recipes.test_recipes import add_tag, add_unit, recipe_data
+from src.test.tags.test_tags import make_admin
+from src.utils import ConfigManager
+
+
+def add_recipe(username: str, **kwargs) -> int:
+    """Add a recipe as the given user and return its ID."""
+    client.login(username=username, password="password")
+    author_id = client.get("/auth/me").json()["user_id"]
+    recipe_id = client.post(
+        "/recipes/recipe/add", json=recipe_data(author_id, add_unit(), **kwargs)
+    ).json()["recipe_id"]
+    client.logout()
+    return recipe_id
+
+
+def get_user_id(username: str) -> int:
+    """Get ID of the user with the given username."""
+    client.login(username=username, password="password")
+    user_id = client.get("/auth/me").json()["user_id"]
+    client.logout()
+    return user_id
+
+
+def get_feed_recipe_ids(limit: int) -> list[int]:
+    """Follow the cursors through the whole feed of the logged in user."""
+    recipe_ids = []
+    params = {"limit": limit}
+    while True:
+        page = client.get("/feed", params=params).json()
+        recipe_ids.extend(recipe["recipe_id"] for recipe in page["recipes"])
+        if page["next_cursor"] is None:
+            return recipe_ids
+        params["cursor"] = page["next_cursor"]
+
+
+class TestFeed:
+
+    def test_feed_followed_authors_and_subscribed_tags_merged_newest_first(self) -> None:
+        for username in ["feed_reader", "feed_author", "feed_other_author"]:
+            client.register_user(username=username, password="password")
+        tag_id = add_tag("feed_tag")
+        author_id = get_user_id("feed_author")
+        client.login(username="feed_reader", password="password")
+        client.post(f"/auth/follow/{author_id}")
+        client.post(f"/tags/subscribe/{tag_id}")
+        client.logout()
+
+        recipe_ids = [
+            add_recipe("feed_author"),
+            add_recipe("feed_other_author"),
+            add_recipe("feed_other_author", tags=[tag_id]),
+            add_recipe("feed_author", tags=[tag_id]),
+        ]
+
+        client.login(username="feed_reader", password="password")
+        assert get_feed_recipe_ids(limit=2) == [recipe_ids[3], recipe_ids[2], recipe_ids[0]]
+
+        client.post(f"/auth/unfollow/{author_id}")
+        assert get_feed_recipe_ids(limit=2) == [recipe_ids[3], recipe_ids[2]]
+        client.logout()
+
+    def test_feed_author_with_many_followers_merged_on_read(self) -> None:
+        for username in ["feed_celebrity_reader", "feed_celebrity"]:
+            client.register_user(username=username, password="password")
+        author_id = get_user_id("feed_celebrity")
+        client.login(username="feed_celebrity_reader", password="password")
+        client.post(f"/auth/follow/{author_id}")
+        client.logout()
+        config = ConfigManager.get_config()
+        max_followers, config.feed_fanout_max_followers = config.feed_fanout_max_followers, 0
+        try:
+            recipe_id = add_recipe("feed_celebrity")
+            client.login(username="feed_celebrity_reader", password="password")
+            feed_recipe_ids = get_feed_recipe_ids(limit=20)
+            client.logout()
+        finally:
+            config.feed_fanout_max_followers = max_followers
+
+        db = TestingSessionLocal()
+        assert db.query(DB_FeedEntry).filter(DB_FeedEntry.recipe_id == recipe_id).count() == 0
+        db.close()
+        assert feed_recipe_ids == [recipe_id]
+
+    def test_feed_tag_with_many_subscribers_merged_on_read(self) -> None:
+        for username in ["feed_popular_tag_reader", "feed_popular_tag_author"]:
+            client.register_user(username=username, password="password")
+        tag_id = add_tag("feed_popular_tag")
+        client.login(username="feed_popular_tag_reader", password="password")
+        client.post(f"/tags/subscribe/{tag_id}")
+        client.logout()
+        config = ConfigManager.get_config()
+        max_subscribers, config.feed_fanout_max_subscribers = config.feed_fanout_max_subscribers, 0
+        try:
+            recipe_id = add_recipe("feed_popular_tag_author", tags=[tag_id])
+            client.login(username="feed_popular_tag_reader", password="password")
+            feed_recipe_ids = get_feed_recipe_ids(limit=20)
+            client.logout()
+            client.login(username="feed_popular_tag_author", password="password")
+            author_feed_recipe_ids = get_feed_recipe_ids(limit=20)
+            client.logout()
+        finally:
+            config.feed_fanout_max_subscribers = max_subscribers
+
+        db = TestingSessionLocal()
+        assert db.query(DB_FeedEntry).filter(DB_FeedEntry.recipe_id == recipe_id).count() == 0
+        db.close()
+        assert feed_recipe_ids == [recipe_id]
+        assert author_feed_recipe_ids == []
+
+    def test_feed_updated_incrementally_on_follow_and_subscription_changes(self) -> None:
+        for username in ["feed_incremental_reader", "feed_incremental_author"]:
+            client.register_user(username=username, password="password")
+        tag_id = add_tag("feed_incremental_tag")
+        author_id = get_user_id("feed_incremental_author")
+        untagged_recipe_id = add_recipe("feed_incremental_author")
+        tagged_recipe_id = add_recipe("feed_incremental_author", tags=[tag_id])
+
+        client.login(username="feed_incremental_reader", password="password")
+        client.post(f"/tags/subscribe/{tag_id}")
+        assert get_feed_recipe_ids(limit=20) == [tagged_recipe_id]
+
+        client.post(f"/auth/follow/{author_id}")
+        assert get_feed_recipe_ids(limit=20) == [tagged_recipe_id, untagged_recipe_id]
+
+        client.delete(f"/tags/unsubscribe/{tag_id}")
+        assert get_feed_recipe_ids(limit=20) == [tagged_recipe_id, untagged_recipe_id]
+
+        client.post(f"/tags/subscribe/{tag_id}")
+        client.post(f"/auth/unfollow/{author_id}")
+        assert get_feed_recipe_ids(limit=20) == [tagged_recipe_id]
+
+        client.delete(f"/tags/unsubscribe/{tag_id}")
+        assert get_feed_recipe_ids(limit=20) == []
+        client.logout()
+
+    def test_feed_entries_of_deleted_tag_removed(self) -> None:
+        for username in ["feed_deleted_tag_reader", "feed_deleted_tag_author"]:
+            client.register_user(username=username, password="password")
+        tag_id = add_tag("feed_deleted_tag")
+        other_tag_id = add_tag("feed_deleted_tag_other")
+        client.login(username="feed_deleted_tag_reader", password="password")
+        client.post(f"/tags/subscribe/{tag_id}")
+        client.post(f"/tags/subscribe/{other_tag_id}")
+        client.logout()
+        removed_recipe_id = add_recipe("feed_deleted_tag_author", tags=[tag_id])
+        kept_recipe_id = add_recipe("feed_deleted_tag_author", tags=[tag_id, other_tag_id])
+
+        make_admin("feed_deleted_tag_admin")
+        client.login(username="feed_deleted_tag_admin", password="password")
+        assert client.delete(f"/tags/delete/{tag_id}").status_code == 204
+        client.logout()
+
+        client.login(username="feed_deleted_tag_reader", password="password")
+        assert get_feed_recipe_ids(limit=20) == [kept_recipe_id]
+        client.logout()
+        db = TestingSessionLocal()
+        assert (
+            db.query(DB_FeedEntry).filter(DB_FeedEntry.recipe_id == removed_recipe_id).count() == 0
+        )
+        db.close()
@@ -0,0 +1 @@
+"""Tests for the recipes package/route"""
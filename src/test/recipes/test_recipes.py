@@ -0,0 +1,740 @@
+"""Tests for the endpoints in the recipes package/route."""
+
+import json
+from contextlib import contextmanager
+from typing import Generator
+
+from sqlalchemy import event
+
+from src.cache import recipe_cache
+from src.db.models import DB_Recipe, DB_Tag, DB_Unit, DB_User
+from src.roles import Roles
+from src.routes.ratings.crud import compute_recipe_similarities, recompute_rating_aggregates
+from src.routes.ratings.leaderboard import RecipeLeaderboard
+from src.routes.recipes.pantry import PantryIndex
+from src.test.client import client
+from src.test.db import TestingSessionLocal, engine
+
+
+def add_unit(unit: str = "g", liquid: bool = False) -> int:
+    """Add a measurment unit directly to the DB and return its ID."""
+    db = TestingSessionLocal()
+    db_unit = DB_Unit(unit=unit, liquid=liquid)
+    db.add(db_unit)
+    db.commit()
+    unit_id = db_unit.unit_id
+    db.close()
+    return unit_id
+
+
+def add_tag(name: str) -> int:
+    """Add a tag directly to the DB and return its ID."""
+    db = TestingSessionLocal()
+    db_tag = DB_Tag(name=name)
+    db.add(db_tag)
+    db.commit()
+    tag_id = db_tag.tag_id
+    db.close()
+    return tag_id
+
+
+@contextmanager
+def count_queries() -> Generator[list[str], None, None]:
+    """Collect statements executed against the test DB inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def recipe_data(author_id: int, unit_id: int, **kwargs) -> dict:
+    """Build a request body for adding a recipe."""
+    data = {
+        "servings": 2,
+        "prep_time": 30,
+        "description": "Pancakes",
+        "author_id": author_id,
+        "ingredients": [
+            {"ingredient": "flour", "amount": 200, "unit_id": unit_id},
+            {"ingredient": "milk", "amount": 300, "unit_id": unit_id},
+        ],
+        "instructions": [
+            {"text": "Mix everything.", "order": 1},
+            {"text": "Fry.", "order": 2},
+        ],
+        "nutrition_info": {
+            "calories": 800,
+            "protein": 30,
+            "carbohydrates": 120,
+            "sugar": 10,
+            "fiber": 5,
+            "fat": 20,
+        },
+    }
+    data.update(kwargs)
+    return data
+
+
+class TestRecipes:
+    """Tests for the endpoints in the recipes package/route."""
+
+    def test_add_recipe_logged_in_whole_recipe_saved(self) -> None:
+        client.register_user(username="recipe_author", password="password")
+        client.login(username="recipe_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+
+        res = client.post("/recipes/recipe/add", json=recipe_data(author_id, unit_id))
+
+        assert res.status_code == 201
+        res_data = res.json()
+        assert res_data["author_id"] == author_id
+        assert [i["ingredient"] for i in res_data["ingredientes"]] == ["flour", "milk"]
+        assert [i["order"] for i in res_data["instructions"]] == [1, 2]
+        assert res_data["nutrition_info"][0]["calories"] == 800
+        assert res_data["ingredientes"][0]["unit"]["unit_id"] == unit_id
+
+        client.logout()
+
+    def test_add_recipe_not_logged_in_exception_raised(self) -> None:
+        db = TestingSessionLocal()
+        recipes_count = db.query(DB_Recipe).count()
+        db.close()
+
+        res = client.post("/recipes/recipe/add", json=recipe_data(1, 1))
+
+        assert res.status_code == 401
+        db = TestingSessionLocal()
+        assert db.query(DB_Recipe).count() == recipes_count
+        db.close()
+
+    def test_import_recipes_logged_in_valid_lines_imported_invalid_reported(self) -> None:
+        client.register_user(username="recipe_importer", password="password")
+        client.login(username="recipe_importer", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        lines = [
+            json.dumps(recipe_data(author_id, unit_id, description="First")),
+            "",
+            json.dumps({"description": "Invalid"}),
+            json.dumps(recipe_data(author_id, unit_id, description="Second")),
+            json.dumps(recipe_data(author_id, unit_id, description="Third")),
+        ]
+
+        res = client.post(
+            "/recipes/recipe/import",
+            params={"chunk_size": 2},
+            content="\n".join(lines).encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert res.status_code == 200
+        res_data = res.json()
+        assert res_data["imported"] == 3
+        assert res_data["failed"] == 1
+        assert [result["line"] for result in res_data["results"]] == [1, 3, 4, 5]
+        assert res_data["results"][1]["error"] is not None
+        recipe_id = res_data["results"][3]["recipe_id"]
+        recipe = client.get(f"/recipes/recipe/{recipe_id}").json()
+        assert recipe["description"] == "Third"
+        assert len(recipe["ingredientes"]) == 2
+        assert len(recipe["instructions"]) == 2
+
+        client.logout()
+
+    def test_get_recipe_number_of_queries_independent_of_recipe_size(self) -> None:
+        client.register_user(username="recipe_reader", password="password")
+        client.login(username="recipe_reader", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        liquid_unit_id = add_unit(unit="ml", liquid=True)
+        small_recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, unit_id)
+        ).json()["recipe_id"]
+        big_recipe_id = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(
+                author_id,
+                unit_id,
+                ingredients=[
+                    {
+                        "ingredient": f"ingredient {i}",
+                        "amount": i,
+                        "unit_id": liquid_unit_id if i % 2 else unit_id,
+                    }
+                    for i in range(20)
+                ],
+                instructions=[{"text": f"Step {i}.", "order": i} for i in range(20)],
+            ),
+        ).json()["recipe_id"]
+        client.logout()
+
+        with count_queries() as small_recipe_queries:
+            client.get(f"/recipes/recipe/{small_recipe_id}")
+        with count_queries() as big_recipe_queries:
+            res = client.get(f"/recipes/recipe/{big_recipe_id}")
+
+        assert res.status_code == 200
+        assert len(res.json()["ingredientes"]) == 20
+        assert len(big_recipe_queries) == len(small_recipe_queries)
+
+    def test_list_recipes_following_cursor_every_recipe_returned_once(self) -> None:
+        client.register_user(username="recipe_lister", password="password")
+        client.login(username="recipe_lister", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        recipe_ids = [
+            client.post("/recipes/recipe/add", json=recipe_data(author_id, unit_id)).json()[
+                "recipe_id"
+            ]
+            for _ in range(5)
+        ]
+        client.logout()
+
+        for order_by, descending in [("recipe_id", False), ("create_date", True)]:
+            listed_ids = []
+            params = {
+                "author_id": author_id,
+                "limit": 2,
+                "order_by": order_by,
+                "descending": descending,
+            }
+            res = client.get("/recipes", params=params)
+            while True:
+                assert res.status_code == 200
+                res_data = res.json()
+                listed_ids += [recipe["recipe_id"] for recipe in res_data["recipes"]]
+                if res_data["next_cursor"] is None:
+                    break
+                res = client.get("/recipes", params={**params, "cursor": res_data["next_cursor"]})
+
+            assert listed_ids == sorted(recipe_ids, reverse=descending)
+
+    def test_list_recipes_cursor_for_different_order_exception_raised(self) -> None:
+        client.register_user(username="recipe_lister", password="password")
+        client.login(username="recipe_lister", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        for _ in range(2):
+            client.post("/recipes/recipe/add", json=recipe_data(author_id, unit_id))
+        client.logout()
+
+        cursor = client.get("/recipes", params={"limit": 1}).json()["next_cursor"]
+        res = client.get(
+            "/recipes", params={"limit": 1, "order_by": "create_date", "cursor": cursor}
+        )
+
+        assert res.status_code == 400
+        assert client.get("/recipes", params={"cursor": "not a cursor"}).status_code == 400
+
+    def test_search_recipes_matching_recipes_ranked_by_relevance(self) -> None:
+        client.register_user(username="recipe_searcher", password="password")
+        client.login(username="recipe_searcher", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        in_description_id = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(author_id, unit_id, description="Rhubarb crumble"),
+        ).json()["recipe_id"]
+        in_ingredients_id = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(
+                author_id,
+                unit_id,
+                description="Crumble",
+                ingredients=[{"ingredient": "rhubarb", "amount": 1, "unit_id": unit_id}],
+            ),
+        ).json()["recipe_id"]
+        deleted_id = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(author_id, unit_id, description="Rhubarb jam"),
+        ).json()["recipe_id"]
+        client.delete(f"/recipes/recipe/delete/{deleted_id}")
+        client.logout()
+
+        res = client.get("/recipes/search", params={"q": "RHUBARB", "limit": 1})
+        assert res.status_code == 200
+        res_data = res.json()
+        assert [recipe["recipe_id"] for recipe in res_data["recipes"]] == [in_description_id]
+
+        res = client.get(
+            "/recipes/search",
+            params={"q": "RHUBARB", "limit": 1, "cursor": res_data["next_cursor"]},
+        )
+        res_data = res.json()
+        assert [recipe["recipe_id"] for recipe in res_data["recipes"]] == [in_ingredients_id]
+        assert res_data["next_cursor"] is None
+
+    def test_search_terms_normalized_before_indexing(self) -> None:
+        client.register_user(username="accent_searcher", password="password")
+        client.login(username="accent_searcher", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        res = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(author_id, unit_id, description="Café cafe Straße strasse"),
+        )
+        client.logout()
+
+        assert res.status_code == 201
+        recipe_id = res.json()["recipe_id"]
+        for query in ("CAFE", "straße"):
+            res = client.get("/recipes/search", params={"q": query})
+            assert [recipe["recipe_id"] for recipe in res.json()["recipes"]] == [recipe_id]
+
+    def test_pantry_recipes_ranked_by_ingredient_coverage(self) -> None:
+        client.register_user(username="pantry_user", password="password")
+        client.login(username="pantry_user", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+
+        def add_recipe(*ingredients: str) -> int:
+            return client.post(
+                "/recipes/recipe/add",
+                json=recipe_data(
+                    author_id,
+                    unit_id,
+                    ingredients=[
+                        {"ingredient": ingredient, "amount": 1, "unit_id": unit_id}
+                        for ingredient in ingredients
+                    ],
+                ),
+            ).json()["recipe_id"]
+
+        half_covered_id = add_recipe("Quince", "Saffron")
+        client.get("/recipes/pantry", params={"ingredients": ["quince"]})
+        fully_covered_id = add_recipe("quince ", "Star  Anise")
+        deleted_id = add_recipe("quince")
+        client.delete(f"/recipes/recipe/delete/{deleted_id}")
+        client.logout()
+
+        res = client.get("/recipes/pantry", params={"ingredients": ["QUINCE", "star anise"]})
+
+        assert res.status_code == 200
+        res_data = res.json()
+        assert [match["recipe_id"] for match in res_data] == [fully_covered_id, half_covered_id]
+        assert res_data[0]["coverage"] == 1
+        assert res_data[1]["matched_ingredients"] == ["quince"]
+        assert res_data[1]["missing_ingredients"] == ["saffron"]
+
+    def test_pantry_index_rebuilt_with_changes_of_other_workers(self) -> None:
+        client.register_user(username="pantry_rebuild_user", password="password")
+        client.login(username="pantry_rebuild_user", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        client.get("/recipes/pantry", params={"ingredients": ["medlar"]})
+        recipe_id = client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(
+                author_id,
+                unit_id,
+                ingredients=[{"ingredient": "medlar", "amount": 1, "unit_id": unit_id}],
+            ),
+        ).json()["recipe_id"]
+        client.logout()
+        # as if another worker had added the recipe
+        PantryIndex.remove_recipe(recipe_id)
+
+        res = client.get("/recipes/pantry", params={"ingredients": ["medlar"]})
+        assert [match["recipe_id"] for match in res.json()] == []
+
+        PantryIndex._built_at -= PantryIndex.REBUILD_INTERVAL + 1
+        res = client.get("/recipes/pantry", params={"ingredients": ["medlar"]})
+        assert [match["recipe_id"] for match in res.json()] == [recipe_id]
+
+    def test_get_recipe_cached_recipe_refreshed_after_rating(self) -> None:
+        client.register_user(username="cached_author", password="password")
+        client.register_user(username="cached_rater", password="password")
+        client.login(username="cached_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, add_unit())
+        ).json()["recipe_id"]
+        client.logout()
+
+        assert client.get(f"/recipes/recipe/{recipe_id}").json()["ratings"] == []
+        assert client.get(f"/recipes/recipe/{recipe_id}").json()["ratings"] == []
+        client.login(username="cached_rater", password="password")
+        rating_id = client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": 5}).json()[
+            "rating_id"
+        ]
+
+        ratings = client.get(f"/recipes/recipe/{recipe_id}").json()["ratings"]
+        assert [rating["rating_id"] for rating in ratings] == [rating_id]
+
+        client.delete(f"/ratings/delete/{rating_id}")
+        assert client.get(f"/recipes/recipe/{recipe_id}").json()["ratings"] == []
+
+        client.logout()
+
+    def test_get_recipe_etag_matches_not_modified_returned_until_rated(self) -> None:
+        client.register_user(username="etag_author", password="password")
+        client.register_user(username="etag_rater", password="password")
+        client.login(username="etag_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, add_unit())
+        ).json()["recipe_id"]
+        client.logout()
+        etag = client.get(f"/recipes/recipe/{recipe_id}").headers["ETag"]
+
+        res = client.get(f"/recipes/recipe/{recipe_id}", headers={"If-None-Match": etag})
+        assert res.status_code == 304
+
+        recipe_cache.clear()
+        res = client.get(f"/recipes/recipe/{recipe_id}", headers={"If-None-Match": etag})
+        assert res.status_code == 304
+
+        client.login(username="etag_rater", password="password")
+        client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": 4})
+        client.logout()
+        res = client.get(f"/recipes/recipe/{recipe_id}", headers={"If-None-Match": etag})
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+
+    def test_rating_summary_updated_with_ratings_and_recomputed(self) -> None:
+        for username in ["summary_author", "summary_rater1", "summary_rater2"]:
+            client.register_user(username=username, password="password")
+        client.login(username="summary_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, add_unit())
+        ).json()["recipe_id"]
+        client.logout()
+        rating_ids = []
+        for username, rating in [("summary_rater1", 5), ("summary_rater2", 2)]:
+            client.login(username=username, password="password")
+            rating_ids.append(
+                client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": rating}).json()[
+                    "rating_id"
+                ]
+            )
+
+        rating_summary = client.get(f"/recipes/recipe/{recipe_id}").json()["rating_summary"]
+        assert rating_summary == {"count": 2, "average": 3.5, "histogram": [0, 1, 0, 0, 1]}
+
+        client.delete(f"/ratings/delete/{rating_ids[-1]}")
+        client.logout()
+        rating_summary = client.get(f"/recipes/recipe/{recipe_id}").json()["rating_summary"]
+        assert rating_summary == {"count": 1, "average": 5, "histogram": [0, 0, 0, 0, 1]}
+
+        db = TestingSessionLocal()
+        db.query(DB_Recipe).filter(DB_Recipe.recipe_id == recipe_id).update({"rating_count": 0})
+        db.commit()
+        recompute_rating_aggregates(db=db, batch_size=2)
+        db.close()
+        rating_summary = client.get(f"/recipes/recipe/{recipe_id}").json()["rating_summary"]
+        assert rating_summary == {"count": 1, "average": 5, "histogram": [0, 0, 0, 0, 1]}
+
+    def test_add_duplicate_rating_rejected_without_changing_summary(self) -> None:
+        for username in ["duplicate_author", "duplicate_rater"]:
+            client.register_user(username=username, password="password")
+        client.login(username="duplicate_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, add_unit())
+        ).json()["recipe_id"]
+        client.logout()
+        client.login(username="duplicate_rater", password="password")
+        client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": 4})
+
+        res = client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": 2})
+
+        assert res.status_code == 403
+        client.logout()
+        rating_summary = client.get(f"/recipes/recipe/{recipe_id}").json()["rating_summary"]
+        assert rating_summary == {"count": 1, "average": 4, "histogram": [0, 0, 0, 1, 0]}
+
+    def test_add_rating_out_of_range_exception_raised(self) -> None:
+        client.register_user(username="summary_rater1", password="password")
+        client.login(username="summary_rater1", password="password")
+
+        res = client.post("/ratings/add", json={"recipe_id": 1, "rating": 6})
+
+        assert res.status_code == 422
+
+        client.logout()
+
+    def test_top_recipes_ranked_by_bayesian_average_within_tag(self) -> None:
+        for username in ["top_author", "top_rater1", "top_rater2", "top_rater3"]:
+            client.register_user(username=username, password="password")
+        client.login(username="top_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        tag_id = add_tag("top_tag")
+        recipe_ids = [
+            client.post(
+                "/recipes/recipe/add", json=recipe_data(author_id, unit_id, tags=[tag_id])
+            ).json()["recipe_id"]
+            for _ in range(2)
+        ]
+        client.logout()
+        assert client.get("/recipes/top", params={"tag_id": tag_id}).json() == []
+
+        rating_ids = {}
+        for username, recipe_id in [
+            ("top_rater1", recipe_ids[0]),
+            ("top_rater2", recipe_ids[0]),
+            ("top_rater3", recipe_ids[1]),
+        ]:
+            client.login(username=username, password="password")
+            rating_ids[username] = client.post(
+                "/ratings/add", json={"recipe_id": recipe_id, "rating": 5}
+            ).json()["rating_id"]
+            client.logout()
+
+        top_recipes = client.get("/recipes/top", params={"tag_id": tag_id}).json()
+        assert [top_recipe["recipe"]["recipe_id"] for top_recipe in top_recipes] == recipe_ids
+        assert top_recipes[0]["score"] > top_recipes[1]["score"]
+
+        client.login(username="top_rater3", password="password")
+        client.delete(f"/ratings/delete/{rating_ids['top_rater3']}")
+        client.logout()
+        top_recipes = client.get("/recipes/top", params={"tag_id": tag_id}).json()
+        assert [top_recipe["recipe"]["recipe_id"] for top_recipe in top_recipes] == recipe_ids[:1]
+
+    def test_top_recipes_not_double_counted_and_dropped_with_deleted_tag(self) -> None:
+        for username in ["top_once_author", "top_once_rater", "top_once_admin"]:
+            client.register_user(username=username, password="password")
+        client.login(username="top_once_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        tag_id = add_tag("top_once_tag")
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, add_unit(), tags=[tag_id])
+        ).json()["recipe_id"]
+        client.logout()
+        client.get("/recipes/top")
+        client.login(username="top_once_rater", password="password")
+        client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": 5})
+        client.logout()
+
+        # a rebuild may already include the rating the update is applied for
+        db = TestingSessionLocal()
+        RecipeLeaderboard.load(db)
+        top_recipes = client.get("/recipes/top", params={"tag_id": tag_id}).json()
+        RecipeLeaderboard.update_recipe(db=db, recipe_id=recipe_id)
+        db.query(DB_User).filter(DB_User.username == "top_once_admin").update(
+            {"role": Roles.ADMIN.value}
+        )
+        db.commit()
+        db.close()
+        assert client.get("/recipes/top", params={"tag_id": tag_id}).json() == top_recipes
+
+        client.login(username="top_once_admin", password="password")
+        client.delete(f"/tags/delete/{tag_id}")
+        client.logout()
+        assert client.get("/recipes/top", params={"tag_id": tag_id}).json() == []
+
+    def test_similar_and_recommended_recipes_computed_from_ratings(self) -> None:
+        usernames = ["similar_author", "similar_rater1", "similar_rater2", "similar_reader"]
+        for username in usernames:
+            client.register_user(username=username, password="password")
+        client.login(username="similar_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        recipe_ids = [
+            client.post("/recipes/recipe/add", json=recipe_data(author_id, unit_id)).json()[
+                "recipe_id"
+            ]
+            for _ in range(3)
+        ]
+        client.logout()
+        ratings = {
+            "similar_rater1": [(recipe_ids[0], 5), (recipe_ids[1], 5), (recipe_ids[2], 1)],
+            "similar_rater2": [(recipe_ids[0], 4), (recipe_ids[1], 5)],
+            "similar_reader": [(recipe_ids[0], 5)],
+        }
+        for username, user_ratings in ratings.items():
+            client.login(username=username, password="password")
+            for recipe_id, rating in user_ratings:
+                client.post("/ratings/add", json={"recipe_id": recipe_id, "rating": rating})
+            client.logout()
+
+        db = TestingSessionLocal()
+        compute_recipe_similarities(db=db, batch_size=2)
+        db.close()
+
+        similar_recipes = client.get(f"/recipes/recipe/{recipe_ids[0]}/similar").json()
+        assert [similar["recipe"]["recipe_id"] for similar in similar_recipes] == recipe_ids[1:]
+        assert similar_recipes[0]["score"] > similar_recipes[1]["score"]
+
+        client.login(username="similar_reader", password="password")
+        recommended_recipes = client.get("/recipes/recommended").json()
+        client.logout()
+        assert [recommended["recipe"]["recipe_id"] for recommended in recommended_recipes] == (
+            recipe_ids[1:]
+        )
+
+    def test_filter_recipes_by_nutrition_per_serving_and_tags(self) -> None:
+        client.register_user(username="nutrition_author", password="password")
+        client.login(username="nutrition_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        tag_id = add_tag("nutrition_tag")
+        recipe_ids = [
+            client.post(
+                "/recipes/recipe/add",
+                json=recipe_data(author_id, unit_id, servings=servings, tags=[tag_id]),
+            ).json()["recipe_id"]
+            for servings in [2, 1, 4]
+        ]
+        client.logout()
+
+        res = client.get(
+            "/recipes/nutrition",
+            params={"tag_ids": [tag_id], "max_calories": 500, "min_protein": 10},
+        )
+        assert [recipe["recipe_id"] for recipe in res.json()["recipes"]] == recipe_ids[:1]
+
+        listed_recipe_ids = []
+        params = {"tag_ids": [tag_id], "min_calories": 400, "limit": 1}
+        while True:
+            page = client.get("/recipes/nutrition", params=params).json()
+            listed_recipe_ids.extend(recipe["recipe_id"] for recipe in page["recipes"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        assert listed_recipe_ids == recipe_ids[:2]
+
+    def test_shopping_list_saved_recipes_amounts_converted_scaled_and_summed(self) -> None:
+        client.register_user(username="shopping_user", password="password")
+        client.login(username="shopping_user", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        grams, kilograms, pinches = add_unit("g"), add_unit("kg"), add_unit("pinch")
+        milliliters, liters = add_unit("ml", liquid=True), add_unit("l", liquid=True)
+        recipe_ingredients = [
+            (2, [("Flour", 500, grams), ("milk", 300, milliliters)]),
+            (4, [("flour", 1, kilograms), ("Milk", 0.5, liters), ("salt", 1, pinches)]),
+        ]
+        for servings, ingredients in recipe_ingredients:
+            recipe_id = client.post(
+                "/recipes/recipe/add",
+                json=recipe_data(
+                    author_id,
+                    grams,
+                    servings=servings,
+                    ingredients=[
+                        {"ingredient": ingredient, "amount": amount, "unit_id": unit_id}
+                        for ingredient, amount, unit_id in ingredients
+                    ],
+                ),
+            ).json()["recipe_id"]
+            client.post(f"/recipes/saved/save/{recipe_id}")
+
+        shopping_list = client.get("/recipes/saved/shopping_list").json()
+        assert shopping_list == [
+            {"ingredient": "flour", "amount": 1.5, "unit": "kg"},
+            {"ingredient": "milk", "amount": 800, "unit": "ml"},
+            {"ingredient": "salt", "amount": 1, "unit": "pinch"},
+        ]
+
+        shopping_list = client.get("/recipes/saved/shopping_list", params={"servings": 4}).json()
+        assert shopping_list == [
+            {"ingredient": "flour", "amount": 2, "unit": "kg"},
+            {"ingredient": "milk", "amount": 1.1, "unit": "l"},
+            {"ingredient": "salt", "amount": 1, "unit": "pinch"},
+        ]
+        client.logout()
+
+    def test_admin_lists_ingredients_page_by_page_and_as_ndjson_stream(self) -> None:
+        client.register_user(username="ingredients_admin", password="password")
+        db = TestingSessionLocal()
+        db.query(DB_User).filter(DB_User.username == "ingredients_admin").update(
+            {"role": Roles.ADMIN.value}
+        )
+        db.commit()
+        db.close()
+        client.login(username="ingredients_admin", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        client.post(
+            "/recipes/recipe/add",
+            json=recipe_data(
+                author_id,
+                unit_id,
+                ingredients=[
+                    {"ingredient": f"ingredient {i}", "amount": i, "unit_id": unit_id}
+                    for i in range(1, 6)
+                ],
+            ),
+        )
+
+        paged_ingredients = []
+        params = {"limit": 2}
+        while True:
+            response = client.get("/recipes/ingredients/list", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["ingredients"]) <= 2
+            paged_ingredients.extend(page["ingredients"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        assert [ingredient["ingredient"] for ingredient in paged_ingredients[-5:]] == [
+            f"ingredient {i}" for i in range(1, 6)
+        ]
+
+        with count_queries() as statements:
+            response = client.get("/recipes/ingredients/list", params={"stream": True})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert not [statement for statement in statements if "FROM units" in statement]
+        assert [json.loads(line) for line in response.text.splitlines()] == paged_ingredients
+
+        response = client.get(
+            "/recipes/ingredients/list",
+            params={
+                "stream": True,
+                "cursor": client.get("/recipes/ingredients/list", params={"limit": 1}).json()[
+                    "next_cursor"
+                ],
+            },
+        )
+        assert [json.loads(line) for line in response.text.splitlines()] == paged_ingredients[1:]
+
+        response = client.get("/recipes/ingredients/list", params={"cursor": "invalid"})
+        assert response.status_code == 400
+        client.logout()
+
+    def test_recipe_fields_and_expand_prune_response_and_skip_loading(self) -> None:
+        client.register_user(username="fields_author", password="password")
+        client.login(username="fields_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        tag_id = add_tag("fields_tag")
+        recipe_id = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, unit_id, tags=[tag_id])
+        ).json()["recipe_id"]
+
+        with count_queries() as statements:
+            res = client.get(
+                f"/recipes/recipe/{recipe_id}", params={"fields": "recipe_id,description"}
+            )
+        assert res.json() == {"recipe_id": recipe_id, "description": "Pancakes"}
+        assert not any("ingredientes" in statement for statement in statements)
+
+        res = client.get(f"/recipes/recipe/{recipe_id}", params={"expand": "tags"})
+        assert res.json()["tags"] == [{"tag_id": tag_id, "name": "fields_tag"}]
+        assert res.json()["servings"] == 2
+        assert not {"ingredientes", "instructions", "nutrition_info", "ratings"} & res.json().keys()
+        not_modified_res = client.get(
+            f"/recipes/recipe/{recipe_id}",
+            params={"expand": "tags"},
+            headers={"If-None-Match": res.headers["ETag"]},
+        )
+        assert not_modified_res.status_code == 304
+
+        page = client.get(
+            "/recipes", params={"author_id": author_id, "fields": "recipe_id,tags", "expand": ""}
+        ).json()
+        assert page == {"recipes": [{"recipe_id": recipe_id}], "next_cursor": None}
+
+        res = client.get(f"/recipes/recipe/{recipe_id}", params={"fields": "recipe_id,name"})
+        assert res.status_code == 400
+        assert res.json()["detail"] == "Unknown fields: name."
+        client.logout()
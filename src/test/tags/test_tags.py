@@ -0,0 +1,113 @@
+import math
+
+import pytest
+from sqlalchemy import create_mock_engine
+from sqlalchemy.orm import Session
+
+from src.db.dialects import UnsupportedDialectError
+from src.db.models import DB_User
+from src.roles import Roles
+from src.routes.tags.crud import _upsert_cooccurrences
+from src.test.client import client
+from src.test.db import TestingSessionLocal
+from src.test.recipes.test_recipes import add_tag, add_unit, count_queries, recipe_data
+
+
+def make_admin(username: str) -> None:
+    """Register a user with the given username and grant them the admin role."""
+    client.register_user(username=username, password="password")
+    db = TestingSessionLocal()
+    db.query(DB_User).filter(DB_User.username == username).update({"role": Roles.ADMIN.value})
+    db.commit()
+    db.close()
+
+
+class TestTags:
+
+    def test_related_tags_ranked_by_lift_and_updated_on_recipe_deletion(self) -> None:
+        client.register_user(username="related_tags_author", password="password")
+        client.login(username="related_tags_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        pasta, italian, quick = (add_tag(name) for name in ["pasta", "italian", "quick"])
+        recipe_ids = [
+            client.post(
+                "/recipes/recipe/add", json=recipe_data(author_id, unit_id, tags=tags)
+            ).json()["recipe_id"]
+            for tags in [[pasta, italian], [pasta, italian], [pasta, quick], [quick], [quick]]
+        ]
+
+        related_tags = client.get(f"/tags/related/{pasta}", params={"min_recipe_count": 1}).json()
+        assert [related["tag"]["tag_id"] for related in related_tags] == [italian, quick]
+        assert [related["recipe_count"] for related in related_tags] == [2, 1]
+        assert related_tags[0]["lift"] > related_tags[1]["lift"]
+        assert related_tags[0]["pmi"] == math.log2(related_tags[0]["lift"])
+
+        client.delete(f"/recipes/recipe/delete/{recipe_ids[0]}")
+        related_tags = client.get(f"/tags/related/{pasta}").json()
+        assert related_tags == []
+        related_tags = client.get(f"/tags/related/{pasta}", params={"min_recipe_count": 1}).json()
+        assert [related["recipe_count"] for related in related_tags] == [1, 1]
+        client.logout()
+
+    def test_tag_list_served_from_cache_refreshed_by_admin_changes(self) -> None:
+        make_admin("tags_admin")
+        client.login(username="tags_admin", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        client.get("/tags/list")
+
+        tag_id = client.post("/tags/add", json={"name": "cached_tag"}).json()["tag_id"]
+        assert {"tag_id": tag_id, "name": "cached_tag"} in client.get("/tags/list").json()
+
+        with count_queries() as queries:
+            client.get("/tags/list")
+            client.get("/recipes/units/list")
+            recipe_id = client.post(
+                "/recipes/recipe/add", json=recipe_data(author_id, unit_id, tags=[tag_id])
+            ).json()["recipe_id"]
+        # tags and units are only loaded along with the added recipe
+        assert not any(query.startswith(("SELECT tags.", "SELECT units.")) for query in queries)
+
+        client.delete(f"/tags/delete/{tag_id}")
+        tags = client.get("/tags/list").json()
+        assert tag_id not in [tag["tag_id"] for tag in tags]
+        assert client.get(f"/recipes/recipe/{recipe_id}").json()["tags"] == []
+        client.logout()
+
+    def test_unknown_tag_reloads_cached_tags_once(self) -> None:
+        client.register_user(username="unknown_tag_author", password="password")
+        client.login(username="unknown_tag_author", password="password")
+        author_id = client.get("/auth/me").json()["user_id"]
+        unit_id = add_unit()
+        data = recipe_data(author_id, unit_id, tags=[1_000_000])
+
+        client.post("/recipes/recipe/add", json=data)
+        with count_queries() as queries:
+            assert client.post("/recipes/recipe/add", json=data).status_code == 201
+        assert not any(query.startswith(("SELECT tags.", "SELECT units.")) for query in queries)
+
+        tag_id = add_tag("tag_added_by_other_process")
+        res = client.post(
+            "/recipes/recipe/add", json=recipe_data(author_id, unit_id, tags=[tag_id])
+        )
+        assert [tag["tag_id"] for tag in res.json()["tags"]] == [tag_id]
+        client.logout()
+
+    @pytest.mark.parametrize(
+        "url, clause",
+        [
+            ("mysql+pymysql://", "ON DUPLICATE KEY UPDATE"),
+            ("postgresql://", "ON CONFLICT (tag_id, other_tag_id) DO UPDATE"),
+            ("sqlite://", "ON CONFLICT (tag_id, other_tag_id) DO UPDATE"),
+        ],
+    )
+    def test_cooccurrences_upsert_built_for_dialect(self, url: str, clause: str) -> None:
+        mock_engine = create_mock_engine(url, executor=lambda *args, **kwargs: None)
+        statement = _upsert_cooccurrences(Session(bind=mock_engine))
+        assert clause in str(statement.compile(dialect=mock_engine.dialect))
+
+    def test_cooccurrences_upsert_rejected_for_unsupported_dialect(self) -> None:
+        mock_engine = create_mock_engine("mssql+pyodbc://", executor=lambda *args, **kwargs: None)
+        with pytest.raises(UnsupportedDialectError):
+            _upsert_cooccurrences(Session(bind=mock_engine))
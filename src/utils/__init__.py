@@ -1,6 +1,26 @@
 """Utils for the app."""
 
+from .cache import LRUCache, TTLCache
 from .config import ConfigManager
+from .etag import etag_matches, make_etag
+from .fields import prune_model, select_fields
 from .file_storage import FileStorageManager
+from .ndjson import iter_ndjson_lines, stream_ndjson
+from .pagination import decode_after_cursor, decode_cursor, encode_cursor, split_page
 
-__all__ = ["ConfigManager", "FileStorageManager"]
+__all__ = [
+    "ConfigManager",
+    "FileStorageManager",
+    "LRUCache",
+    "TTLCache",
+    "decode_after_cursor",
+    "decode_cursor",
+    "encode_cursor",
+    "etag_matches",
+    "iter_ndjson_lines",
+    "make_etag",
+    "prune_model",
+    "select_fields",
+    "split_page",
+    "stream_ndjson",
+]
@@ -0,0 +1,205 @@
+"""In-process caching utilities."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Thread-safe LRU cache.
+
+    The cache is bounded both by the number of entries and by their total
+    size, evicting the least recently used entries when either limit is hit.
+    The size of an entry is the length of its value, unless given explicitly.
+
+    Every invalidation bumps `version`. Passing the version read before
+    building a value to `set` prevents storing values that might have been
+    built from data changed in the meantime.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value or `None` if the key is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(
+        self, key: Hashable, value: Any, size: int | None = None, version: int | None = None
+    ) -> None:
+        """Cache the given value.
+
+        Args:
+            size: Size of the value in bytes, defaults to `len(value)`.
+            version: Value of `version` read before the value was built. The
+                    value is not cached if anything was invalidated since then.
+        """
+        size = len(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._pop(key)
+            self._entries[key] = (value, size)
+            self._size_bytes += size
+            while len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Remove the given keys from the cache."""
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._pop(key)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the current size of the cache and its hit, miss and eviction counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_bytes -= entry[1]
+
+
+class TTLCache:
+    """Thread-safe cache whose entries expire after a given number of seconds.
+
+    The cache is bounded by the number of entries, evicting the least recently
+    used ones when the limit is hit. Every entry belongs to a group, e.g. the ID
+    of the row it was built from, so that all the entries built from a changed
+    row can be invalidated at once.
+
+    Like in `LRUCache`, every invalidation bumps `version`, which can be passed
+    to `set` to skip storing values built from data changed in the meantime.
+    """
+
+    def __init__(self, max_entries: int, max_age: float) -> None:
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, Hashable, float]] = OrderedDict()
+        self._groups: dict[Hashable, set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value or `None` if the key is not cached or has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._pop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        group: Hashable,
+        max_age: float | None = None,
+        version: int | None = None,
+    ) -> None:
+        """Cache the given value.
+
+        Args:
+            group: Group of the entry, used to invalidate it.
+            max_age: Number of seconds after which the value expires, when it is
+                    sooner than the cache's `max_age`.
+            version: Value of `version` read before the value was built. The
+                    value is not cached if anything was invalidated since then.
+        """
+        max_age = self.max_age if max_age is None else min(max_age, self.max_age)
+        if max_age <= 0:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._pop(key)
+            self._entries[key] = (value, group, time.monotonic() + max_age)
+            self._groups.setdefault(group, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *groups: Hashable) -> None:
+        """Remove all the entries of the given groups from the cache."""
+        with self._lock:
+            self.version += 1
+            for group in groups:
+                for key in self._groups.pop(group, ()):
+                    self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._groups.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Return the current size of the cache, its counters and the ratio of hits to lookups."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_age": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._groups[entry[1]]
+            keys.discard(key)
+            if not keys:
+                del self._groups[entry[1]]
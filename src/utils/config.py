@@ -18,6 +18,40 @@ class ConfigView(BaseModel):
         token_signing_key: Secret key used to sign the JWTs.
         token_signing_algorithm: Name of the algorithm used to sign the
                                     token.
+        access_token_expire_minutes: Number of minutes after which the
+                                    access tokens expire.
+        recipe_cache_max_entries: Maximum number of serialized recipes kept
+                                    in memory by each worker.
+        recipe_cache_max_bytes: Maximum total size of serialized recipes kept
+                                    in memory by each worker.
+        feed_fanout_max_followers: Maximum number of followers of an author
+                                    whose new recipes are written to the
+                                    feeds of all the followers; recipes of
+                                    more popular authors are merged into the
+                                    feeds when they are read.
+        feed_fanout_max_subscribers: Maximum number of subscribers of a tag
+                                    whose new recipes are written to the
+                                    feeds of all the subscribers; recipes
+                                    with more popular tags are merged into
+                                    the feeds when they are read.
+        reference_data_max_age: Number of seconds after which each worker
+                                    reloads its copy of the units and tags.
+        principal_cache_max_entries: Maximum number of authenticated access
+                                    tokens kept in memory by each worker.
+        principal_cache_max_age: Number of seconds after which each worker
+                                    verifies a cached access token again.
+                                    Revoked tokens and deleted users are
+                                    rejected by the worker which handled
+                                    the change right away and by the other
+                                    workers only after this long.
+        password_hash_rounds: Cost factor of the bcrypt password hashes, i.e.
+                                    the base-2 logarithm of the number of rounds.
+        password_hash_workers: Number of threads hashing and verifying
+                                    passwords in each worker.
+        password_hash_max_pending: Maximum number of password hashing and
+                                    verification operations running or
+                                    waiting in each worker; further
+                                    requests fail with 503 straight away.
     """
 
     app_name: str
@@ -25,6 +59,17 @@ class ConfigView(BaseModel):
     token_signing_algorithm: str
     file_storage_path: DirectoryPath
     default_profile_pic_path: FilePath
+    access_token_expire_minutes: int = 30
+    recipe_cache_max_entries: int = 10_000
+    recipe_cache_max_bytes: int = 64 * 1024 * 1024
+    feed_fanout_max_followers: int = 10_000
+    feed_fanout_max_subscribers: int = 10_000
+    reference_data_max_age: float = 60
+    principal_cache_max_entries: int = 10_000
+    principal_cache_max_age: float = 5
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 32
 
 
 class ConfigManager:
@@ -0,0 +1,28 @@
+"""Utilities for conditional requests based on entity tags (ETags)."""
+
+import hashlib
+from typing import Any
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag identifying a representation described by the given parts.
+
+    The parts should change whenever the representation changes, for example
+    they might be IDs and versions of the rows it is built from.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check if the value of an `If-None-Match` header matches the given ETag.
+
+    Uses the weak comparison required for `If-None-Match` by RFC 9110.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
+    )
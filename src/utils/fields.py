@@ -0,0 +1,66 @@
+"""Utilities for sparse fieldsets, i.e. serializing only some fields of a model."""
+
+from functools import lru_cache
+from typing import Collection
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+
+
+def select_fields(
+    model: type[BaseModel],
+    relationships: Collection[str],
+    fields: str | None = None,
+    expand: str | None = None,
+) -> frozenset[str] | None:
+    """Resolve the `fields` and `expand` query parameters into the fields to serialize.
+
+    Both parameters are comma-separated lists of field names. `fields` selects
+    the fields of the model to serialize, `expand` selects which of the fields
+    backed by relationships to serialize, the others being left out.
+
+    Args:
+        relationships: Names of the model's fields backed by relationships.
+
+    Raises:
+        HTTPException: Raised when either of the parameters names an unknown field.
+
+    Returns:
+        Names of the selected fields or `None` when all of them are selected.
+    """
+    if fields is None and expand is None:
+        return None
+    selected_fields = set(model.model_fields)
+    if fields is not None:
+        selected_fields &= _parse_field_names(fields, allowed=model.model_fields.keys())
+    if expand is not None:
+        selected_fields -= set(relationships) - _parse_field_names(expand, allowed=relationships)
+    return frozenset(selected_fields)
+
+
+@lru_cache(maxsize=256)
+def prune_model(model: type[BaseModel], fields: frozenset[str]) -> type[BaseModel]:
+    """Build a model with only the given fields of `model`.
+
+    Objects should be validated with `from_attributes=True`, so that it applies
+    to the nested models as well.
+    """
+    return create_model(
+        f"{model.__name__}Fields",
+        **{
+            name: (field_info.annotation, field_info)
+            for name, field_info in model.model_fields.items()
+            if name in fields
+        },
+    )
+
+
+def _parse_field_names(value: str, allowed: Collection[str]) -> set[str]:
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown_names = names - set(allowed)
+    if unknown_names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown_names))}.",
+        )
+    return names
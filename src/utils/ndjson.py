@@ -0,0 +1,49 @@
+"""Utilities for working with newline-delimited JSON (NDJSON) streams."""
+
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+
+from pydantic import BaseModel
+
+
+async def iter_ndjson_lines(stream: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """Split a stream of bytes into NDJSON lines.
+
+    Only the currently incomplete line is buffered, so the whole body is
+    never held in memory at once.
+
+    Yields:
+        Tuples with the 1-based number of the line and its content. Blank
+        lines are skipped but still counted.
+    """
+    buffer = b""
+    line_number = 0
+    async for data in stream:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def stream_ndjson(
+    items: Iterable[Any], model: type[BaseModel], close: Callable[[], None] | None = None
+) -> Iterator[bytes]:
+    """Serialize items as NDJSON lines, one line per item.
+
+    Args:
+        items: Objects to serialize, possibly read lazily from the DB.
+        model: Model used to serialize each of the items.
+        close: Called once the stream is exhausted or aborted, e.g. to close
+                the DB session the items are read with.
+    """
+    try:
+        for item in items:
+            yield model.model_validate(
+                item, from_attributes=True
+            ).model_dump_json().encode() + b"\n"
+    finally:
+        if close is not None:
+            close()
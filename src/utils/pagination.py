@@ -0,0 +1,63 @@
+"""Utilities for keyset (cursor) pagination."""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """Encode the position of the last returned row as an opaque cursor."""
+    data = json.dumps(payload, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode a cursor created with `encode_cursor`.
+
+    Raises:
+        HTTPException: Raised when the cursor is malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        payload = None
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor."
+        )
+    return payload
+
+
+def decode_after_cursor(cursor: str | None) -> int | None:
+    """Decode a cursor pointing after a row with the given integer key, as built by `split_page`.
+
+    Raises:
+        HTTPException: Raised when the cursor is malformed.
+    """
+    if cursor is None:
+        return None
+    after = decode_cursor(cursor).get("after")
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor."
+        )
+    return after
+
+
+def split_page(rows: list[Any], limit: int, key: str) -> tuple[list[Any], str | None]:
+    """Cut rows fetched with `limit + 1` down to a single page.
+
+    Args:
+        key: Name of the attribute the rows are ordered by.
+
+    Returns:
+        Tuple with the rows of the page and the cursor of the next page,
+        which is `None` on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor({"after": getattr(rows[-1], key)})